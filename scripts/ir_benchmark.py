@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# Measure the IR pipeline against simulated ADS1015s: sampling rate and how long the front pair takes to be detected.
+import sys
+from time import perf_counter, sleep
+
+from tabulate import tabulate
+
+from presenter_drivers.sensors.CCKIR import CCKIR
+from presenter_drivers.sensors.detector import Pair, PresenceDetector
+from presenter_drivers.sensors.hardware_sim.cckir import BACKGROUND, PAPER, SCENARIOS
+from presenter_drivers.sensors.ir import on_thresholds
+from presenter_drivers.sensors.sampler import NANOSECONDS_IN_SECOND, IRSampler
+
+SCENARIO = sys.argv[1] if len(sys.argv) > 1 else "checkPass"
+SECONDS = float(sys.argv[2]) if len(sys.argv) > 2 else 20.0
+PERIOD_SECONDS = 0.001
+NOISE = 15.0
+
+scenario = SCENARIOS[SCENARIO]()
+started = perf_counter()
+cckir = CCKIR({"simulation": {"scenario": SCENARIO, "noise": NOISE}})
+sampler = IRSampler({"cckir": cckir, "periodSeconds": PERIOD_SECONDS})
+ranges = [(BACKGROUND << 4, PAPER << 4)] * 6
+detector = PresenceDetector({"onThresholds": on_thresholds(ranges)})
+
+detections = []
+detector.add_listener(
+    lambda e: detections.append(e.timestamp_ns / NANOSECONDS_IN_SECOND - started)
+    if e.pair == Pair.FRONT and e.present
+    else None
+)
+
+sampler.start()
+seq = 0
+end = perf_counter() + SECONDS
+while perf_counter() < end:
+    for frame in sampler.buffer.since(seq):
+        detector.update(frame.values, frame.timestamp_ns)
+        seq = frame.seq + 1
+    sleep(0.01)
+sampler.stop()
+
+expected = []
+for start, _ in scenario.presence:
+    t = start
+    while t < SECONDS:
+        expected.append(t)
+        t += scenario.repeat_s if scenario.repeat_s else SECONDS
+latencies = [(d - e) * 1000 for e, d in zip(sorted(expected), detections) if d >= e]
+
+print(
+    tabulate(
+        [
+            (
+                SCENARIO,
+                f"{sampler.achieved_rate_hz():.0f}",
+                len(expected),
+                len(detections),
+                f"{min(latencies):.1f}" if latencies else "-",
+                f"{sum(latencies) / len(latencies):.1f}" if latencies else "-",
+                f"{max(latencies):.1f}" if latencies else "-",
+            )
+        ],
+        headers=[
+            "Scenario",
+            "Rate Hz",
+            "Checks",
+            "Detected",
+            "Min ms",
+            "Mean ms",
+            "Max ms",
+        ],
+    )
+)
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+import sys
+from time import sleep
+
+from presenter_drivers.sensors.CCKIR import CCKIR
+from presenter_drivers.sensors.recording import IRRecorder
+from presenter_drivers.sensors.sampler import IRSampler
+
+RECORD_SECONDS = 30
+PERIOD_SECONDS = 0.005
+
+path = sys.argv[1] if len(sys.argv) > 1 else "ir.rec"
+seconds = float(sys.argv[2]) if len(sys.argv) > 2 else RECORD_SECONDS
+
+sampler = IRSampler({"cckir": CCKIR({}), "periodSeconds": PERIOD_SECONDS})
+recorder = IRRecorder({"path": path, "buffer": sampler.buffer})
+
+recorder.start()
+sampler.start()
+print(f"Recording {seconds}s to {path}")
+sleep(seconds)
+sampler.stop()
+recorder.close()
+
+print(f"Recorded {recorder.frames} frames")
+print(f"Sampled at {sampler.achieved_rate_hz():.0f}Hz")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# Drive NeoPixelPRU at a requested frame rate into the PRU emulator and report what a real strip would have shown.
+import sys
+from time import perf_counter, sleep
+
+from tabulate import tabulate
+
+from presenter_drivers.neopixel.NeoPixelPRU import DEFAULT_LED_COUNT, NeoPixelPRU
+from presenter_drivers.neopixel.writer import PRUEmulatorWriter
+
+TARGET_FPS = float(sys.argv[1]) if len(sys.argv) > 1 else 60.0
+SECONDS = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+
+rows = []
+for firmware_version in ("1.x.x", "2.0.0"):
+    emulator = PRUEmulatorWriter({"targetFps": TARGET_FPS})
+    neopixel = NeoPixelPRU({"writer": emulator, "firmwareVersion": firmware_version})
+    period = 1 / TARGET_FPS
+    start = perf_counter()
+    frame = 0
+    while perf_counter() - start < SECONDS:
+        neopixel.set_color_run(
+            0, [(frame % 256, i, 0) for i in range(DEFAULT_LED_COUNT)]
+        )
+        frame += 1
+        sleep(max(0.0, start + frame * period - perf_counter()))
+    stats = emulator.stats
+    rows.append(
+        (
+            neopixel.protocol,
+            frame,
+            stats.frames,
+            stats.dropped,
+            stats.late,
+            f"{stats.fps:.1f}",
+            f"{stats.max_fps:.1f}",
+        )
+    )
+
+print(
+    tabulate(
+        rows,
+        headers=["Protocol", "Draws", "Shown", "Dropped", "Late", "FPS", "Max FPS"],
+    )
+)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# Compare writes, frame time and bytes per frame for NeoPixelPRU output modes through an unbuffered FileWriter.
+import os
+from time import perf_counter
+
+from tabulate import tabulate
+
+from presenter_drivers.neopixel.NeoPixelPRU import DEFAULT_LED_COUNT, NeoPixelPRU
+from presenter_drivers.neopixel.writer import FileWriter
+
+FRAMES = 2000
+
+
+class CountingFileWriter(FileWriter):
+    def __init__(self, file_path: str = ""):
+        super().__init__(file_path)
+        self.writes = 0
+
+    def write(self, b: bytearray) -> None:
+        self.writes += 1
+        super().write(b)
+
+
+def run(mode: str, auto_flush: bool, firmware_version: str, runs: bool) -> tuple:
+    with CountingFileWriter() as writer:
+        neopixel = NeoPixelPRU(
+            {
+                "writer": writer,
+                "autoFlush": auto_flush,
+                "firmwareVersion": firmware_version,
+            }
+        )
+        start = perf_counter()
+        for frame in range(FRAMES):
+            if runs:
+                neopixel.set_color_run_buffer(
+                    0, [(frame % 256, i, 0) for i in range(DEFAULT_LED_COUNT)]
+                )
+            else:
+                for i in range(DEFAULT_LED_COUNT):
+                    neopixel.set_color_buffer(i, frame % 256, i, 0)
+            neopixel.draw()
+        elapsed = perf_counter() - start
+        size = os.path.getsize(writer.file.name)
+    os.unlink(writer.file.name)
+    return (
+        mode,
+        writer.writes / FRAMES,
+        f"{elapsed / FRAMES * 1000000:.0f}",
+        size / FRAMES,
+    )
+
+
+print(
+    tabulate(
+        [
+            run("text per command", True, "1.x.x", False),
+            run("text buffered", False, "1.x.x", False),
+            run("binary buffered", False, "2.0.0", False),
+            run("binary run", False, "2.0.0", True),
+        ],
+        headers=["Mode", "Writes/frame", "us/frame", "Bytes/frame"],
+    )
+)
@@ -4,15 +4,18 @@ from time import sleep
 from tabulate import tabulate
 
 from presenter_drivers.sensors.CCKIR import CCKIR
-from presenter_drivers.sensors.ir import MinMax as MinMaxCalibrator
+from presenter_drivers.sensors.ir import StreamingCalibrator
+
+CALIBRATION_SECONDS = 3
 
 cckir = CCKIR({})
-calibrator = MinMaxCalibrator({"sensors": cckir.get_sensors()})
+calibrator = StreamingCalibrator({"sensors": cckir.get_sensors()})
 data = []
 
 for i in range(5):
+    calibrator.reset()
     calibrator.start()
-    sleep(10)
+    sleep(CALIBRATION_SECONDS)
     results = calibrator.stop()
     data.extend(
         [
@@ -30,4 +33,4 @@ for i in range(5):
     data.extend([[""] * 6])
     sleep(2)
 
-print(tabulate(data, headers=["Run", "Name", "Min", "Max", "% Diff", "Diff"]))
+print(tabulate(data, headers=["Run", "Name", "Low", "High", "% Diff", "Diff"]))
@@ -18,6 +18,12 @@ class WriterConfig(TypedDict, total=False):
 
 class NeoPixelPRUConfig(TypedDict, total=False):
     ledCount: int
+    bufferSize: int
+    autoFlush: bool
+    gamma: float
+    brightness: float
+    firmwareVersion: str
+    protocol: str
     writerConfig: WriterConfig
     writer: writer.Writer
     logger: Logger
@@ -44,10 +50,17 @@ class PawConfig(TypedDict, total=False):
     logger: Logger
 
 
+class CalibrationCacheConfig(TypedDict, total=False):
+    path: str
+    boardId: str
+
+
 class IRConfig(TypedDict, total=False):
     foreground: List[int]
     background: List[int]
     link: List[int]
+    calibrationSeconds: float
+    calibrationCache: CalibrationCacheConfig
     neoPixelPRUConfig: NeoPixelPRUConfig
     logger: Logger
 
@@ -10,7 +10,8 @@ from presenter_drivers.logger.logger import create_logger
 from presenter_drivers.neopixel import writer
 from presenter_drivers.neopixel.NeoPixelPRU import NeoPixelPRU
 from presenter_drivers.sensors.CCKIR import CCKIR
-from presenter_drivers.sensors.ir import MinMax
+from presenter_drivers.sensors.detector import PAIRS, Pair, PresenceDetector
+from presenter_drivers.sensors.ir import Calibrator, StreamingCalibrator, on_thresholds
 
 from .config import Config, IRConfig
 
@@ -36,6 +37,9 @@ DEFAULT_CONFIG = {
 
 logger = create_logger("IRDemo")
 
+DEFAULT_CALIBRATION_SECONDS = 10.0
+CALIBRATION_LIGHTS = 21
+
 
 def irDemo(config: IRConfig) -> None:  # pylint: disable = too-many-locals
     log: Logger = create_logger("IRDemo")
@@ -69,46 +73,51 @@ def irDemo(config: IRConfig) -> None:  # pylint: disable = too-many-locals
             cast(NeoPixelPRU.Config, neoPixelConfig)
         )
         cckIR = CCKIR(cast(CCKIR.Config, config))
-        calibrator = MinMax({"sensors": cckIR.get_sensors()})
 
-        input(
-            "\n\nPress enter when ready to calibrate. Remember to move paper around.\n"
-        )
-        minMaxes = _ir_demo_calibration(calibrator, neopixel_controller)
-        log.debug("\n%s\n\n", _ir_calibration_results_to_string(minMaxes))
-        # At least 10% greater than mid point to turn on.
-        onThresholds = [
-            (z[0] + (z[1][1] - z[0]) * 0.1)
-            for z in zip(
-                [v[0] + ((v[1] - v[0]) / 2) for v in minMaxes],
-                minMaxes,
+        calibration = cckIR.get_calibration()
+        if calibration is None:
+            calibrator = StreamingCalibrator({"sensors": cckIR.get_sensors()})
+            input(
+                "\n\nPress enter when ready to calibrate. Remember to move paper around.\n"
+            )
+            minMaxes = _ir_demo_calibration(
+                calibrator,
+                neopixel_controller,
+                config.get("calibrationSeconds", DEFAULT_CALIBRATION_SECONDS),
             )
-        ]
-        input("\n\nCalibration complete. Press a key to run demo.\n\n")
+            calibration = cckIR.set_calibration(minMaxes, on_thresholds(minMaxes))
+            input("\n\nCalibration complete. Press a key to run demo.\n\n")
+        log.debug("\n%s\n\n", _ir_calibration_results_to_string(calibration.ranges))
+        detector = PresenceDetector({"calibration": calibration})
         print("Demo engaged\n")
         print("Press ctrl+c to exit IR demo.")
 
+        for sensor in CCKIR.Sensor:
+            neopixel_controller.set_color_buffer(lights[sensor.value], *bg_color)
+        neopixel_controller.draw()
+
         try:
             while True:
-                for values in [
-                    cckIR.read_front(),
-                    cckIR.read_middle(),
-                    cckIR.read_rear(),
-                ]:
-                    _ir_demo_light_link(
-                        values, lights, onThresholds, neopixel_controller, link_color
-                    )
+                events = detector.update(cckIR.read_all())
+                if not events:
+                    continue
+
+                for event in events:
+                    if event.pair is not None:
+                        _ir_demo_light_link(
+                            event.pair,
+                            event.present,
+                            lights,
+                            neopixel_controller,
+                            link_color,
+                        )
 
+                # A link repaints the sensor lights at its ends.
                 for sensor in CCKIR.Sensor:
-                    if cckIR.read_sensor(sensor) > onThresholds[sensor.value]:
-                        # log.info("Under %s", sensor.name)
-                        neopixel_controller.set_color_buffer(
-                            lights[sensor.value], *fg_color
-                        )
-                    else:
-                        neopixel_controller.set_color_buffer(
-                            lights[sensor.value], *bg_color
-                        )
+                    neopixel_controller.set_color_buffer(
+                        lights[sensor.value],
+                        *(fg_color if detector.is_present(sensor) else bg_color),
+                    )
 
                 neopixel_controller.draw()
         except KeyboardInterrupt:
@@ -117,34 +126,30 @@ def irDemo(config: IRConfig) -> None:  # pylint: disable = too-many-locals
 
 
 def _ir_demo_light_link(
-    values: CCKIR.SensorPair,
+    pair: Pair,
+    present: bool,
     lights: List[int],
-    onThresholds: List[float],
     neopixel_controller: NeoPixelPRU,
     link_color: List[int],
 ) -> None:
-    left, right = values.keys()
-    if (
-        values[left] > onThresholds[left.value]
-        and values[right] > onThresholds[right.value]
-    ):
-        for x in range(lights[left.value], lights[right.value] + 1):
-            neopixel_controller.set_color_buffer(x, *link_color)
-    else:
-        for x in range(lights[left.value], lights[right.value] + 1):
-            neopixel_controller.set_color_buffer(x, 0, 0, 0)
+    left, right = PAIRS[pair]
+    color = link_color if present else [0, 0, 0]
+    for x in range(lights[left.value], lights[right.value] + 1):
+        neopixel_controller.set_color_buffer(x, *color)
 
 
 def _ir_demo_calibration(
-    calibrator: MinMax, neopixel_controller: NeoPixelPRU
+    calibrator: Calibrator,
+    neopixel_controller: NeoPixelPRU,
+    seconds: float = DEFAULT_CALIBRATION_SECONDS,
 ) -> Tuple[Tuple[int, int], ...]:
-    for i in range(21):
+    for i in range(CALIBRATION_LIGHTS):
         neopixel_controller.set_color_buffer(i + 16, 0, 128, 0)
     neopixel_controller.draw()
 
     calibrator.start()
-    for i in range(20, -1, -1):
-        sleep(1)
+    for i in range(CALIBRATION_LIGHTS - 1, -1, -1):
+        sleep(seconds / CALIBRATION_LIGHTS)
         neopixel_controller.set_color(i + 16, 0, 0, 0)
     neopixel_controller.clear()
     return calibrator.stop()
@@ -174,6 +179,8 @@ def _main(config: Config) -> None:
 
     cckConfig = config.get("cckConfig", {})
     cckConfig["irConfig"]["logger"] = logger
+    # Keep the calibration between runs, in the default cache unless the config sets one.
+    cckConfig["irConfig"].setdefault("calibrationCache", {})
 
     irDemo(cckConfig["irConfig"])
 
@@ -97,6 +97,7 @@ def runNeoPixelDemo(config: CCKDisplayConfig) -> None:
         testNo += 1
 
         log.info("Clean up.")
+        demo.stop()
         cck.all_segments_off()
 
 
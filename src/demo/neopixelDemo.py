@@ -1,42 +1,34 @@
 from __future__ import annotations
 
-from time import perf_counter_ns, sleep
+from typing import Mapping
 
+from presenter_drivers.neopixel.animation import Animation, Animator, Countdown, Flash
 from presenter_drivers.neopixel.CCKDisplay import CCKDisplay
-
-MILLI_SECOND_IN_NANO_SECOND = 1000000
+from presenter_drivers.neopixel.Color import GRB, PALETTE
+from presenter_drivers.neopixel.NeoPixelPRU import NeoPixelPRU
 
 
 class Demo:
     FLASH_RATE_MS = 1000  # On for FLASH_RATE_MS off for FLASH_RATE_MS
 
-    COLORS: dict[str, list[float]] = {
-        "BLACK": [0, 0, 0],
-        "OFF": [0, 0, 0],
-        "RED": [255, 0, 0],
-        "GREEN": [0, 255, 0],
-    }
+    COLORS: Mapping[str, GRB] = PALETTE
 
     def __init__(self, cckDisplay: CCKDisplay):
         self._cck: CCKDisplay = cckDisplay
+        self._animator: Animator = Animator({"neopixel": cckDisplay.neopixel}).start()
 
-    def all_Error_Flashing(self, timeMs: float) -> None:
-        on: bool = False
-        timeNS = timeMs * MILLI_SECOND_IN_NANO_SECOND
-        startTimeNS = perf_counter_ns()
-        while True:
-            dt = perf_counter_ns() - startTimeNS
-            on = not on
-            if dt >= timeNS:
-                self._cck.all_segments_off()
-                break
-
-            if on:
-                self._cck.set_all_segments_color(*Demo.COLORS["RED"])
-            else:
-                self._cck.all_segments_off()
+    def stop(self) -> None:
+        self._animator.stop()
 
-            sleep(Demo.FLASH_RATE_MS / 1000)
+    def all_Error_Flashing(self, timeMs: float) -> None:
+        self._play(
+            Flash(
+                NeoPixelPRU.SEGMENT_ALL,
+                Demo.COLORS["RED"].rgb,
+                timeMs / 1000,
+                Demo.FLASH_RATE_MS / 1000,
+            )
+        )
 
     def presenter_flashing(self, r: float, g: float, b: float, timeMs: float) -> None:
         self.segment_flashing(CCKDisplay.presenter_segment_index, timeMs, r, g, b)
@@ -50,33 +42,14 @@ class Demo:
     def check_retract_timer(self, timeMs: float) -> None:
         # Countdown animation
         # Animation goes from all Green to yellow to red. Red represents time out.
-        timeNs: float = timeMs * MILLI_SECOND_IN_NANO_SECOND
-        startTimeNS = perf_counter_ns()
-        while True:
-            dt = perf_counter_ns() - startTimeNS
-            if dt >= timeNs:
-                break
-            self._cck.presenter_timeout_percentage(1 - (dt / timeNs))
-            sleep(0.001)
+        self._play(Countdown(timeMs / 1000))
 
     def segment_flashing(  # pylint: disable=too-many-arguments
         self, segment_index: int, timeMs: float, r: float, g: float, b: float
     ) -> None:
-        on: bool = False
-        timeNs: float = timeMs * MILLI_SECOND_IN_NANO_SECOND
-
-        startTimeNS = perf_counter_ns()
-        while True:
-            dt = perf_counter_ns() - startTimeNS
-            on = not on
-
-            if dt >= timeNs:
-                self._cck.set_segment(segment_index, *CCKDisplay.COLORS["OFF"])
-                break
-
-            if on:
-                self._cck.set_segment(segment_index, r, g, b)
-            else:
-                self._cck.set_segment(segment_index, *CCKDisplay.COLORS["OFF"])
+        self._play(
+            Flash(segment_index, (r, g, b), timeMs / 1000, Demo.FLASH_RATE_MS / 1000)
+        )
 
-            sleep(Demo.FLASH_RATE_MS / 1000)
+    def _play(self, animation: Animation) -> None:
+        self._animator.play(animation).wait()
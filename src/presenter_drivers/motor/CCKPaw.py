@@ -175,6 +175,7 @@ class CCKPaw:
                         brk.shouldBreak()
                     ):  # These functions should exectute as fast as possible so as to allow limit switch readings to happen as fast as possible.
                         self._motor.stop()
+                        self._breakerCleanup(breakers)
                         return brk
                 except Exception:
                     self._motor.stop()
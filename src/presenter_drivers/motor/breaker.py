@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from time import perf_counter_ns
+from typing import Tuple
+
+from typing_extensions import TypedDict
+
+from ..sensors.cache import CachedCalibration
+from ..sensors.detector import PAIRS, Pair
+from ..sensors.sampler import IRFrameBuffer
+from .CCKPaw import Breaker
+
+
+class IRPresenceBreaker(Breaker):
+    """
+    Stops the paw once both sensors of a pair (the front pair by default) have been above their thresholds for `confirmFrames` new frames.
+    Frames come from an IRSampler's buffer so `shouldBreak()` never waits on I2C. Frames older than `maxFrameAgeMs` are ignored,
+    a stopped sampler can never stop the motor. Register it with `CCKPaw.registerBreaker("present", ...)`.
+    """
+
+    MILLISECOND_IN_NANOSECOND = 1000000
+    DEFAULT_CONFIRM_FRAMES: int = 2
+    DEFAULT_MAX_FRAME_AGE_MS: int = 50
+
+    class Config(TypedDict, total=False):
+        buffer: IRFrameBuffer
+        calibration: CachedCalibration
+        pair: str
+        confirmFrames: int
+        maxFrameAgeMs: int
+
+    def __init__(self, config: IRPresenceBreaker.Config):
+        self._buffer: IRFrameBuffer = config["buffer"]
+        left, right = PAIRS[Pair[config.get("pair", Pair.FRONT.name)]]
+        self._left: int = left.value
+        self._right: int = right.value
+        self._confirm_frames: int = config.get(
+            "confirmFrames", IRPresenceBreaker.DEFAULT_CONFIRM_FRAMES
+        )
+        self._max_frame_age_ns: int = (
+            config.get("maxFrameAgeMs", IRPresenceBreaker.DEFAULT_MAX_FRAME_AGE_MS)
+            * IRPresenceBreaker.MILLISECOND_IN_NANOSECOND
+        )
+        self._thresholds: Tuple[float, float] = (0.0, 0.0)
+        self.set_calibration(config["calibration"])
+
+        self._last_seq: int = -1
+        self._hits: int = 0
+
+    def set_calibration(self, calibration: CachedCalibration) -> IRPresenceBreaker:
+        """
+        Safe to pass as a DriftTracker `onUpdate` callback.
+        """
+        self._thresholds = (
+            calibration.thresholds[self._left],
+            calibration.thresholds[self._right],
+        )
+        return self
+
+    def shouldBreak(self) -> bool:
+        # Called in the paw's limit switch loop, bail out early when there is no new frame.
+        if self._buffer.seq - 1 == self._last_seq:
+            return False
+        frame = self._buffer.latest()
+        if frame is None:
+            return False
+        self._last_seq = frame.seq
+        if perf_counter_ns() - frame.timestamp_ns > self._max_frame_age_ns:
+            self._hits = 0
+            return False
+
+        left_on, right_on = self._thresholds
+        if frame.values[self._left] > left_on and frame.values[self._right] > right_on:
+            self._hits += 1
+        else:
+            self._hits = 0
+
+        if self._hits >= self._confirm_frames:
+            self._hits = 0
+            return True
+        return False
+
+    def cleanup(self) -> None:
+        self._hits = 0
+        self._last_seq = self._buffer.seq - 1
@@ -49,6 +49,9 @@ class MotorDriver(metaclass=AdaGPIOSingleton):
     def stop(self) -> None:
         self.set_state(MotorDriver.State.STOP)
 
+    def is_running(self) -> bool:
+        return self._state != MotorDriver.State.STOP
+
     def get_state(self) -> MotorDriver.State:
         return self._state
 
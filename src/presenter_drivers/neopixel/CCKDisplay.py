@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
 from logging import Logger
+from typing import Iterator, Mapping, Tuple
 
 from typing_extensions import TypedDict
 
 from ..logger.logger import create_logger
-from .Color import HSVtoRGB
+from .Color import GRB, PALETTE, HSVtoRGB
+from .lut import countdown_gradient
 from .NeoPixelPRU import NeoPixelPRU
 
 DEFAULT_LOGGER = create_logger("CCKDisplay")
@@ -17,12 +20,8 @@ class CCKDisplay:
     presenter_segment_index = NeoPixelPRU.SEGMENT_THREE
 
     FLASH_RATE_MS = 1000  # On for FLASH_RATE_MS off for FLASH_RATE_MS
-    COLORS: dict[str, list[float]] = {
-        "BLACK": [0, 0, 0],
-        "OFF": [0, 0, 0],
-        "RED": [255, 0, 0],
-        "GREEN": [0, 255, 0],
-    }
+    # Packed colors still unpack as r g b, `set_segment(index, *COLORS["RED"])` works.
+    COLORS: Mapping[str, GRB] = PALETTE
 
     class Config(TypedDict, total=False):
         logger: Logger
@@ -34,6 +33,10 @@ class CCKDisplay:
         neoPixelConfig.get("logger", self._log)
         self._neopixel_controller: NeoPixelPRU = NeoPixelPRU(neoPixelConfig)
 
+    @property
+    def neopixel(self) -> NeoPixelPRU:
+        return self._neopixel_controller
+
     def set_display_color(self, r: float, g: float, b: float) -> CCKDisplay:
         return self.set_segment(CCKDisplay.display_segment_index, r, g, b)
 
@@ -59,25 +62,49 @@ class CCKDisplay:
         )
 
     def set_all_segments_color(self, r: float, g: float, b: float) -> CCKDisplay:
-        self.set_display_color(r, g, b)
-        self.set_scanner_color(r, g, b)
-        self.set_presenter_color(r, g, b)
+        with self.batch():
+            self.set_display_color(r, g, b)
+            self.set_scanner_color(r, g, b)
+            self.set_presenter_color(r, g, b)
         return self
 
     def all_segments_off(self) -> CCKDisplay:
-        self.display_off()
-        self.scanner_off()
-        self.presenter_off()
+        with self.batch():
+            self.display_off()
+            self.scanner_off()
+            self.presenter_off()
         return self
 
+    @contextmanager
+    def batch(self) -> Iterator[CCKDisplay]:
+        """
+        Apply every segment update in the block with a single redraw, see `NeoPixelPRU.batch`.
+        """
+        with self._neopixel_controller.batch():
+            yield self
+
     def presenter_timeout_percentage(self, percent: float) -> CCKDisplay:
-        rgb: dict[str, int] = CCKDisplay.fade_green_down_to_red(percent)
-        return self.set_presenter_color(rgb["r"], rgb["g"], rgb["b"])
+        return self.set_presenter_color(*CCKDisplay.countdown_color(percent))
 
     def set_segment(self, index: int, r: float, g: float, b: float) -> CCKDisplay:
         self._neopixel_controller.set_segment(index, r, g, b)
         return self
 
+    def set_segment_color(self, index: int, color: int) -> CCKDisplay:
+        """
+        Set a segment to a packed GRB color.
+        """
+        self._neopixel_controller.set_packed_segment_buffer(index, color)
+        self._neopixel_controller.draw()
+        return self
+
+    @staticmethod
+    def countdown_color(percentage: float) -> Tuple[int, int, int]:
+        """
+        Same colors as `fade_green_down_to_red`, looked up in a precomputed gradient.
+        """
+        return countdown_gradient().at(percentage)
+
     @staticmethod
     def fade_green_down_to_red(percentage: float) -> dict[str, int]:
         return HSVtoRGB(120 * percentage / 360, 1.0, 1.0)
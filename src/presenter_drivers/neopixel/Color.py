@@ -1,6 +1,10 @@
+from __future__ import annotations
+
+import sys
+from array import array
 from dataclasses import dataclass
 from math import floor
-from typing import ClassVar, Dict
+from typing import ClassVar, Dict, Iterator, Mapping, Sequence, Tuple
 
 
 @dataclass
@@ -15,6 +19,9 @@ class Color:
     def __str__(self) -> str:
         return f"{floor(self.r)} {floor(self.g)} {floor(self.b)}"
 
+    def packed(self) -> GRB:
+        return GRB.of(self.r, self.g, self.b)
+
 
 def HSVtoRGB(h: float, s: float, v: float) -> Dict[str, int]:
     r: float = 0.0
@@ -71,3 +78,123 @@ def GREEN(color: int) -> int:
 
 def BLUE(color: int) -> int:
     return (color & 0x000000FF) >> 0
+
+
+def _channel(c: float) -> int:
+    return min(255, max(0, floor(c)))
+
+
+def pack(r: float, g: float, b: float) -> int:
+    """
+    Pack a color the way the strip wants it, green in bits 16-23, red in 8-15 and blue in 0-7.
+    """
+    return (_channel(g) << 16) | (_channel(r) << 8) | _channel(b)
+
+
+class GRB(int):
+    """
+    A packed color. It is an int, so it stores in an array('I') frame as is, and it unpacks like an r g b sequence:
+    `set_segment(index, *color)` keeps working. `GRB.of()` interns colors, repeating one doesn't allocate.
+    """
+
+    __slots__ = ()
+    _interned: ClassVar[Dict[int, GRB]] = {}
+    MAX_INTERNED: ClassVar[int] = 4096
+
+    @classmethod
+    def of(cls, r: float, g: float, b: float) -> GRB:
+        return cls.intern(pack(r, g, b))
+
+    @classmethod
+    def intern(cls, color: int) -> GRB:
+        interned = cls._interned.get(color)
+        if interned is None:
+            interned = cls(color)
+            if len(cls._interned) < cls.MAX_INTERNED:
+                cls._interned[color] = interned
+        return interned
+
+    @property
+    def r(self) -> int:
+        return RED(self)
+
+    @property
+    def g(self) -> int:
+        return GREEN(self)
+
+    @property
+    def b(self) -> int:
+        return BLUE(self)
+
+    @property
+    def rgb(self) -> Tuple[int, int, int]:
+        return (RED(self), GREEN(self), BLUE(self))
+
+    def __iter__(self) -> Iterator[int]:
+        return iter((RED(self), GREEN(self), BLUE(self)))
+
+    def __repr__(self) -> str:
+        return f"GRB(r={RED(self)}, g={GREEN(self)}, b={BLUE(self)})"
+
+
+class Palette(Mapping[str, GRB]):
+    """
+    Named, interned colors. Read them as `PALETTE["RED"]` or `PALETTE.RED`.
+    """
+
+    def __init__(self, colors: Mapping[str, Sequence[float]]):
+        self._colors: Dict[str, GRB] = {
+            name: GRB.of(*color) for name, color in colors.items()
+        }
+
+    def __getitem__(self, name: str) -> GRB:
+        return self._colors[name]
+
+    def __getattr__(self, name: str) -> GRB:
+        try:
+            return self._colors[name]
+        except KeyError as e:
+            raise AttributeError(name) from e
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._colors)
+
+    def __len__(self) -> int:
+        return len(self._colors)
+
+
+PALETTE = Palette(
+    {
+        "BLACK": (0, 0, 0),
+        "OFF": (0, 0, 0),
+        "RED": (255, 0, 0),
+        "GREEN": (0, 255, 0),
+        "BLUE": (0, 0, 255),
+        "YELLOW": (255, 255, 0),
+        "AMBER": (255, 128, 0),
+        "WHITE": (255, 255, 255),
+    }
+)
+
+# Byte offsets of r, g and b inside a packed uint32 in native order.
+_RGB_OFFSETS = (1, 2, 0) if sys.byteorder == "little" else (2, 1, 3)
+
+
+def frame_buffer(led_count: int) -> array[int]:
+    """
+    A frame of packed colors, all off.
+    """
+    return array("I", bytes(4 * led_count))
+
+
+def frame_to_rgb(frame: array[int]) -> bytearray:
+    """
+    r g b bytes for a packed frame, converted with strided slices rather than per pixel.
+    """
+    if frame.itemsize != 4:
+        raise ValueError("frames are array('I') of 4 byte items")
+    raw = memoryview(frame).cast("B")
+    rgb = bytearray(3 * len(frame))
+    for channel, offset in enumerate(_RGB_OFFSETS):
+        rgb[channel::3] = raw[offset::4]
+    return rgb
@@ -1,13 +1,42 @@
 from __future__ import annotations
 
+from array import array
+from contextlib import contextmanager
+from functools import wraps
 from logging import Logger
 from math import floor
+from threading import RLock
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    cast,
+)
 
 from typing_extensions import TypedDict
 
 from ..logger.logger import create_logger
+from ..stats.stats import AsTableStr
+from .Color import BLUE, GREEN, RED, frame_to_rgb
+from .lut import color_table
+from .protocol import (
+    BINARY,
+    ENCODERS,
+    MAX_WRITE_BYTES,
+    TEXT,
+    TEXT_COMMAND_BYTES,
+    RunEncoder,
+    chunk_commands,
+    protocol_for,
+    refresh_seconds,
+)
 from .writer.STDOutWriter import STDOutWriter
-from .writer.Writer import Writer
+from .writer.Writer import Buffer, Writer
 
 DEFAULT_LOGGER = create_logger("NEOPIXEL")
 DEFAULT_WRITER = STDOutWriter(None)
@@ -19,11 +48,42 @@ SEGMENT_ALL = 0  # Defined in PRU
 SEGMENT_ONE = 1  # Defined in PRU
 SEGMENT_TWO = 2  # Defined in PRU
 SEGMENT_THREE = 3  # Defined in PRU
+MAX_COMMAND_BYTES = TEXT_COMMAND_BYTES
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _locked(method: F) -> F:
+    """
+    Run a NeoPixelPRU method holding its lock.
+    """
+
+    @wraps(method)
+    def locked(self: NeoPixelPRU, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:  # pylint: disable=protected-access
+            return method(self, *args, **kwargs)
+
+    return cast(F, locked)
 
 
 class NeoPixelPRU:
     """
     NeoPixel Driver class. Used to interact with PRU firmware.
+    Commands are encoded into a preallocated buffer and sent to the writer in one write by `draw()`, `clear()` or `flush()`.
+    The buffer is at most MAX_WRITE_BYTES, the largest write the PRU takes, and is flushed early on a command boundary.
+
+    A shadow of what the firmware holds suppresses writes that would not change anything, and `draw()` is skipped when
+    nothing was sent since the last one. The firmware fills segments itself, so a segment write forgets the pixel shadow and a
+    pixel or destination write forgets the segment shadow. Call `invalidate()` if the firmware may have been reset.
+
+    Commands use the packed binary protocol when `firmwareVersion` supports it and the text protocol otherwise.
+    Colors can be gamma corrected and dimmed with `gamma` and `brightness`, through a precomputed table.
+
+    Inside `with batch():` draws are deferred to the end of the outermost batch, so a composite update costs one write
+    and one redraw.
+
+    Writes from several threads, such as an Animator and the main thread, are serialised by a lock. A batch holds it
+    until it exits, so other threads can't draw or flush it halfway through.
     """
 
     FIRMWARE_VERSION = "1.x.x"
@@ -38,6 +98,64 @@ class NeoPixelPRU:
         logger: Logger
         writer: Writer
         ledCount: int
+        bufferSize: int
+        autoFlush: bool
+        gamma: float
+        brightness: float
+        firmwareVersion: str
+        protocol: str
+
+    class _Stats(AsTableStr):
+        def __init__(self) -> None:
+            self._commands: int = 0
+            self._suppressed: int = 0
+            self._draws: int = 0
+            self._skipped_draws: int = 0
+            self._folded: int = 0
+
+        def get_headers(self) -> Sequence[str]:
+            return ["Commands", "Suppressed", "Draws", "Skipped draws", "Folded"]
+
+        def get_row(self) -> Sequence[str]:
+            return [
+                str(self._commands),
+                str(self._suppressed),
+                str(self._draws),
+                str(self._skipped_draws),
+                str(self._folded),
+            ]
+
+        @property
+        def suppressed(self) -> int:
+            return self._suppressed
+
+        @property
+        def skipped_draws(self) -> int:
+            return self._skipped_draws
+
+        @property
+        def folded(self) -> int:
+            return self._folded
+
+        def inc_commands(self) -> NeoPixelPRU._Stats:
+            self._commands += 1
+            return self
+
+        def inc_suppressed(self) -> NeoPixelPRU._Stats:
+            self._suppressed += 1
+            return self
+
+        def inc_draws(self) -> NeoPixelPRU._Stats:
+            self._draws += 1
+            return self
+
+        def inc_skipped_draws(self) -> NeoPixelPRU._Stats:
+            self._skipped_draws += 1
+            return self
+
+        def inc_folded(self) -> NeoPixelPRU._Stats:
+            self._folded += 1
+            return self
 
     def __init__(self, config: NeoPixelPRU.Config):
         self._log: Logger = config.get("logger", DEFAULT_LOGGER)
@@ -48,35 +166,234 @@ class NeoPixelPRU:
         self._segment_start_index: int = self._led_count + self._led_count
         self._segment_one_index: int = self._segment_start_index
 
+        firmware_version = config.get("firmwareVersion", NeoPixelPRU.FIRMWARE_VERSION)
+        supported = protocol_for(firmware_version)
+        protocol = config.get("protocol", supported)
+        if protocol not in ENCODERS:
+            raise ValueError(f"Unknown protocol {protocol}")
+        if protocol == BINARY and supported != BINARY:
+            self._log.warning(
+                "Firmware %s has no binary protocol, using %s.", firmware_version, TEXT
+            )
+            protocol = TEXT
+        self._encoder = ENCODERS[protocol]()
+        self._firmware_version: str = firmware_version
+
+        # Room for a full frame of pixel and destination writes, every segment and a draw before an early flush,
+        # as far as one rpmsg write goes.
+        buffer_size = config.get(
+            "bufferSize",
+            (2 * self._led_count + SEGMENT_COUNT + 2) * self._encoder.max_command_bytes,
+        )
+        if buffer_size > MAX_WRITE_BYTES and "bufferSize" in config:
+            self._log.warning(
+                "bufferSize %s is over the %s byte write limit.",
+                buffer_size,
+                MAX_WRITE_BYTES,
+            )
+        self._buffer: bytearray = bytearray(min(buffer_size, MAX_WRITE_BYTES))
+        self._buffered: int = 0
+        self._auto_flush: bool = config.get("autoFlush", False)
+        gamma = config.get("gamma", 1.0)
+        brightness = config.get("brightness", 1.0)
+        self._gamma: float = gamma
+        self._brightness: float = brightness
+        self._color_table: Optional[bytes] = (
+            None
+            if gamma == 1.0 and brightness == 1.0
+            else color_table(gamma, brightness)
+        )
+
+        # Shadow framebuffer, r g b per entry. An entry is only trusted while its known flag is set.
+        self._pixels: bytearray = bytearray(3 * self._led_count)
+        self._pixels_known: bytearray = bytearray(self._led_count)
+        self._destination: bytearray = bytearray(3 * self._led_count)
+        self._destination_known: bytearray = bytearray(self._led_count)
+        self._segments: bytearray = bytearray(3 * SEGMENT_COUNT)
+        self._segments_known: bytearray = bytearray(SEGMENT_COUNT)
+        self._dirty: bool = False
+        # Segment writes held back by batch(), in the order they have to be sent.
+        self._batch_depth: int = 0
+        self._draw_deferred: bool = False
+        self._held_segments: Dict[int, Tuple[float, float, float]] = {}
+        self._lock: RLock = RLock()
+        self._stats = NeoPixelPRU._Stats()
+
+    @property
+    def stats(self) -> NeoPixelPRU._Stats:
+        return self._stats
+
+    @property
+    def protocol(self) -> str:
+        return self._encoder.name
+
+    @property
+    def led_count(self) -> int:
+        return self._led_count
+
+    def refresh_seconds(self) -> float:
+        """
+        Shortest time between two frames the strip can show.
+        """
+        return refresh_seconds(self._led_count)
+
+    def clone_config(self, writer: Writer) -> NeoPixelPRU.Config:
+        """
+        Config for a NeoPixelPRU that encodes exactly like this one, into `writer`.
+        """
+        return {
+            "logger": self._log,
+            "writer": writer,
+            "ledCount": self._led_count,
+            "firmwareVersion": self._firmware_version,
+            "protocol": self._encoder.name,
+            "gamma": self._gamma,
+            "brightness": self._brightness,
+        }
+
     def set_logger(self, logger: Logger) -> NeoPixelPRU:
         self._log = logger
         return self
 
+    @_locked
     def set_color_buffer(self, index: int, r: float, g: float, b: float) -> NeoPixelPRU:
         if not self.is_valid_display_index(index):
-            self._log.warn("Index out of range.")
+            self._log.warning("Index out of range.")
             return self
 
-        self._write(f"{index} {float(r)} {float(g)} {float(b)}")
-        return self
+        self._release_segments()
+        r, g, b = self._correct(r, g, b)
+        if not NeoPixelPRU._update_shadow(
+            self._pixels, self._pixels_known, index, r, g, b
+        ):
+            self._stats.inc_suppressed()
+            return self
+        self._forget(self._segments_known)
+        return self._emit(self._encoder.pixel, index, r, g, b)
 
+    @_locked
     def set_color(self, index: int, r: float, g: float, b: float) -> NeoPixelPRU:
         self.set_color_buffer(index, r, g, b)
         self.draw()
         return self
 
+    def set_color_run_buffer(
+        self, index: int, colors: Sequence[Tuple[float, float, float]]
+    ) -> NeoPixelPRU:
+        """
+        Set consecutive pixels from `index`. Colors are clamped to 0-255.
+        Changed pixels go out as one bulk run when the protocol has them.
+        """
+        rgb = bytearray(3 * len(colors))
+        for i, (r, g, b) in enumerate(colors):
+            rgb[3 * i : 3 * i + 3] = bytes(
+                (
+                    min(255, max(0, floor(r))),
+                    min(255, max(0, floor(g))),
+                    min(255, max(0, floor(b))),
+                )
+            )
+        return self.set_rgb_run_buffer(index, rgb)
+
+    def set_frame_buffer(self, index: int, frame: array[int]) -> NeoPixelPRU:
+        """
+        Set consecutive pixels from `index` to a frame of packed GRB colors.
+        """
+        return self.set_rgb_run_buffer(index, frame_to_rgb(frame))
+
+    @_locked
+    def set_rgb_run_buffer(self, index: int, rgb: Buffer) -> NeoPixelPRU:
+        """
+        Set consecutive pixels from `index`, `rgb` holds r g b bytes per pixel.
+        """
+        count = len(rgb) // 3
+        if len(rgb) % 3 or not (
+            self.is_valid_display_index(index)
+            and self.is_valid_display_index(index + count - 1)
+        ):
+            self._log.warning("Index out of range.")
+            return self
+        self._release_segments()
+        if self._color_table is not None:
+            rgb = bytes(rgb).translate(self._color_table)
+
+        pixels = self._pixels
+        shadow = memoryview(pixels)
+        known = self._pixels_known
+        view = memoryview(rgb)
+        runs = self._encoder if isinstance(self._encoder, RunEncoder) else None
+        first = last = -1
+        for k in range(count):
+            i = index + k
+            color = view[3 * k : 3 * k + 3]
+            if known[i] and shadow[3 * i : 3 * i + 3] == color:
+                self._stats.inc_suppressed()
+                continue
+            pixels[3 * i : 3 * i + 3] = color
+            known[i] = 1
+            if first < 0:
+                first = i
+                self._forget(self._segments_known)
+            last = i
+            if runs is None:
+                self._emit(self._encoder.pixel, i, *color)
+
+        if runs is not None and first >= 0:
+            chunk = max(1, (len(self._buffer) - runs.run_bytes(0)) // 3)
+            for start in range(first, last + 1, chunk):
+                end = min(last + 1, start + chunk)
+                self._emit(
+                    runs.pixel_run,
+                    start,
+                    shadow[3 * start : 3 * end],
+                    scratch=runs.run_bytes(end - start),
+                )
+        return self
+
+    def set_packed_color_buffer(self, index: int, color: int) -> NeoPixelPRU:
+        return self.set_color_buffer(index, RED(color), GREEN(color), BLUE(color))
+
+    @_locked
+    def set_color_run(
+        self, index: int, colors: Sequence[Tuple[float, float, float]]
+    ) -> NeoPixelPRU:
+        self.set_color_run_buffer(index, colors)
+        self.draw()
+        return self
+
+    @_locked
+    def set_frame(self, index: int, frame: array[int]) -> NeoPixelPRU:
+        self.set_frame_buffer(index, frame)
+        self.draw()
+        return self
+
+    @_locked
     def set_destination_color_buffer(
         self, index: int, r: float, g: float, b: float
     ) -> NeoPixelPRU:
         if not self.is_valid_display_index(index):
-            self._log.warn("Index out of range.")
+            self._log.warning("Index out of range.")
             return self
 
-        self._write(
-            f"{self._color_destination_buffer_index + index} {floor(r)} {floor(g)} {floor(b)}"
+        self._release_segments()
+        r, g, b = self._correct(r, g, b)
+        if not NeoPixelPRU._update_shadow(
+            self._destination, self._destination_known, index, r, g, b
+        ):
+            self._stats.inc_suppressed()
+            return self
+        # The firmware moves pixels toward their destination on its own.
+        self._forget(self._pixels_known)
+        self._forget(self._segments_known)
+        return self._emit(
+            self._encoder.command,
+            self._color_destination_buffer_index + index,
+            r,
+            g,
+            b,
         )
-        return self
 
+    @_locked
     def set_destination_color(
         self, index: int, r: float, g: float, b: float
     ) -> NeoPixelPRU:
@@ -84,37 +401,233 @@ class NeoPixelPRU:
         self.draw()
         return self
 
+    @_locked
     def set_segment_buffer(
         self, index: int, r: float, g: float, b: float
     ) -> NeoPixelPRU:
         if not self.is_valid_segment_index(index):
-            self._log.warn("Invalid segment index")
+            self._log.warning("Invalid segment index")
             return self
+        if self._batch_depth:
+            self._hold_segment(index, r, g, b)
+            return self
+        return self._write_segment(index, r, g, b)
+
+    def _write_segment(self, index: int, r: float, g: float, b: float) -> NeoPixelPRU:
+        r, g, b = self._correct(r, g, b)
 
-        self._write(
-            f"{index + self._segment_start_index} {floor(r)} {floor(g)} {floor(b)}"
+        if not NeoPixelPRU._update_shadow(
+            self._segments, self._segments_known, index, r, g, b
+        ):
+            self._stats.inc_suppressed()
+            return self
+        self._forget(self._pixels_known)
+        # SEGMENT_ALL overlaps every other segment.
+        if index == SEGMENT_ALL:
+            known = self._segments_known[SEGMENT_ALL]
+            self._forget(self._segments_known)
+            self._segments_known[SEGMENT_ALL] = known
+        else:
+            self._segments_known[SEGMENT_ALL] = 0
+        return self._emit(
+            self._encoder.command, index + self._segment_start_index, r, g, b
         )
-        return self
 
+    @_locked
     def set_segment(self, index: int, r: float, g: float, b: float) -> NeoPixelPRU:
         self.set_segment_buffer(index, r, g, b)
         self.draw()
         return self
 
+    def set_packed_segment_buffer(self, index: int, color: int) -> NeoPixelPRU:
+        return self.set_segment_buffer(index, RED(color), GREEN(color), BLUE(color))
+
     def is_valid_display_index(self, index: int) -> bool:
         return 0 <= index < self._led_count
 
     def is_valid_segment_index(self, index: int) -> bool:
         return 0 <= index < SEGMENT_COUNT
 
+    @_locked
     def clear(self) -> NeoPixelPRU:
-        self._write("-2 0 0 0")
-        return self
+        # Segments set before a clear never show.
+        self._held_segments.clear()
+        self._emit(self._encoder.clear)
+        self._forget(self._destination_known)
+        self._forget(self._segments_known)
+        # Every pixel is now known to be off.
+        self._pixels[:] = bytes(len(self._pixels))
+        self._pixels_known[:] = b"\x01" * self._led_count
+        self._dirty = False
+        return self if self._batch_depth else self.flush()
 
+    @_locked
     def draw(self) -> NeoPixelPRU:
-        self._write("-1 0 0 0")
+        if self._batch_depth:
+            self._draw_deferred = True
+            return self
+        if not self._dirty:
+            self._stats.inc_skipped_draws()
+            return self.flush()
+        self._emit(self._encoder.draw)
+        self._stats.inc_draws()
+        self._dirty = False
+        return self.flush()
+
+    @contextmanager
+    def batch(self) -> Iterator[NeoPixelPRU]:
+        """
+        Defer draws and writes until the outermost batch exits, then send everything in one write with at most one draw.
+        Segment writes are held until then, the last one per segment wins, and segments one to three set to the same color
+        go out as a single SEGMENT_ALL write. The batch is sent even when the block raises.
+        """
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._release_segments()
+                    if self._draw_deferred:
+                        self._draw_deferred = False
+                        self.draw()
+                    else:
+                        self.flush()
+
+    def is_batching(self) -> bool:
+        return self._batch_depth > 0
+
+    @_locked
+    def invalidate(self) -> NeoPixelPRU:
+        """
+        Forget the shadow framebuffer so the next write of every pixel and segment is sent.
+        """
+        self._forget(self._pixels_known)
+        self._forget(self._destination_known)
+        self._forget(self._segments_known)
+        self._dirty = True
         return self
 
-    def _write(self, s: str) -> NeoPixelPRU:
-        self._writer.write(bytearray(s + "\n", "ascii"))
+    @_locked
+    def flush(self) -> NeoPixelPRU:
+        """
+        Send every buffered command in a single write.
+        """
+        if self._buffered:
+            self._writer.write(self._buffer[: self._buffered])
+            self._buffered = 0
+        return self
+
+    @_locked
+    def send(self, commands: Buffer) -> NeoPixelPRU:
+        """
+        Write already encoded commands, such as a compiled effect frame, after anything buffered.
+        What they changed is unknown, so the shadow is forgotten.
+        """
+        self.flush()
+        self._writer.write_many(chunk_commands(self._encoder, commands))
+        self.invalidate()
+        self._dirty = False
+        return self
+
+    def pending_bytes(self) -> int:
+        return self._buffered
+
+    @staticmethod
+    def _update_shadow(
+        shadow: bytearray, known: bytearray, index: int, r: float, g: float, b: float
+    ) -> bool:
+        """
+        Record a color in the shadow, False when it is already there and the write can be skipped.
+        """
+        rgb = (floor(r), floor(g), floor(b))
+        if not all(0 <= c <= 255 for c in rgb):
+            known[index] = 0
+            return True
+        start = 3 * index
+        if known[index] and tuple(shadow[start : start + 3]) == rgb:
+            return False
+        shadow[start : start + 3] = bytes(rgb)
+        known[index] = 1
+        return True
+
+    def _correct(self, r: float, g: float, b: float) -> Tuple[float, float, float]:
+        table = self._color_table
+        if table is None:
+            return (r, g, b)
+        return (
+            table[min(255, max(0, floor(r)))],
+            table[min(255, max(0, floor(g)))],
+            table[min(255, max(0, floor(b)))],
+        )
+
+    def _hold_segment(self, index: int, r: float, g: float, b: float) -> None:
+        held = self._held_segments
+        if index == SEGMENT_ALL:
+            # SEGMENT_ALL overwrites every segment held before it.
+            held.clear()
+        else:
+            # Keep it after any SEGMENT_ALL held before it.
+            held.pop(index, None)
+        held[index] = (r, g, b)
+
+    def _release_segments(self) -> None:
+        """
+        Send the held segment writes, folding identical segments into SEGMENT_ALL.
+        """
+        held = self._held_segments
+        if not held:
+            return
+        self._held_segments = {}
+
+        colors = [held.get(index) for index in range(SEGMENT_ONE, SEGMENT_COUNT)]
+        first = colors[0]
+        if first is not None and all(
+            color is not None and NeoPixelPRU._same(color, first) for color in colors
+        ):
+            held = {SEGMENT_ALL: first}
+            self._stats.inc_folded()
+        elif SEGMENT_ALL in held:
+            # Segments set to the SEGMENT_ALL color after it add nothing.
+            everything = held[SEGMENT_ALL]
+            held = {
+                index: color
+                for index, color in held.items()
+                if index == SEGMENT_ALL or not NeoPixelPRU._same(color, everything)
+            }
+
+        for index, (r, g, b) in held.items():
+            self._write_segment(index, r, g, b)
+
+    @staticmethod
+    def _same(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> bool:
+        return all(floor(x) == floor(y) for x, y in zip(a, b))
+
+    @staticmethod
+    def _forget(known: bytearray) -> None:
+        known[:] = bytes(len(known))
+
+    def _emit(
+        self, encode: Callable[..., int], *args: object, scratch: int = 0
+    ) -> NeoPixelPRU:
+        """
+        Encode a command at the end of the buffer, flushing first when it does not fit.
+        A command larger than the whole buffer is written on its own from a `scratch` sized buffer. Runs are cut to the
+        buffer, so that is only ever one command of a tiny `bufferSize`, far under MAX_WRITE_BYTES.
+        """
+        self._stats.inc_commands()
+        self._dirty = True
+        n = encode(self._buffer, self._buffered, *args)
+        if not n:
+            self.flush()
+            n = encode(self._buffer, 0, *args)
+            if not n:
+                command = bytearray(scratch or self._encoder.max_command_bytes)
+                self._writer.write(command[: encode(command, 0, *args)])
+                return self
+
+        self._buffered += n
+        if self._auto_flush and not self._batch_depth:
+            self.flush()
         return self
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from logging import Logger
+from math import floor
+from threading import Event, Lock
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from typing_extensions import TypedDict
+
+from ..logger.logger import create_logger
+from .CCKDisplay import CCKDisplay
+from .NeoPixelPRU import NeoPixelPRU
+from .ticker import Ticker, TickStats
+
+DEFAULT_LOGGER = create_logger("Animator")
+
+RGB = Tuple[float, float, float]
+OFF: RGB = (0.0, 0.0, 0.0)
+
+
+class AnimatorException(Exception):
+    pass
+
+
+class AnimatorRunning(AnimatorException):
+    pass
+
+
+class Animation(ABC):
+    """
+    Color of one segment as a function of the time since the animation started.
+    Runs forever when `duration_s` is None. `wait()` returns once it has finished or been replaced.
+    """
+
+    def __init__(self, segment: int, duration_s: Optional[float] = None):
+        self.segment: int = segment
+        self.duration_s: Optional[float] = duration_s
+        self._done: Event = Event()
+
+    @abstractmethod
+    def color_at(self, t: float) -> RGB:
+        pass
+
+    def final_color(self) -> RGB:
+        """
+        Color left on the segment when the animation finishes.
+        """
+        return self.color_at(self.duration_s or 0.0)
+
+    def finished(self, t: float) -> bool:
+        return self.duration_s is not None and t >= self.duration_s
+
+    def is_done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _finish(self) -> None:
+        self._done.set()
+
+
+class Flash(Animation):
+    """
+    On for `period_s`, off for `period_s`, ending off.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        segment: int,
+        color: RGB,
+        duration_s: Optional[float] = None,
+        period_s: float = 1.0,
+        off: RGB = OFF,
+    ):
+        super().__init__(segment, duration_s)
+        self.color: RGB = color
+        self.period_s: float = period_s
+        self.off: RGB = off
+
+    def color_at(self, t: float) -> RGB:
+        return self.off if floor(t / self.period_s) % 2 else self.color
+
+    def final_color(self) -> RGB:
+        return self.off
+
+
+class Fade(Animation):
+    """
+    Linear fade from `start` to `end` over `duration_s`.
+    """
+
+    def __init__(self, segment: int, start: RGB, end: RGB, duration_s: float):
+        super().__init__(segment, duration_s)
+        self.start: RGB = start
+        self.end: RGB = end
+
+    def color_at(self, t: float) -> RGB:
+        p = min(1.0, t / self.duration_s) if self.duration_s else 1.0
+        r0, g0, b0 = self.start
+        r1, g1, b1 = self.end
+        return (r0 + (r1 - r0) * p, g0 + (g1 - g0) * p, b0 + (b1 - b0) * p)
+
+
+class Countdown(Animation):
+    """
+    Green through yellow to red as `duration_s` runs out, the presenter retract timer.
+    """
+
+    def __init__(
+        self,
+        duration_s: float,
+        segment: int = CCKDisplay.presenter_segment_index,
+    ):
+        super().__init__(segment, duration_s)
+
+    def color_at(self, t: float) -> RGB:
+        remaining = max(0.0, 1 - t / self.duration_s) if self.duration_s else 0.0
+        r, g, b = CCKDisplay.countdown_color(remaining)
+        return (r, g, b)
+
+
+class Animator:
+    """
+    Plays animations on NeoPixelPRU segments at a fixed frame rate, capped at what the strip can refresh.
+    A Ticker schedules the ticks, so a late one drops the frames it missed rather than drawing them in a burst.
+    Each tick sets every animated segment and draws once, unchanged segments are suppressed by the NeoPixelPRU shadow.
+
+    Run it on its own thread with `start()`/`stop()`, on an asyncio loop with `await run_async()`, or call `tick()` directly.
+    Playing an animation replaces the one on the same segment.
+    """
+
+    DEFAULT_FPS: float = 50.0
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        neopixel: NeoPixelPRU
+        fps: float
+        clock: Callable[[], float]
+
+    def __init__(self, config: Animator.Config):
+        self._log: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._neopixel: NeoPixelPRU = config["neopixel"]
+        self._clock: Callable[[], float] = config.get("clock", perf_counter)
+        fps = config.get("fps", Animator.DEFAULT_FPS)
+
+        self._lock: Lock = Lock()
+        self._playing: Dict[int, Tuple[Animation, float]] = {}
+        self._ticker: Ticker = Ticker(
+            {
+                "logger": self._log,
+                "name": "Animator",
+                "tick": self.tick,
+                "periodSeconds": max(1 / fps, self._neopixel.refresh_seconds()),
+                "clock": self._clock,
+            }
+        )
+        self._stats: TickStats = self._ticker.stats
+
+    @property
+    def stats(self) -> TickStats:
+        return self._stats
+
+    @property
+    def period_s(self) -> float:
+        return self._ticker.period_s
+
+    def is_running(self) -> bool:
+        return self._ticker.is_running()
+
+    def play(self, animation: Animation) -> Animation:
+        with self._lock:
+            replaced = self._playing.get(animation.segment)
+            self._playing[animation.segment] = (animation, self._clock())
+        if replaced is not None:
+            replaced[0]._finish()  # pylint: disable=protected-access
+        return animation
+
+    def cancel(self, segment: int) -> Animator:
+        """
+        Stop the animation on `segment`, leaving the segment as it is.
+        """
+        with self._lock:
+            playing = self._playing.pop(segment, None)
+        if playing is not None:
+            playing[0]._finish()  # pylint: disable=protected-access
+        return self
+
+    def playing(self) -> List[Animation]:
+        with self._lock:
+            return [animation for animation, _ in self._playing.values()]
+
+    def tick(self, now: Optional[float] = None) -> Animator:
+        """
+        Draw one frame of every playing animation. Finished animations draw their final color and are removed.
+        """
+        now = self._clock() if now is None else now
+        finished: List[Animation] = []
+        with self._lock, self._neopixel.batch():
+            for segment, (animation, started) in list(self._playing.items()):
+                t = now - started
+                if animation.finished(t):
+                    color = animation.final_color()
+                    finished.append(animation)
+                    del self._playing[segment]
+                else:
+                    color = animation.color_at(t)
+                self._neopixel.set_segment_buffer(segment, *color)
+            self._neopixel.draw()
+        self._stats.inc_frames()
+        for animation in finished:
+            animation._finish()  # pylint: disable=protected-access
+        return self
+
+    def start(self) -> Animator:
+        if self._ticker.is_running():
+            raise AnimatorRunning()
+
+        self._ticker.start()
+        return self
+
+    def stop(self) -> Animator:
+        self._ticker.stop()
+        return self
+
+    async def run_async(self) -> None:
+        """
+        Tick on the running asyncio loop until `stop()`.
+        """
+        if self._ticker.is_running():
+            raise AnimatorRunning()
+
+        await self._ticker.run_async()
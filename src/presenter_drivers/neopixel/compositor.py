@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+from logging import Logger
+from math import floor
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from typing_extensions import TypedDict
+
+from ..logger.logger import create_logger
+from .NeoPixelPRU import NeoPixelPRU
+from .ticker import Ticker, TickStats
+
+DEFAULT_LOGGER = create_logger("Compositor")
+
+OPAQUE = 255
+TRANSPARENT = 0
+
+
+class CompositorException(Exception):
+    pass
+
+
+class CompositorRunning(CompositorException):
+    pass
+
+
+class LayerExists(CompositorException):
+    pass
+
+
+class Layer:
+    """
+    One producer's view of the strip: r g b per pixel plus a mask of per pixel alpha, 0 transparent to 255 opaque.
+    `opacity` scales the whole layer. Writes only touch the layer, never the writer, so they are cheap from any thread.
+    A new layer is fully transparent.
+    """
+
+    def __init__(self, name: str, led_count: int, z: int = 0, opacity: float = 1.0):
+        self.name: str = name
+        self._led_count: int = led_count
+        self._z: int = z
+        self._opacity: float = opacity
+        self._pixels: bytearray = bytearray(3 * led_count)
+        self._mask: bytearray = bytearray(led_count)
+        self._lock: Lock = Lock()
+        self._version: int = 0
+
+    @property
+    def z(self) -> int:
+        return self._z
+
+    @property
+    def opacity(self) -> float:
+        return self._opacity
+
+    @property
+    def version(self) -> int:
+        """
+        Bumped by every change, the compositor skips frames where no layer moved on.
+        """
+        return self._version
+
+    def set_z(self, z: int) -> Layer:
+        """
+        Change through `Compositor.set_z`, which re-sorts the layers.
+        """
+        with self._lock:
+            self._z = z
+            self._version += 1
+        return self
+
+    def set_opacity(self, opacity: float) -> Layer:
+        with self._lock:
+            self._opacity = min(1.0, max(0.0, opacity))
+            self._version += 1
+        return self
+
+    def set_pixel(  # pylint: disable=too-many-arguments
+        self, index: int, r: float, g: float, b: float, alpha: int = OPAQUE
+    ) -> Layer:
+        return self.fill(r, g, b, index, index + 1, alpha)
+
+    def fill(  # pylint: disable=too-many-arguments
+        self,
+        r: float,
+        g: float,
+        b: float,
+        start: int = 0,
+        end: Optional[int] = None,
+        alpha: int = OPAQUE,
+    ) -> Layer:
+        """
+        Set pixels `start` up to `end`, the whole strip by default.
+        """
+        end = self._led_count if end is None else min(end, self._led_count)
+        start = max(0, start)
+        if start >= end:
+            return self
+        rgb = bytes(min(255, max(0, floor(c))) for c in (r, g, b))
+        with self._lock:
+            self._pixels[3 * start : 3 * end] = rgb * (end - start)
+            self._mask[start:end] = bytes([min(OPAQUE, max(TRANSPARENT, alpha))]) * (
+                end - start
+            )
+            self._version += 1
+        return self
+
+    def clear(self, start: int = 0, end: Optional[int] = None) -> Layer:
+        """
+        Make pixels transparent again, showing the layers below.
+        """
+        return self.fill(0, 0, 0, start, end, TRANSPARENT)
+
+    def snapshot(self) -> Tuple[bytes, bytes, float]:
+        with self._lock:
+            return bytes(self._pixels), bytes(self._mask), self._opacity
+
+
+class Compositor:
+    """
+    Blends named layers into one frame per refresh tick and pushes only the result to the NeoPixelPRU.
+    Layers are blended bottom up by z-order, ties in the order they were added, over a black background.
+    Ticks where no layer changed send nothing.
+
+    Run it on its own thread with `start()`/`stop()` or call `tick()` directly. A Ticker schedules the ticks, the frame
+    rate is capped at what the strip can refresh and late ticks drop the frames they missed.
+    """
+
+    DEFAULT_FPS: float = 50.0
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        neopixel: NeoPixelPRU
+        fps: float
+        clock: Callable[[], float]
+
+    class _Stats(TickStats):
+        def __init__(self) -> None:
+            super().__init__()
+            self._unchanged: int = 0
+
+        def get_headers(self) -> Sequence[str]:
+            return ["Frames", "Unchanged", "Dropped"]
+
+        def get_row(self) -> Sequence[str]:
+            return [str(self.frames), str(self._unchanged), str(self.dropped)]
+
+        @property
+        def unchanged(self) -> int:
+            return self._unchanged
+
+        def inc_unchanged(self) -> Compositor._Stats:
+            self._unchanged += 1
+            return self
+
+    def __init__(self, config: Compositor.Config):
+        self._log: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._neopixel: NeoPixelPRU = config["neopixel"]
+        self._clock: Callable[[], float] = config.get("clock", perf_counter)
+        fps = config.get("fps", Compositor.DEFAULT_FPS)
+
+        self._lock: Lock = Lock()
+        self._layers: Dict[str, Layer] = {}
+        self._order: List[Layer] = []
+        # Layer names and versions behind the last frame pushed.
+        self._drawn: Optional[List[Tuple[str, int]]] = None
+        self._stats = Compositor._Stats()
+        self._ticker: Ticker = Ticker(
+            {
+                "logger": self._log,
+                "name": "Compositor",
+                "tick": self.tick,
+                "periodSeconds": max(1 / fps, self._neopixel.refresh_seconds()),
+                "clock": self._clock,
+                "stats": self._stats,
+            }
+        )
+
+    @property
+    def stats(self) -> Compositor._Stats:
+        return self._stats
+
+    @property
+    def period_s(self) -> float:
+        return self._ticker.period_s
+
+    def is_running(self) -> bool:
+        return self._ticker.is_running()
+
+    def add_layer(self, name: str, z: int = 0, opacity: float = 1.0) -> Layer:
+        layer = Layer(name, self._neopixel.led_count, z, opacity)
+        with self._lock:
+            if name in self._layers:
+                raise LayerExists(name)
+            self._layers[name] = layer
+            self._sort([*self._order, layer])
+        return layer
+
+    def remove_layer(self, name: str) -> Compositor:
+        with self._lock:
+            layer = self._layers.pop(name, None)
+            if layer is not None:
+                self._sort([kept for kept in self._order if kept is not layer])
+        return self
+
+    def layer(self, name: str) -> Layer:
+        with self._lock:
+            return self._layers[name]
+
+    def set_z(self, name: str, z: int) -> Compositor:
+        with self._lock:
+            self._layers[name].set_z(z)
+            self._sort(self._order)
+        return self
+
+    def layers(self) -> List[str]:
+        """
+        Layer names from the bottom up.
+        """
+        with self._lock:
+            return [layer.name for layer in self._order]
+
+    def compose(self) -> bytearray:
+        """
+        Blend every layer into one frame of r g b bytes without sending it.
+        """
+        with self._lock:
+            layers = list(self._order)
+        return Compositor._blend(
+            self._neopixel.led_count, [layer.snapshot() for layer in layers]
+        )
+
+    def tick(self) -> Compositor:
+        with self._lock:
+            layers = list(self._order)
+        drawn = [(layer.name, layer.version) for layer in layers]
+        if drawn == self._drawn:
+            self._stats.inc_unchanged()
+            return self
+
+        frame = Compositor._blend(
+            self._neopixel.led_count, [layer.snapshot() for layer in layers]
+        )
+        self._neopixel.set_rgb_run_buffer(0, frame)
+        self._neopixel.draw()
+        self._drawn = drawn
+        self._stats.inc_frames()
+        return self
+
+    def start(self) -> Compositor:
+        if self._ticker.is_running():
+            raise CompositorRunning()
+
+        self._ticker.start()
+        return self
+
+    def stop(self) -> Compositor:
+        self._ticker.stop()
+        return self
+
+    def _sort(self, layers: List[Layer]) -> None:
+        # sorted() is stable, so layers on the same z stay in the order they were added.
+        self._order = sorted(layers, key=lambda layer: layer.z)
+        self._drawn = None
+
+    @staticmethod
+    def _blend(
+        led_count: int, snapshots: Sequence[Tuple[bytes, bytes, float]]
+    ) -> bytearray:
+        out = [0.0] * (3 * led_count)
+        for pixels, mask, opacity in snapshots:
+            if opacity <= 0.0:
+                continue
+            scale = opacity / OPAQUE
+            for i, alpha in enumerate(mask):
+                if not alpha:
+                    continue
+                a = alpha * scale
+                for c in range(3 * i, 3 * i + 3):
+                    out[c] += (pixels[c] - out[c]) * a
+        return bytearray(min(255, max(0, floor(c))) for c in out)
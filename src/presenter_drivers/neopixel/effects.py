@@ -0,0 +1,513 @@
+"""
+Effects compiled once into timed frames of encoded commands, so playing one only costs writes.
+
+Every frame sets the whole state of the effect's segments and draws, so any frame can be played without the ones before
+it. A frame is only kept when it differs from the previous one.
+
+Effect files are a 40 byte header, `count` cue times, `count + 1` frame offsets into the data, then the data.
+Header: magic(8s) version(H) reserved(2x) count(I) period_s(d) duration_s(d) reserved(8x)
+"""
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+from collections import OrderedDict
+from logging import Logger
+from math import ceil
+from time import perf_counter, sleep
+from types import TracebackType
+from typing import Callable, List, Optional, Sequence, Type, Union
+
+from typing_extensions import TypedDict
+
+from ..logger.logger import create_logger
+from ..stats.stats import AsTableStr
+from .animation import RGB, Animation, Countdown, Flash
+from .Color import PALETTE
+from .NeoPixelPRU import NeoPixelPRU
+from .writer.Writer import Buffer, Writer
+
+DEFAULT_LOGGER = create_logger("Effects")
+
+MAGIC = b"NEOPXEFX"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sH2xIdd8x")
+FILE_SUFFIX = ".fx"
+
+
+class InvalidEffect(Exception):
+    pass
+
+
+class CompiledEffect:
+    """
+    Frames of encoded commands, each sent `times[i]` seconds after the effect starts.
+    """
+
+    def __init__(
+        self,
+        times: Sequence[float],
+        offsets: Sequence[int],
+        data: Union[bytes, memoryview],
+        period_s: float,
+        duration_s: float,
+        source: Optional[mmap.mmap] = None,
+    ):
+        if len(offsets) != len(times) + 1:
+            raise ValueError("An effect needs one more offset than cues")
+        self._times: List[float] = list(times)
+        self._offsets: List[int] = list(offsets)
+        self._data: memoryview = memoryview(data)
+        self._period_s: float = period_s
+        self._duration_s: float = duration_s
+        self._source: Optional[mmap.mmap] = source
+
+    @classmethod
+    def from_frames(
+        cls,
+        times: Sequence[float],
+        frames: Sequence[bytes],
+        period_s: float,
+        duration_s: float,
+    ) -> CompiledEffect:
+        offsets = [0]
+        for frame in frames:
+            offsets.append(offsets[-1] + len(frame))
+        return cls(times, offsets, b"".join(frames), period_s, duration_s)
+
+    @classmethod
+    def load(cls, path: str) -> CompiledEffect:
+        """
+        Map an effect file, its frames are read from the page cache as they are played.
+        """
+        with open(path, "rb") as f:
+            try:
+                source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise InvalidEffect(f"{path} is empty") from e
+        if len(source) < HEADER.size:
+            source.close()
+            raise InvalidEffect(f"{path} is too short for an effect header")
+        magic, version, count, period_s, duration_s = HEADER.unpack_from(source)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            source.close()
+            raise InvalidEffect(f"{path} is not a version {FORMAT_VERSION} effect file")
+        times_at = HEADER.size
+        offsets_at = times_at + 8 * count
+        data_at = offsets_at + 8 * (count + 1)
+        if len(source) < data_at:
+            source.close()
+            raise InvalidEffect(f"{path} is shorter than its cue table")
+        times = struct.unpack_from(f"<{count}d", source, times_at)
+        offsets = struct.unpack_from(f"<{count + 1}Q", source, offsets_at)
+        if len(source) < data_at + offsets[-1]:
+            source.close()
+            raise InvalidEffect(f"{path} is shorter than its frames")
+        data = memoryview(source)[data_at : data_at + offsets[-1]]
+        return cls(times, offsets, data, period_s, duration_s, source)
+
+    def save(self, path: str) -> None:
+        """
+        Write the effect file atomically, a reader never maps half of one.
+        """
+        count = len(self._times)
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC, FORMAT_VERSION, count, self._period_s, self._duration_s
+                )
+            )
+            f.write(struct.pack(f"<{count}d", *self._times))
+            f.write(struct.pack(f"<{count + 1}Q", *self._offsets))
+            f.write(self._data)
+        os.replace(partial, path)
+
+    @property
+    def period_s(self) -> float:
+        return self._period_s
+
+    @property
+    def duration_s(self) -> float:
+        return self._duration_s
+
+    @property
+    def times(self) -> Sequence[float]:
+        return self._times
+
+    @property
+    def size(self) -> int:
+        """
+        Bytes of commands over every frame.
+        """
+        return self._offsets[-1]
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def frame(self, i: int) -> memoryview:
+        return self._data[self._offsets[i] : self._offsets[i + 1]]
+
+    @property
+    def closed(self) -> bool:
+        """
+        True once a mapped effect has been closed, compiled ones never close.
+        """
+        return self._source is not None and self._source.closed
+
+    def close(self) -> None:
+        if self._source is None or self._source.closed:
+            return
+        self._data.release()
+        self._source.close()
+
+
+class _Recorder(Writer):
+    def __init__(self) -> None:
+        super().__init__(None)
+        self._chunks: List[bytes] = []
+
+    def write(self, b: bytearray) -> None:
+        self._chunks.append(bytes(b))
+
+    def take(self) -> bytes:
+        frame = b"".join(self._chunks)
+        self._chunks = []
+        return frame
+
+    def __enter__(self) -> Writer:
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception_value: Optional[BaseException],
+        exception_traceback: Optional[TracebackType],
+    ) -> None:
+        pass
+
+
+def compile_effect(
+    animations: Sequence[Animation], neopixel: NeoPixelPRU, fps: float
+) -> CompiledEffect:
+    """
+    Render finite animations into frames encoded exactly like `neopixel` would send them.
+    """
+    if not animations:
+        raise ValueError("An effect needs at least one animation")
+    durations = [animation.duration_s for animation in animations]
+    if any(duration is None for duration in durations):
+        raise ValueError("Only animations with a duration can be compiled")
+    duration_s = max(duration or 0.0 for duration in durations)
+    period_s = max(1 / fps, neopixel.refresh_seconds())
+
+    recorder = _Recorder()
+    encoder = NeoPixelPRU(neopixel.clone_config(recorder))
+    times: List[float] = []
+    frames: List[bytes] = []
+    for k in range(ceil(duration_s / period_s) + 1):
+        t = min(k * period_s, duration_s)
+        # Forgetting the shadow makes each frame carry every segment, so frames can be skipped.
+        encoder.invalidate()
+        with encoder.batch():
+            for animation in animations:
+                color = (
+                    animation.final_color()
+                    if animation.finished(t)
+                    else animation.color_at(t)
+                )
+                encoder.set_segment_buffer(animation.segment, *color)
+            encoder.draw()
+        frame = recorder.take()
+        if not frames or frame != frames[-1]:
+            times.append(t)
+            frames.append(frame)
+    return CompiledEffect.from_frames(times, frames, period_s, duration_s)
+
+
+class EffectCache:
+    """
+    Compiled effects by key, least recently used evicted and closed first.
+    With `directory` effects are also saved as files there and mapped back in rather than compiled again.
+    """
+
+    DEFAULT_SIZE: int = 16
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        size: int
+        directory: str
+
+    class _Stats(AsTableStr):
+        def __init__(self) -> None:
+            self._hits: int = 0
+            self._compiled: int = 0
+            self._loaded: int = 0
+            self._evicted: int = 0
+
+        def get_headers(self) -> Sequence[str]:
+            return ["Hits", "Compiled", "Loaded", "Evicted"]
+
+        def get_row(self) -> Sequence[str]:
+            return [
+                str(self._hits),
+                str(self._compiled),
+                str(self._loaded),
+                str(self._evicted),
+            ]
+
+        @property
+        def hits(self) -> int:
+            return self._hits
+
+        @property
+        def compiled(self) -> int:
+            return self._compiled
+
+        @property
+        def loaded(self) -> int:
+            return self._loaded
+
+        @property
+        def evicted(self) -> int:
+            return self._evicted
+
+        def inc_hits(self) -> EffectCache._Stats:
+            self._hits += 1
+            return self
+
+        def inc_compiled(self) -> EffectCache._Stats:
+            self._compiled += 1
+            return self
+
+        def inc_loaded(self) -> EffectCache._Stats:
+            self._loaded += 1
+            return self
+
+        def inc_evicted(self) -> EffectCache._Stats:
+            self._evicted += 1
+            return self
+
+    def __init__(self, config: Optional[EffectCache.Config] = None):
+        config = config or {}
+        self._log: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._size: int = max(1, config.get("size", EffectCache.DEFAULT_SIZE))
+        self._directory: Optional[str] = config.get("directory")
+        if self._directory is not None:
+            os.makedirs(self._directory, exist_ok=True)
+        self._effects: OrderedDict[str, CompiledEffect] = OrderedDict()
+        self._stats = EffectCache._Stats()
+
+    @property
+    def stats(self) -> EffectCache._Stats:
+        return self._stats
+
+    def __len__(self) -> int:
+        return len(self._effects)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._effects
+
+    def get(self, key: str, compile_: Callable[[], CompiledEffect]) -> CompiledEffect:
+        """
+        The effect cached under `key`, else the saved one, else what `compile_` returns.
+        Evicted effects are closed, so don't hold on to one past the next `get()`.
+        """
+        effect = self._effects.get(key)
+        if effect is not None:
+            self._effects.move_to_end(key)
+            self._stats.inc_hits()
+            return effect
+
+        effect = self._load(key)
+        if effect is None:
+            effect = compile_()
+            self._stats.inc_compiled()
+            self._save(key, effect)
+        self._effects[key] = effect
+        if len(self._effects) > self._size:
+            _, evicted = self._effects.popitem(last=False)
+            # Mapped effects hold a file descriptor until closed.
+            evicted.close()
+            self._stats.inc_evicted()
+        return effect
+
+    def path(self, key: str) -> Optional[str]:
+        if self._directory is None:
+            return None
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self._directory, name + FILE_SUFFIX)
+
+    def _load(self, key: str) -> Optional[CompiledEffect]:
+        path = self.path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            effect = CompiledEffect.load(path)
+        except (InvalidEffect, OSError) as e:
+            self._log.warning("Compiling %s again: %s", key, e)
+            return None
+        self._stats.inc_loaded()
+        return effect
+
+    def _save(self, key: str, effect: CompiledEffect) -> None:
+        path = self.path(key)
+        if path is None:
+            return
+        try:
+            effect.save(path)
+        except OSError as e:
+            self._log.warning("Could not save %s: %s", key, e)
+
+
+class EffectPlayer:
+    """
+    Compiles effects for one NeoPixelPRU through an EffectCache and streams their frames to it on time.
+
+    Frames are due at fixed offsets from the start, so timing doesn't drift. The player sleeps until each frame is due, and
+    when it falls behind it skips straight to the latest frame due. Setting `spinSeconds` busy-waits the end of each wait
+    for tighter timing, at the cost of a CPU the IR sampler and drift threads share, so it is off by default.
+    Nothing else should write to the NeoPixelPRU while an effect plays.
+    """
+
+    DEFAULT_FPS: float = 50.0
+    DEFAULT_SPIN_SECONDS: float = 0.0
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        neopixel: NeoPixelPRU
+        cache: EffectCache
+        fps: float
+        spinSeconds: float
+        clock: Callable[[], float]
+        sleep: Callable[[float], object]
+
+    class _Stats(AsTableStr):
+        def __init__(self) -> None:
+            self._frames: int = 0
+            self._skipped: int = 0
+            self._max_late_s: float = 0.0
+
+        def get_headers(self) -> Sequence[str]:
+            return ["Frames", "Skipped", "Max late (ms)"]
+
+        def get_row(self) -> Sequence[str]:
+            return [
+                str(self._frames),
+                str(self._skipped),
+                f"{self._max_late_s * 1000:.3f}",
+            ]
+
+        @property
+        def frames(self) -> int:
+            return self._frames
+
+        @property
+        def skipped(self) -> int:
+            return self._skipped
+
+        @property
+        def max_late_s(self) -> float:
+            return self._max_late_s
+
+        def inc_frames(self) -> EffectPlayer._Stats:
+            self._frames += 1
+            return self
+
+        def inc_skipped(self) -> EffectPlayer._Stats:
+            self._skipped += 1
+            return self
+
+        def record_late(self, late_s: float) -> EffectPlayer._Stats:
+            self._max_late_s = max(self._max_late_s, late_s)
+            return self
+
+    def __init__(self, config: EffectPlayer.Config):
+        self._log: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._neopixel: NeoPixelPRU = config["neopixel"]
+        cache = config.get("cache")
+        self._cache: EffectCache = (
+            EffectCache({"logger": self._log}) if cache is None else cache
+        )
+        self._fps: float = config.get("fps", EffectPlayer.DEFAULT_FPS)
+        self._spin_s: float = config.get(
+            "spinSeconds", EffectPlayer.DEFAULT_SPIN_SECONDS
+        )
+        self._clock: Callable[[], float] = config.get("clock", perf_counter)
+        self._sleep: Callable[[float], object] = config.get("sleep", sleep)
+        # Everything the encoding depends on, so differently encoded effects never share a key.
+        encoding = self._neopixel.clone_config(_Recorder())
+        self._encoding: str = ",".join(
+            f"{name}={value}"
+            for name, value in sorted(encoding.items())
+            if name not in ("logger", "writer")
+        )
+        self._stats = EffectPlayer._Stats()
+
+    @property
+    def stats(self) -> EffectPlayer._Stats:
+        return self._stats
+
+    @property
+    def cache(self) -> EffectCache:
+        return self._cache
+
+    def effect(
+        self, name: str, animations: Callable[[], Sequence[Animation]]
+    ) -> CompiledEffect:
+        """
+        The effect called `name`, compiled from `animations()` the first time. The name must capture every parameter.
+        """
+        return self._cache.get(
+            f"{name}|fps={self._fps}|{self._encoding}",
+            lambda: compile_effect(animations(), self._neopixel, self._fps),
+        )
+
+    def error_flashing(
+        self,
+        duration_s: float,
+        color: RGB = PALETTE.RED.rgb,
+        period_s: float = 1.0,
+    ) -> CompiledEffect:
+        return self.effect(
+            f"error-flashing|{color}|{duration_s}|{period_s}",
+            lambda: [Flash(NeoPixelPRU.SEGMENT_ALL, color, duration_s, period_s)],
+        )
+
+    def retract_countdown(self, duration_s: float) -> CompiledEffect:
+        return self.effect(
+            f"retract-countdown|{duration_s}", lambda: [Countdown(duration_s)]
+        )
+
+    def play(self, effect: CompiledEffect) -> EffectPlayer:
+        """
+        Stream every frame of `effect`, returning once the last one is sent.
+        """
+        times = effect.times
+        start = self._clock()
+        for i, t in enumerate(times):
+            self._wait_until(start + t)
+            if i + 1 < len(times) and start + times[i + 1] <= self._clock():
+                self._stats.inc_skipped()
+                continue
+            self._stats.record_late(self._clock() - start - t)
+            self._send(effect.frame(i))
+        return self
+
+    def _send(self, frame: Buffer) -> None:
+        self._neopixel.send(frame)
+        self._stats.inc_frames()
+
+    def _wait_until(self, due: float) -> None:
+        remaining = due - self._clock()
+        if remaining > self._spin_s:
+            self._sleep(remaining - self._spin_s)
+        if self._spin_s > 0:
+            now = self._clock()
+            while now < due:
+                last, now = now, self._clock()
+                if now == last:
+                    # A clock that doesn't move would spin forever.
+                    break
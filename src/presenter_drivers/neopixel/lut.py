@@ -0,0 +1,122 @@
+"""
+Precomputed 8 bit color tables. A frame is corrected with one bytearray.translate() call instead of per pixel float math.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from math import floor
+from typing import List, Sequence, Tuple
+
+from .Color import HSVtoRGB
+
+HUE_STEPS = 1536  # 256 steps between each primary and secondary color
+COUNTDOWN_STEPS = 256
+DEFAULT_GAMMA = 2.8  # Usual WS2812 correction
+
+RGBBytes = Tuple[int, int, int]
+
+
+@lru_cache(maxsize=32)
+def color_table(gamma: float = 1.0, brightness: float = 1.0) -> bytes:
+    """
+    Maps each 0-255 channel value through gamma correction then global brightness.
+    """
+    brightness = min(1.0, max(0.0, brightness))
+    return bytes(round(255 * (c / 255) ** gamma * brightness) for c in range(256))
+
+
+def gamma_table(gamma: float = DEFAULT_GAMMA) -> bytes:
+    return color_table(gamma, 1.0)
+
+
+def brightness_table(brightness: float) -> bytes:
+    return color_table(1.0, brightness)
+
+
+def apply_table(frame: bytearray, table: bytes) -> bytearray:
+    """
+    Correct every channel of `frame` in place.
+    """
+    frame[:] = frame.translate(table)
+    return frame
+
+
+@lru_cache(maxsize=1)
+def hue_wheel() -> bytes:
+    """
+    Fully saturated, full value r g b for HUE_STEPS hues around the wheel.
+    """
+    wheel = bytearray(3 * HUE_STEPS)
+    for i in range(HUE_STEPS):
+        rgb = HSVtoRGB(i / HUE_STEPS, 1.0, 1.0)
+        wheel[3 * i : 3 * i + 3] = bytes((rgb["r"], rgb["g"], rgb["b"]))
+    return bytes(wheel)
+
+
+@lru_cache(maxsize=64)
+def _saturation_value_table(s: float, v: float) -> bytes:
+    # Every HSV channel is v * (1 - s * (1 - c)) where c is the channel at full saturation and value.
+    return bytes(round(255 * v * (1 - s * (1 - c / 255))) for c in range(256))
+
+
+def hsv_to_rgb_many(hues: Sequence[float], s: float = 1.0, v: float = 1.0) -> bytearray:
+    """
+    Convert a whole array of hues, 0-1 like HSVtoRGB, sharing one saturation and value.
+    Returns r g b bytes per hue. Matches HSVtoRGB to within one step of the wheel.
+    """
+    wheel = hue_wheel()
+    frame = bytearray(3 * len(hues))
+    for i, h in enumerate(hues):
+        step = 3 * (floor(h * HUE_STEPS) % HUE_STEPS)
+        frame[3 * i : 3 * i + 3] = wheel[step : step + 3]
+    if s != 1.0 or v != 1.0:
+        apply_table(frame, _saturation_value_table(s, v))
+    return frame
+
+
+class Gradient:
+    """
+    Colors precomputed at evenly spaced points, looking one up costs an index.
+    """
+
+    def __init__(self, rgb: bytes):
+        if not rgb or len(rgb) % 3:
+            raise ValueError("rgb needs three bytes per step")
+        self._rgb: bytes = rgb
+        self._colors: List[RGBBytes] = [
+            (rgb[i], rgb[i + 1], rgb[i + 2]) for i in range(0, len(rgb), 3)
+        ]
+
+    @classmethod
+    def hue(cls, start: float, end: float, steps: int) -> Gradient:
+        """
+        Hues from `start` to `end`, both 0-1 and included.
+        """
+        rgb = bytearray()
+        for i in range(steps):
+            p = i / (steps - 1) if steps > 1 else 0.0
+            color = HSVtoRGB(start + (end - start) * p, 1.0, 1.0)
+            rgb += bytes((color["r"], color["g"], color["b"]))
+        return cls(bytes(rgb))
+
+    @property
+    def rgb(self) -> bytes:
+        return self._rgb
+
+    def __len__(self) -> int:
+        return len(self._colors)
+
+    def at(self, p: float) -> RGBBytes:
+        """
+        Color `p` of the way along, clamped to 0-1.
+        """
+        last = len(self._colors) - 1
+        return self._colors[min(last, max(0, round(p * last)))]
+
+
+@lru_cache(maxsize=4)
+def countdown_gradient(steps: int = COUNTDOWN_STEPS) -> Gradient:
+    """
+    Red at 0 through yellow to green at 1, the presenter retract countdown.
+    """
+    return Gradient.hue(0.0, 120 / 360, steps)
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from logging import Logger
+from math import floor
+from time import perf_counter
+from types import TracebackType
+from typing import Callable, List, Optional, Sequence, Tuple, Type, TypeVar
+
+from typing_extensions import TypedDict
+
+from ..logger.logger import create_logger
+from ..stats.stats import AsTableStr
+from .Color import frame_to_rgb
+from .NeoPixelPRU import SEGMENT_ALL, SEGMENT_COUNT, NeoPixelPRU
+from .writer.PRUDeviceWriter import PRUDeviceWriter
+from .writer.Writer import Buffer, Writer
+
+DEFAULT_LOGGER = create_logger("MULTI_CHANNEL_NEOPIXEL")
+DEFAULT_DEVICES = ("/dev/rpmsg_pru30", "/dev/rpmsg_pru31")
+
+T = TypeVar("T")
+
+
+class MultiChannelNeoPixel:
+    """
+    One logical strip split across several NeoPixelPRU channels laid end to end, each usually on its own PRU and rpmsg
+    device. Every channel refreshes its own LEDs, so the strip refreshes as fast as its longest channel.
+
+    Writes are buffered per channel. `draw()` pushes every channel's commands concurrently and waits for all of them, then
+    sends the draws together so the channels latch the frame at the same time.
+
+    Channels come from `channels` configs, or are opened on `devices`, by default pru30 and pru31, sharing `channelConfig`.
+
+    SEGMENT_ALL is every channel's SEGMENT_ALL. Segments one to three are thirds of the logical strip, split the way the
+    firmware splits one channel, and go out as pixel runs.
+    """
+
+    SEGMENT_COUNT = SEGMENT_COUNT
+    SEGMENT_ALL = SEGMENT_ALL
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        channels: List[NeoPixelPRU.Config]
+        devices: List[str]
+        channelConfig: NeoPixelPRU.Config
+
+    class _Stats(AsTableStr):
+        def __init__(self) -> None:
+            self._draws: int = 0
+            self._max_skew_s: float = 0.0
+
+        def get_headers(self) -> Sequence[str]:
+            return ["Draws", "Max skew (ms)"]
+
+        def get_row(self) -> Sequence[str]:
+            return [str(self._draws), f"{self._max_skew_s * 1000:.3f}"]
+
+        @property
+        def draws(self) -> int:
+            return self._draws
+
+        @property
+        def max_skew_s(self) -> float:
+            """
+            Longest gap between the first and last channel finishing the same draw.
+            """
+            return self._max_skew_s
+
+        def inc_draws(self) -> MultiChannelNeoPixel._Stats:
+            self._draws += 1
+            return self
+
+        def record_skew(self, skew_s: float) -> MultiChannelNeoPixel._Stats:
+            self._max_skew_s = max(self._max_skew_s, skew_s)
+            return self
+
+    def __init__(self, config: MultiChannelNeoPixel.Config):
+        self._log: Logger = config.get("logger", DEFAULT_LOGGER)
+        channels = config.get("channels")
+        devices = config.get("devices")
+        if channels is not None and devices is not None:
+            raise ValueError("Only one of channels and devices can be given")
+
+        # Writers opened here for `devices`, closed with the display.
+        self._owned: List[Writer] = []
+        if channels is None:
+            channels = []
+            for path in DEFAULT_DEVICES if devices is None else devices:
+                writer = PRUDeviceWriter(path)
+                self._owned.append(writer)
+                device = config.get("channelConfig", {}).copy()
+                device["writer"] = writer
+                channels.append(device)
+        if not channels:
+            raise ValueError("At least one channel is needed")
+
+        self._channels: List[NeoPixelPRU] = []
+        # Logical index of the first LED of each channel.
+        self._starts: List[int] = []
+        self._led_count: int = 0
+        for channel_config in channels:
+            channel_config = channel_config.copy()
+            channel_config.setdefault("logger", self._log)
+            channel = NeoPixelPRU(channel_config)
+            self._channels.append(channel)
+            self._starts.append(self._led_count)
+            self._led_count += channel.led_count
+
+        self._executor: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(len(self._channels)) if len(self._channels) > 1 else None
+        )
+        self._stats = MultiChannelNeoPixel._Stats()
+
+    @property
+    def stats(self) -> MultiChannelNeoPixel._Stats:
+        return self._stats
+
+    @property
+    def channels(self) -> Sequence[NeoPixelPRU]:
+        return self._channels
+
+    @property
+    def led_count(self) -> int:
+        return self._led_count
+
+    def refresh_seconds(self) -> float:
+        """
+        Shortest time between two frames, the channels refresh in parallel.
+        """
+        return max(channel.refresh_seconds() for channel in self._channels)
+
+    def is_valid_display_index(self, index: int) -> bool:
+        return 0 <= index < self._led_count
+
+    def set_color_buffer(
+        self, index: int, r: float, g: float, b: float
+    ) -> MultiChannelNeoPixel:
+        if not self.is_valid_display_index(index):
+            self._log.warning("Index out of range.")
+            return self
+        channel, local = self._locate(index)
+        channel.set_color_buffer(local, r, g, b)
+        return self
+
+    def set_color(
+        self, index: int, r: float, g: float, b: float
+    ) -> MultiChannelNeoPixel:
+        self.set_color_buffer(index, r, g, b)
+        return self.draw()
+
+    def set_rgb_run_buffer(self, index: int, rgb: Buffer) -> MultiChannelNeoPixel:
+        """
+        Set consecutive pixels from `index`, `rgb` holds r g b bytes per pixel. Runs may cross channels.
+        """
+        count = len(rgb) // 3
+        if len(rgb) % 3 or not (
+            self.is_valid_display_index(index)
+            and self.is_valid_display_index(index + count - 1)
+        ):
+            self._log.warning("Index out of range.")
+            return self
+
+        view = memoryview(rgb)
+        end = index + count
+        while index < end:
+            channel, local = self._locate(index)
+            n = min(end - index, channel.led_count - local)
+            channel.set_rgb_run_buffer(local, view[: 3 * n])
+            view = view[3 * n :]
+            index += n
+        return self
+
+    def set_frame_buffer(self, index: int, frame: array[int]) -> MultiChannelNeoPixel:
+        """
+        Set consecutive pixels from `index` to a frame of packed GRB colors.
+        """
+        return self.set_rgb_run_buffer(index, frame_to_rgb(frame))
+
+    def set_frame(self, index: int, frame: array[int]) -> MultiChannelNeoPixel:
+        self.set_frame_buffer(index, frame)
+        return self.draw()
+
+    def set_segment_buffer(
+        self, index: int, r: float, g: float, b: float
+    ) -> MultiChannelNeoPixel:
+        if not 0 <= index < SEGMENT_COUNT:
+            self._log.warning("Invalid segment index")
+            return self
+        if index == SEGMENT_ALL:
+            for channel in self._channels:
+                channel.set_segment_buffer(SEGMENT_ALL, r, g, b)
+            return self
+
+        start, end = self.segment_range(index)
+        rgb = bytes(min(255, max(0, floor(c))) for c in (r, g, b))
+        return self.set_rgb_run_buffer(start, rgb * (end - start))
+
+    def set_segment(
+        self, index: int, r: float, g: float, b: float
+    ) -> MultiChannelNeoPixel:
+        self.set_segment_buffer(index, r, g, b)
+        return self.draw()
+
+    def segment_range(self, index: int) -> Tuple[int, int]:
+        """
+        First and one past the last logical LED of a segment.
+        """
+        if index == SEGMENT_ALL:
+            return 0, self._led_count
+        size = self._led_count // (SEGMENT_COUNT - 1)
+        start = (index - 1) * size
+        end = self._led_count if index == SEGMENT_COUNT - 1 else start + size
+        return start, end
+
+    def clear(self) -> MultiChannelNeoPixel:
+        self._each(NeoPixelPRU.clear)
+        return self
+
+    def draw(self) -> MultiChannelNeoPixel:
+        # Pixel data first, so the draws that follow are small writes that land together.
+        self._each(NeoPixelPRU.flush)
+        finished = self._each(MultiChannelNeoPixel._draw_channel)
+        self._stats.inc_draws()
+        self._stats.record_skew(max(finished) - min(finished))
+        return self
+
+    def flush(self) -> MultiChannelNeoPixel:
+        self._each(NeoPixelPRU.flush)
+        return self
+
+    def invalidate(self) -> MultiChannelNeoPixel:
+        for channel in self._channels:
+            channel.invalidate()
+        return self
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for writer in self._owned:
+            writer.__exit__(None, None, None)
+        self._owned = []
+
+    def _locate(self, index: int) -> Tuple[NeoPixelPRU, int]:
+        i = bisect_right(self._starts, index) - 1
+        return self._channels[i], index - self._starts[i]
+
+    def _each(self, fn: Callable[[NeoPixelPRU], T]) -> List[T]:
+        """
+        Run `fn` on every channel at once, returning once all are done. Errors are raised here.
+        """
+        if self._executor is None:
+            return [fn(channel) for channel in self._channels]
+        return list(self._executor.map(fn, self._channels))
+
+    @staticmethod
+    def _draw_channel(channel: NeoPixelPRU) -> float:
+        channel.draw()
+        return perf_counter()
+
+    def __enter__(self) -> MultiChannelNeoPixel:
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception_value: Optional[BaseException],
+        exception_traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
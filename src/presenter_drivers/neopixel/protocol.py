@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from math import floor
+from struct import Struct
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple, Type
+
+if TYPE_CHECKING:
+    from .writer.Writer import Buffer
+
+TEXT = "text"
+BINARY = "binary"
+BINARY_FIRMWARE_MAJOR = 2  # First firmware major version that accepts binary commands
+
+# Binary opcodes have the high bit set so the firmware can tell them apart from text commands.
+OP_SET = 0x81
+OP_RUN = 0x82
+OP_DRAW = 0x83
+OP_CLEAR = 0x84
+
+SET = Struct("<BHBBB")  # opcode, firmware index, g, r, b
+RUN = Struct("<BHH")  # opcode, first pixel index, pixel count, then g r b per pixel
+OPCODE = Struct("<B")
+
+TEXT_COMMAND_BYTES = 32  # Longest text command, "index r g b\n" with float colors
+MAX_WRITE_BYTES = (
+    496  # rpmsg buffer (512) less its header, the PRU rejects longer writes with EINVAL
+)
+
+# The firmware can't refresh the strip faster than WS2812 LEDs take to shift out a frame.
+WS2812_PIXEL_SECONDS = 0.00003  # 24 bits at 800kHz
+WS2812_RESET_SECONDS = 0.00028  # Latch time of current WS2812B parts
+
+
+def refresh_seconds(led_count: int) -> float:
+    """
+    Time to shift one frame out to a strip of `led_count` LEDs, reset included.
+    """
+    return led_count * WS2812_PIXEL_SECONDS + WS2812_RESET_SECONDS
+
+
+class CommandEncoder(ABC):
+    """
+    Encodes PRU firmware commands into a caller owned buffer.
+    Every method returns the number of bytes written, or 0 when the command does not fit after `offset`.
+    Indexes are firmware indexes: pixels first, then destinations, then segments.
+    """
+
+    name: str = ""
+    max_command_bytes: int = 0
+    # Keys `split()` gives draw and clear commands.
+    draw_key: bytes = b""
+    clear_key: bytes = b""
+
+    @abstractmethod
+    def pixel(
+        self, buffer: bytearray, offset: int, index: int, r: float, g: float, b: float
+    ) -> int:
+        pass
+
+    @abstractmethod
+    def command(
+        self, buffer: bytearray, offset: int, index: int, r: float, g: float, b: float
+    ) -> int:
+        """
+        Destination and segment writes.
+        """
+
+    @abstractmethod
+    def draw(self, buffer: bytearray, offset: int) -> int:
+        pass
+
+    @abstractmethod
+    def clear(self, buffer: bytearray, offset: int) -> int:
+        pass
+
+    @abstractmethod
+    def split(self, data: Buffer) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Encoded commands in `data`, each with a key shared by the commands that overwrite the same firmware entries.
+        Raises ValueError on a partial or unknown command.
+        """
+
+
+class RunEncoder(CommandEncoder):
+    """
+    A protocol that can also send consecutive pixels as one bulk run.
+    """
+
+    @abstractmethod
+    def pixel_run(
+        self, buffer: bytearray, offset: int, index: int, rgb: memoryview
+    ) -> int:
+        """
+        Consecutive pixels from `index`, `rgb` holds r g b bytes per pixel.
+        """
+
+    @abstractmethod
+    def run_bytes(self, count: int) -> int:
+        """
+        Size of a run of `count` pixels.
+        """
+
+
+class TextEncoder(CommandEncoder):
+    """
+    The original protocol, one "index r g b" line per command. Understood by every firmware version.
+    """
+
+    name = TEXT
+    max_command_bytes = TEXT_COMMAND_BYTES
+    draw_key = b"-1"
+    clear_key = b"-2"
+
+    def pixel(
+        self, buffer: bytearray, offset: int, index: int, r: float, g: float, b: float
+    ) -> int:
+        return TextEncoder._put(
+            buffer, offset, f"{index} {float(r)} {float(g)} {float(b)}\n"
+        )
+
+    def command(
+        self, buffer: bytearray, offset: int, index: int, r: float, g: float, b: float
+    ) -> int:
+        return TextEncoder._put(
+            buffer, offset, f"{index} {floor(r)} {floor(g)} {floor(b)}\n"
+        )
+
+    def draw(self, buffer: bytearray, offset: int) -> int:
+        return TextEncoder._put(buffer, offset, "-1 0 0 0\n")
+
+    def clear(self, buffer: bytearray, offset: int) -> int:
+        return TextEncoder._put(buffer, offset, "-2 0 0 0\n")
+
+    def split(self, data: Buffer) -> Iterator[Tuple[bytes, bytes]]:
+        data = bytes(data)
+        start = 0
+        while start < len(data):
+            end = data.find(b"\n", start) + 1
+            if not end:
+                raise ValueError("Partial text command")
+            line = data[start:end]
+            yield line.split(b" ", 1)[0], line
+            start = end
+
+    @staticmethod
+    def _put(buffer: bytearray, offset: int, s: str) -> int:
+        encoded = s.encode("ascii")
+        n = len(encoded)
+        if offset + n > len(buffer):
+            return 0
+        buffer[offset : offset + n] = encoded
+        return n
+
+
+class BinaryEncoder(RunEncoder):
+    """
+    Packed commands: an opcode byte, a little endian uint16 index and g r b bytes in strip order.
+    Colors are floored and clamped to 0-255.
+    """
+
+    name = BINARY
+    max_command_bytes = SET.size
+    draw_key = bytes((OP_DRAW,))
+    clear_key = bytes((OP_CLEAR,))
+
+    def pixel(
+        self, buffer: bytearray, offset: int, index: int, r: float, g: float, b: float
+    ) -> int:
+        return self.command(buffer, offset, index, r, g, b)
+
+    def command(
+        self, buffer: bytearray, offset: int, index: int, r: float, g: float, b: float
+    ) -> int:
+        if offset + SET.size > len(buffer):
+            return 0
+        SET.pack_into(buffer, offset, OP_SET, index, _byte(g), _byte(r), _byte(b))
+        return SET.size
+
+    def draw(self, buffer: bytearray, offset: int) -> int:
+        return BinaryEncoder._opcode(buffer, offset, OP_DRAW)
+
+    def clear(self, buffer: bytearray, offset: int) -> int:
+        return BinaryEncoder._opcode(buffer, offset, OP_CLEAR)
+
+    def pixel_run(
+        self, buffer: bytearray, offset: int, index: int, rgb: memoryview
+    ) -> int:
+        count = len(rgb) // 3
+        n = self.run_bytes(count)
+        if offset + n > len(buffer):
+            return 0
+        RUN.pack_into(buffer, offset, OP_RUN, index, count)
+        start = offset + RUN.size
+        end = offset + n
+        buffer[start:end:3] = rgb[1::3]
+        buffer[start + 1 : end : 3] = rgb[0::3]
+        buffer[start + 2 : end : 3] = rgb[2::3]
+        return n
+
+    def run_bytes(self, count: int) -> int:
+        return RUN.size + 3 * count
+
+    def split(self, data: Buffer) -> Iterator[Tuple[bytes, bytes]]:
+        data = bytes(data)
+        offset = 0
+        while offset < len(data):
+            opcode = data[offset]
+            if opcode == OP_SET:
+                key_size, n = 3, SET.size
+            elif opcode == OP_RUN:
+                if offset + RUN.size > len(data):
+                    raise ValueError("Partial binary command")
+                key_size, n = RUN.size, self.run_bytes(RUN.unpack_from(data, offset)[2])
+            elif opcode in (OP_DRAW, OP_CLEAR):
+                key_size, n = OPCODE.size, OPCODE.size
+            else:
+                raise ValueError(f"Unknown opcode {opcode:#x}")
+            if offset + n > len(data):
+                raise ValueError("Partial binary command")
+            yield data[offset : offset + key_size], data[offset : offset + n]
+            offset += n
+
+    @staticmethod
+    def _opcode(buffer: bytearray, offset: int, opcode: int) -> int:
+        if offset + OPCODE.size > len(buffer):
+            return 0
+        OPCODE.pack_into(buffer, offset, opcode)
+        return OPCODE.size
+
+
+ENCODERS: Dict[str, Type[CommandEncoder]] = {
+    TEXT: TextEncoder,
+    BINARY: BinaryEncoder,
+}
+
+
+def chunk_commands(
+    encoder: CommandEncoder,
+    data: Buffer,
+    limit: int = MAX_WRITE_BYTES,
+) -> List[bytes]:
+    """
+    `data` cut on command boundaries into writes of at most `limit` bytes.
+    """
+    if len(data) <= limit:
+        return [bytes(data)]
+    chunks: List[bytes] = []
+    chunk = bytearray()
+    for _, command in encoder.split(data):
+        if chunk and len(chunk) + len(command) > limit:
+            chunks.append(bytes(chunk))
+            chunk = bytearray()
+        chunk += command
+    if chunk:
+        chunks.append(bytes(chunk))
+    return chunks
+
+
+def coalesce(encoder: CommandEncoder, writes: Sequence[Buffer]) -> bytes:
+    """
+    One write that leaves the firmware where `writes` in order would, without showing the frames in between.
+    Only the last command per key is kept, in the order of the last ones, and a single draw goes last when any write drew.
+    Clears are kept in place and nothing is merged across them. Raises ValueError when a write does not parse.
+    """
+    merged: List[bytes] = []
+    latest: Dict[bytes, bytes] = {}
+    drawn = False
+    for data in writes:
+        for key, command in encoder.split(data):
+            if key == encoder.draw_key:
+                drawn = True
+            elif key == encoder.clear_key:
+                # A clear shows the blank strip itself, so draws before it are dropped too.
+                merged.extend(latest.values())
+                merged.append(command)
+                latest = {}
+                drawn = False
+            else:
+                latest.pop(key, None)
+                latest[key] = command
+    merged.extend(latest.values())
+    if drawn:
+        draw = bytearray(encoder.max_command_bytes)
+        merged.append(bytes(draw[: encoder.draw(draw, 0)]))
+    return b"".join(merged)
+
+
+def firmware_major(version: str) -> Optional[int]:
+    try:
+        return int(version.split(".")[0])
+    except ValueError:
+        return None
+
+
+def protocol_for(firmware_version: str) -> str:
+    """
+    The densest protocol a firmware version understands, text when the version can't be read.
+    """
+    major = firmware_major(firmware_version)
+    if major is not None and major >= BINARY_FIRMWARE_MAJOR:
+        return BINARY
+    return TEXT
+
+
+def _byte(value: float) -> int:
+    return min(255, max(0, floor(value)))
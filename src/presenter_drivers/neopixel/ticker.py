@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+from logging import Logger
+from math import floor
+from threading import Thread
+from time import perf_counter, sleep
+from typing import Callable, Optional, Sequence
+
+from typing_extensions import TypedDict
+
+from ..logger.logger import create_logger
+from ..stats.stats import AsTableStr
+
+DEFAULT_LOGGER = create_logger("Ticker")
+
+
+class TickerRunning(Exception):
+    pass
+
+
+class TickStats(AsTableStr):
+    def __init__(self) -> None:
+        self._frames: int = 0
+        self._dropped: int = 0
+
+    def get_headers(self) -> Sequence[str]:
+        return ["Frames", "Dropped"]
+
+    def get_row(self) -> Sequence[str]:
+        return [str(self._frames), str(self._dropped)]
+
+    @property
+    def frames(self) -> int:
+        return self._frames
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def inc_frames(self) -> TickStats:
+        self._frames += 1
+        return self
+
+    def inc_dropped(self, count: int = 1) -> TickStats:
+        self._dropped += count
+        return self
+
+
+class Ticker:
+    """
+    Calls `tick` every `periodSeconds`, on its own thread with `start()`/`stop()` or on an asyncio loop with
+    `await run_async()`. Ticks are scheduled against the start time so they don't drift. When a tick runs late the slots
+    it missed are counted as dropped frames rather than ticked in a burst.
+    """
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        name: str
+        tick: Callable[[], object]
+        periodSeconds: float
+        clock: Callable[[], float]
+        stats: TickStats
+
+    def __init__(self, config: Ticker.Config):
+        self._log: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._name: str = config.get("name", "Ticker")
+        self._tick: Callable[[], object] = config["tick"]
+        self._period_s: float = config["periodSeconds"]
+        self._clock: Callable[[], float] = config.get("clock", perf_counter)
+        self._stats: TickStats = config.get("stats", TickStats())
+        self._running: bool = False
+        self._thread: Optional[Thread] = None
+
+    @property
+    def stats(self) -> TickStats:
+        return self._stats
+
+    @property
+    def period_s(self) -> float:
+        return self._period_s
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def start(self) -> Ticker:
+        if self._running:
+            raise TickerRunning()
+
+        self._running = True
+        self._thread = Thread(target=self._thread_function, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Ticker:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    async def run_async(self) -> None:
+        """
+        Tick on the running asyncio loop until `stop()`.
+        """
+        if self._running:
+            raise TickerRunning()
+
+        self._running = True
+        next_s = self._clock()
+        while self._running:
+            next_s = self._advance(next_s)
+            await asyncio.sleep(max(0.0, next_s - self._clock()))
+
+    def _thread_function(self) -> None:
+        self._log.info("%s started", self._name)
+
+        next_s = self._clock()
+        while self._running:
+            next_s = self._advance(next_s)
+            sleep(max(0.0, next_s - self._clock()))
+
+        self._log.info("%s stopped", self._name)
+
+    def _advance(self, next_s: float) -> float:
+        """
+        Tick and return when the next tick is due, skipping the slots that have already passed.
+        """
+        self._tick()
+        next_s += self._period_s
+        behind = self._clock() - next_s
+        if behind >= 0:
+            missed = floor(behind / self._period_s) + 1
+            self._stats.inc_dropped(missed)
+            next_s += missed * self._period_s
+        return next_s
@@ -1,10 +1,21 @@
 from __future__ import annotations
 
+import os
 from tempfile import NamedTemporaryFile
 from types import TracebackType
-from typing import IO, ClassVar, Optional, Type
+from typing import IO, ClassVar, List, Optional, Sequence, Type
 
-from .Writer import Writer
+from .Writer import Buffer, Writer
+
+
+def _iov_max() -> int:
+    try:
+        return os.sysconf("SC_IOV_MAX")
+    except (AttributeError, ValueError, OSError):
+        return 1024
+
+
+IOV_MAX = _iov_max()
 
 
 class FileWriter(Writer):
@@ -22,6 +33,23 @@ class FileWriter(Writer):
     def write(self, b: bytearray) -> None:
         self.file.write(b)
 
+    def write_many(self, buffers: Sequence[Buffer]) -> None:
+        """
+        Write every buffer with as few writev calls as IOV_MAX allows, finishing short writes.
+        """
+        if not hasattr(os, "writev"):
+            self.file.write(b"".join(buffers))
+            return
+
+        fd = self.file.fileno()
+        pending: List[memoryview] = [memoryview(b) for b in buffers if len(b)]
+        while pending:
+            written = os.writev(fd, pending[:IOV_MAX])
+            while pending and written >= len(pending[0]):
+                written -= len(pending.pop(0))
+            if written:
+                pending[0] = pending[0][written:]
+
     def __enter__(self) -> Writer:
         return self
 
@@ -0,0 +1,137 @@
+"""
+Ring files are a 32 byte header followed by `capacity` bytes of data. Byte n of the stream lives at n % capacity.
+
+Header: magic(8s) version(H) reserved(6x) capacity(Q) written(Q)
+`written` counts every byte ever written and is updated after the data, so a reader sees whole writes.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from types import TracebackType
+from typing import Optional, Sequence, Type
+
+from typing_extensions import TypedDict
+
+from .Writer import Buffer, Writer
+
+MAGIC = b"NEOPXRNG"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sH6xQQ")
+WRITTEN = struct.Struct("<Q")
+WRITTEN_OFFSET = HEADER.size - WRITTEN.size
+
+
+class InvalidRing(Exception):
+    pass
+
+
+class MmapRingWriter(Writer):
+    """
+    Captures a command stream into a fixed size memory mapped ring file, keeping the most recent `capacity` bytes.
+    Writes are memory copies, the kernel pages them out in the background.
+    """
+
+    DEFAULT_CAPACITY: int = 1 << 20
+
+    class Config(TypedDict, total=False):
+        path: str
+        capacity: int
+
+    def __init__(self, config: MmapRingWriter.Config):
+        super().__init__(None)
+        self._capacity: int = config.get("capacity", MmapRingWriter.DEFAULT_CAPACITY)
+        if self._capacity <= 0:
+            raise ValueError("capacity must be positive")
+
+        fd = os.open(config["path"], os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, HEADER.size + self._capacity)
+            self._map: mmap.mmap = mmap.mmap(fd, 0)
+        finally:
+            os.close(fd)
+        HEADER.pack_into(self._map, 0, MAGIC, FORMAT_VERSION, self._capacity, 0)
+        self._data: memoryview = memoryview(self._map)[HEADER.size :]
+        self._written: int = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def written(self) -> int:
+        return self._written
+
+    @property
+    def overwritten(self) -> int:
+        """
+        Bytes lost to the ring wrapping.
+        """
+        return max(0, self._written - self._capacity)
+
+    def write(self, b: bytearray) -> None:
+        self._put(b)
+        WRITTEN.pack_into(self._map, WRITTEN_OFFSET, self._written)
+
+    def write_many(self, buffers: Sequence[Buffer]) -> None:
+        for b in buffers:
+            self._put(b)
+        WRITTEN.pack_into(self._map, WRITTEN_OFFSET, self._written)
+
+    def contents(self) -> bytes:
+        """
+        The bytes still held, oldest first.
+        """
+        return _unwrap(self._data, self._capacity, self._written)
+
+    def close(self) -> None:
+        if self._map.closed:
+            return
+        self._data.release()
+        self._map.flush()
+        self._map.close()
+
+    def _put(self, b: Buffer) -> None:
+        n = len(b)
+        view = memoryview(b)[-self._capacity :]
+        start = (self._written + n - len(view)) % self._capacity
+        first = min(len(view), self._capacity - start)
+        self._data[start : start + first] = view[:first]
+        self._data[: len(view) - first] = view[first:]
+        self._written += n
+
+    def __enter__(self) -> Writer:
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception_value: Optional[BaseException],
+        exception_traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def read_ring(path: str) -> bytes:
+    """
+    Read back what a MmapRingWriter captured, oldest first.
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise InvalidRing(f"{path} is too short for a ring header")
+        magic, version, capacity, written = HEADER.unpack(header)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise InvalidRing(f"{path} is not a version {FORMAT_VERSION} ring file")
+        data = f.read(capacity)
+    if len(data) < capacity:
+        raise InvalidRing(f"{path} is shorter than its capacity")
+    return _unwrap(memoryview(data), capacity, written)
+
+
+def _unwrap(data: memoryview, capacity: int, written: int) -> bytes:
+    if written <= capacity:
+        return bytes(data[:written])
+    start = written % capacity
+    return bytes(data[start:capacity]) + bytes(data[:start])
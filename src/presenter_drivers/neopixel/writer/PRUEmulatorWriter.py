@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import errno
+import os
+from logging import Logger
+from math import floor
+from time import perf_counter
+from types import TracebackType
+from typing import Callable, Optional, Sequence, Tuple, Type, Union
+
+from typing_extensions import TypedDict
+
+from ...logger.logger import create_logger
+from ...stats.stats import AsTableStr
+from ..protocol import (
+    MAX_WRITE_BYTES,
+    OP_CLEAR,
+    OP_DRAW,
+    OP_RUN,
+    OP_SET,
+    OPCODE,
+    RUN,
+    SET,
+    WS2812_PIXEL_SECONDS,
+    WS2812_RESET_SECONDS,
+)
+from .Writer import Writer
+
+DEFAULT_LOGGER = create_logger("PRU_EMULATOR")
+DEFAULT_LED_COUNT = 42
+SEGMENT_COUNT = 4
+
+
+class PRUEmulatorWriter(Writer):
+    """
+    Stand-in for the PRU NeoPixel firmware. Parses the text and binary command protocols, keeps LED state and models
+    WS2812 timing. A draw that arrives while the previous frame is still being shifted out is dropped, and with a target
+    frame rate set, a draw that misses its frame slot by more than half a period counts as late.
+
+    Segment 0 fills the whole strip and segments 1-3 fill a third each. Destinations are applied at the next draw, the
+    firmware fade is not modelled. Like the rpmsg device, a write over MAX_WRITE_BYTES is refused with EINVAL.
+    """
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        ledCount: int
+        pixelSeconds: float
+        resetSeconds: float
+        targetFps: float
+        clock: Callable[[], float]
+
+    class _Stats(AsTableStr):
+        def __init__(self, frame_seconds: float) -> None:
+            self._frame_seconds = frame_seconds
+            self._commands: int = 0
+            self._errors: int = 0
+            self._frames: int = 0
+            self._dropped: int = 0
+            self._late: int = 0
+            self._first_frame: Optional[float] = None
+            self._last_frame: Optional[float] = None
+
+        def get_headers(self) -> Sequence[str]:
+            return [
+                "Commands",
+                "Errors",
+                "Frames",
+                "Dropped",
+                "Late",
+                "FPS",
+                "Max FPS",
+            ]
+
+        def get_row(self) -> Sequence[str]:
+            return [
+                str(self._commands),
+                str(self._errors),
+                str(self._frames),
+                str(self._dropped),
+                str(self._late),
+                f"{self.fps:.1f}",
+                f"{self.max_fps:.1f}",
+            ]
+
+        @property
+        def commands(self) -> int:
+            return self._commands
+
+        @property
+        def errors(self) -> int:
+            return self._errors
+
+        @property
+        def frames(self) -> int:
+            return self._frames
+
+        @property
+        def dropped(self) -> int:
+            return self._dropped
+
+        @property
+        def late(self) -> int:
+            return self._late
+
+        @property
+        def fps(self) -> float:
+            """
+            Rate of frames actually shown between the first and the last one.
+            """
+            if self._first_frame is None or self._last_frame is None:
+                return 0.0
+            elapsed = self._last_frame - self._first_frame
+            return (self._frames - 1) / elapsed if elapsed > 0 else 0.0
+
+        @property
+        def max_fps(self) -> float:
+            return 1 / self._frame_seconds
+
+        def inc_commands(self) -> PRUEmulatorWriter._Stats:
+            self._commands += 1
+            return self
+
+        def inc_errors(self) -> PRUEmulatorWriter._Stats:
+            self._errors += 1
+            return self
+
+        def inc_frames(self, now: float) -> PRUEmulatorWriter._Stats:
+            self._frames += 1
+            if self._first_frame is None:
+                self._first_frame = now
+            self._last_frame = now
+            return self
+
+        def inc_dropped(self) -> PRUEmulatorWriter._Stats:
+            self._dropped += 1
+            return self
+
+        def inc_late(self) -> PRUEmulatorWriter._Stats:
+            self._late += 1
+            return self
+
+    def __init__(
+        self, config: Union[PRUEmulatorWriter.Config, str, None] = None
+    ) -> None:
+        super().__init__(None)
+        # The demos construct writers from a file name, which means nothing here.
+        if config is None or isinstance(config, str):
+            config = {}
+        self._log: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._led_count: int = int(config.get("ledCount", DEFAULT_LED_COUNT))
+        self._clock: Callable[[], float] = config.get("clock", perf_counter)
+        target_fps = config.get("targetFps")
+        # Half a period of slack so scheduling jitter alone doesn't make frames late.
+        self._late_seconds: Optional[float] = 1.5 / target_fps if target_fps else None
+        self._frame_seconds: float = self._led_count * config.get(
+            "pixelSeconds", WS2812_PIXEL_SECONDS
+        ) + config.get("resetSeconds", WS2812_RESET_SECONDS)
+
+        self._pixels: bytearray = bytearray(3 * self._led_count)
+        self._destination: bytearray = bytearray(3 * self._led_count)
+        self._destination_set: bytearray = bytearray(self._led_count)
+        self._leds: bytearray = bytearray(3 * self._led_count)
+        self._pending: bytearray = bytearray()
+        self._busy_until: float = 0.0
+        self._last_frame: Optional[float] = None
+        self._stats = PRUEmulatorWriter._Stats(self._frame_seconds)
+
+    @property
+    def stats(self) -> PRUEmulatorWriter._Stats:
+        return self._stats
+
+    @property
+    def frame_seconds(self) -> float:
+        """
+        Time to shift one frame out to the strip, reset included.
+        """
+        return self._frame_seconds
+
+    @property
+    def leds(self) -> bytes:
+        """
+        What the strip shows, r g b per LED.
+        """
+        return bytes(self._leds)
+
+    def led(self, index: int) -> Tuple[int, int, int]:
+        r, g, b = self._leds[3 * index : 3 * index + 3]
+        return (r, g, b)
+
+    def write(self, b: bytearray) -> None:
+        if len(b) > MAX_WRITE_BYTES:
+            self._stats.inc_errors()
+            self._log.warning(
+                "Write of %s bytes is over the %s byte limit", len(b), MAX_WRITE_BYTES
+            )
+            raise OSError(errno.EINVAL, os.strerror(errno.EINVAL))
+        self._pending += b
+        pending = self._pending
+        pos = 0
+        while pos < len(pending):
+            if pending[pos] & 0x80:
+                used = self._binary(pending, pos)
+            else:
+                used = self._text(pending, pos)
+            if not used:
+                break
+            pos += used
+        del pending[:pos]
+
+    def _text(self, pending: bytearray, pos: int) -> int:
+        end = pending.find(b"\n", pos)
+        if end < 0:
+            return 0
+        try:
+            index, r, g, b = (float(v) for v in pending[pos:end].split())
+            self._command(int(index), floor(r), floor(g), floor(b))
+        except ValueError:
+            self._stats.inc_errors()
+            self._log.warning("Bad command %r", bytes(pending[pos:end]))
+        return end + 1 - pos
+
+    def _binary(self, pending: bytearray, pos: int) -> int:
+        available = len(pending) - pos
+        opcode = pending[pos]
+        if opcode in (OP_DRAW, OP_CLEAR):
+            self._command(-1 if opcode == OP_DRAW else -2, 0, 0, 0)
+            return OPCODE.size
+        if opcode == OP_SET:
+            if available < SET.size:
+                return 0
+            _, index, g, r, b = SET.unpack_from(pending, pos)
+            self._command(index, r, g, b)
+            return SET.size
+        if opcode == OP_RUN:
+            if available < RUN.size:
+                return 0
+            _, start, count = RUN.unpack_from(pending, pos)
+            size: int = RUN.size + 3 * count
+            if available < size:
+                return 0
+            grb = pending[pos + RUN.size : pos + size]
+            for i in range(count):
+                g, r, b = grb[3 * i : 3 * i + 3]
+                self._command(start + i, r, g, b)
+            return size
+
+        # Nothing to resynchronise on, drop the byte and carry on.
+        self._stats.inc_errors()
+        self._log.warning("Bad opcode %#x", opcode)
+        return OPCODE.size
+
+    def _command(self, index: int, r: int, g: int, b: int) -> None:
+        self._stats.inc_commands()
+        if index == -1:
+            self._draw()
+        elif index == -2:
+            self._clear()
+        elif 0 <= index < self._led_count:
+            self._pixels[3 * index : 3 * index + 3] = PRUEmulatorWriter._rgb(r, g, b)
+        elif self._led_count <= index < 2 * self._led_count:
+            i = index - self._led_count
+            self._destination[3 * i : 3 * i + 3] = PRUEmulatorWriter._rgb(r, g, b)
+            self._destination_set[i] = 1
+        elif 2 * self._led_count <= index < 2 * self._led_count + SEGMENT_COUNT:
+            self._segment(index - 2 * self._led_count, r, g, b)
+        else:
+            self._stats.inc_errors()
+            self._log.warning("Index %s out of range", index)
+
+    def _segment(self, segment: int, r: int, g: int, b: int) -> None:
+        if segment == 0:
+            start, end = 0, self._led_count
+        else:
+            size = self._led_count // (SEGMENT_COUNT - 1)
+            start = (segment - 1) * size
+            end = self._led_count if segment == SEGMENT_COUNT - 1 else start + size
+        self._pixels[3 * start : 3 * end] = PRUEmulatorWriter._rgb(r, g, b) * (
+            end - start
+        )
+
+    def _draw(self) -> None:
+        now = self._clock()
+        if now < self._busy_until:
+            self._stats.inc_dropped()
+            return
+        if (
+            self._late_seconds is not None
+            and self._last_frame is not None
+            and now - self._last_frame > self._late_seconds
+        ):
+            self._stats.inc_late()
+
+        for i in range(self._led_count):
+            if self._destination_set[i]:
+                self._pixels[3 * i : 3 * i + 3] = self._destination[3 * i : 3 * i + 3]
+        self._destination_set[:] = bytes(self._led_count)
+        self._leds[:] = self._pixels
+        self._busy_until = now + self._frame_seconds
+        self._last_frame = now
+        self._stats.inc_frames(now)
+
+    def _clear(self) -> None:
+        self._pixels[:] = bytes(len(self._pixels))
+        self._destination_set[:] = bytes(self._led_count)
+        self._leds[:] = self._pixels
+
+    @staticmethod
+    def _rgb(r: int, g: int, b: int) -> bytes:
+        return bytes(min(255, max(0, c)) for c in (r, g, b))
+
+    def __enter__(self) -> Writer:
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception_value: Optional[BaseException],
+        exception_traceback: Optional[TracebackType],
+    ) -> None:
+        pass
@@ -1,15 +1,26 @@
 from __future__ import annotations
 
-from sys import stdout
+import sys
 from types import TracebackType
-from typing import Optional, Type
+from typing import Optional, Sequence, Type
 
-from .Writer import Writer
+from .Writer import Buffer, Writer
 
 
 class STDOutWriter(Writer):
     def write(self, b: bytearray) -> None:
-        stdout.write(b.decode())
+        self.write_many((b,))
+
+    def write_many(self, buffers: Sequence[Buffer]) -> None:
+        # Binary protocol commands aren't text, write the bytes as they are.
+        out = getattr(sys.stdout, "buffer", None)
+        if out is None:
+            sys.stdout.write("".join(bytes(b).decode("latin-1") for b in buffers))
+            return
+        # Keep anything printed before in order with the commands.
+        sys.stdout.flush()
+        out.writelines(buffers)
+        out.flush()
 
     def __enter__(self) -> Writer:
         return self
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from logging import Logger
+from select import select
+from threading import Condition, Thread
+from types import TracebackType
+from typing import Callable, Deque, Optional, Sequence, Type
+
+from typing_extensions import TypedDict
+
+from ...logger.logger import create_logger
+from ...stats.stats import AsTableStr
+from ..protocol import ENCODERS, TEXT, CommandEncoder, chunk_commands, coalesce
+from .Writer import Writer
+
+DEFAULT_LOGGER = create_logger("THREADED_WRITER")
+
+
+class ThreadedWriterException(Exception):
+    pass
+
+
+class ThreadedWriterRunning(ThreadedWriterException):
+    pass
+
+
+class ThreadedWriter(Writer):
+    """
+    Hands writes to a background thread through a bounded queue so callers never block on the device.
+
+    NeoPixelPRU only sends what changed, so a pending write can't just be replaced by a newer one. When the queue is full
+    the oldest pending write is coalesced into the next one: only the last command per firmware entry is kept and the
+    draws in between are dropped, so the device skips to the latest frame without losing a change. Writes are parsed with
+    the `protocol` the NeoPixelPRU encodes with, and go to the device in writes of at most MAX_WRITE_BYTES.
+
+    A write that fails, or can't be coalesced, is dropped. `onDrop`, usually `NeoPixelPRU.invalidate`, is then called
+    from the producer's next `write()`, never from the writer thread.
+
+    Writes go to `writer`, or with `path` straight to a file opened O_NONBLOCK. A full device then doesn't stall the
+    thread either: on EAGAIN it waits for the device with select, and coalesces a write that hasn't started into a newer
+    one that is queued. Until `start()` or `__enter__`, writes go straight through.
+    """
+
+    DEFAULT_QUEUE_SIZE: int = 2
+    DEFAULT_RETRY_SECONDS: float = 0.01
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        writer: Writer
+        path: str
+        queueSize: int
+        onDrop: Callable[[], object]
+        retrySeconds: float
+        protocol: str
+
+    class _Stats(AsTableStr):
+        def __init__(self) -> None:
+            self._writes: int = 0
+            self._merged: int = 0
+            self._dropped: int = 0
+            self._eagain: int = 0
+            self._max_depth: int = 0
+
+        def get_headers(self) -> Sequence[str]:
+            return ["Writes", "Merged", "Dropped", "EAGAIN", "Max depth"]
+
+        def get_row(self) -> Sequence[str]:
+            return [
+                str(self._writes),
+                str(self._merged),
+                str(self._dropped),
+                str(self._eagain),
+                str(self._max_depth),
+            ]
+
+        @property
+        def writes(self) -> int:
+            return self._writes
+
+        @property
+        def merged(self) -> int:
+            return self._merged
+
+        @property
+        def dropped(self) -> int:
+            return self._dropped
+
+        @property
+        def eagain(self) -> int:
+            return self._eagain
+
+        @property
+        def max_depth(self) -> int:
+            return self._max_depth
+
+        def inc_writes(self) -> ThreadedWriter._Stats:
+            self._writes += 1
+            return self
+
+        def inc_merged(self) -> ThreadedWriter._Stats:
+            self._merged += 1
+            return self
+
+        def inc_dropped(self) -> ThreadedWriter._Stats:
+            self._dropped += 1
+            return self
+
+        def inc_eagain(self) -> ThreadedWriter._Stats:
+            self._eagain += 1
+            return self
+
+        def record_depth(self, depth: int) -> ThreadedWriter._Stats:
+            self._max_depth = max(self._max_depth, depth)
+            return self
+
+    def __init__(self, config: ThreadedWriter.Config):
+        super().__init__(None)
+        self._log: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._writer: Optional[Writer] = config.get("writer")
+        self._path: Optional[str] = config.get("path")
+        if (self._writer is None) == (self._path is None):
+            raise ValueError("Exactly one of writer and path is needed")
+        self._queue_size: int = max(
+            1, config.get("queueSize", ThreadedWriter.DEFAULT_QUEUE_SIZE)
+        )
+        self._on_drop: Optional[Callable[[], object]] = config.get("onDrop")
+        self._retry_seconds: float = config.get(
+            "retrySeconds", ThreadedWriter.DEFAULT_RETRY_SECONDS
+        )
+        protocol = config.get("protocol", TEXT)
+        if protocol not in ENCODERS:
+            raise ValueError(f"Unknown protocol {protocol}")
+        self._encoder: CommandEncoder = ENCODERS[protocol]()
+
+        self._fd: Optional[int] = None
+        if self._path is not None:
+            self._fd = os.open(self._path, os.O_WRONLY | os.O_APPEND | os.O_NONBLOCK)
+
+        self._queue: Deque[bytes] = deque()
+        self._condition: Condition = Condition()
+        self._busy: bool = False
+        # Set under the condition when a write was dropped, onDrop runs on the producer's thread.
+        self._drop_pending: bool = False
+        self._running: bool = False
+        self._thread: Optional[Thread] = None
+        self._stats = ThreadedWriter._Stats()
+
+    @property
+    def stats(self) -> ThreadedWriter._Stats:
+        return self._stats
+
+    def depth(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def write(self, b: bytearray) -> None:
+        if not self._running:
+            self._send(bytes(b))
+            return
+
+        frame = bytes(b)
+        with self._condition:
+            if len(self._queue) >= self._queue_size:
+                oldest = self._queue.popleft()
+                if self._queue:
+                    self._queue[0] = self._coalesce(oldest, self._queue[0])
+                else:
+                    frame = self._coalesce(oldest, frame)
+            self._queue.append(frame)
+            self._stats.record_depth(len(self._queue))
+            self._condition.notify_all()
+            dropped, self._drop_pending = self._drop_pending, False
+        if dropped and self._on_drop is not None:
+            self._on_drop()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for every queued write to reach the device, False if `timeout` ran out first.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not (self._queue or self._busy), timeout
+            )
+
+    def start(self) -> ThreadedWriter:
+        if self._running:
+            raise ThreadedWriterRunning()
+
+        self._running = True
+        self._thread = Thread(target=self._thread_function, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> ThreadedWriter:
+        """
+        Stop the thread once the queue has drained.
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def close(self) -> None:
+        self.stop()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _thread_function(self) -> None:
+        self._log.info("Threaded writer started")
+
+        while True:
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+                self._condition.wait_for(lambda: self._queue or not self._running)
+                if not self._queue:
+                    break
+                frame = self._queue.popleft()
+                self._busy = True
+            try:
+                self._send(frame)
+            except (OSError, ValueError) as e:
+                self._log.error("Write failed: %s", e)
+                with self._condition:
+                    self._drop()
+
+        self._log.info("Threaded writer stopped")
+
+    def _send(self, frame: bytes) -> None:
+        if self._writer is not None:
+            self._writer.write_many(chunk_commands(self._encoder, frame))
+        elif not self._write_nonblocking(frame):
+            return
+        self._stats.inc_writes()
+
+    def _write_nonblocking(self, frame: bytes) -> bool:
+        assert self._fd is not None
+        sent = 0
+        for chunk in chunk_commands(self._encoder, frame):
+            view = memoryview(chunk)
+            while view:
+                try:
+                    n = os.write(self._fd, view)
+                except BlockingIOError:
+                    self._stats.inc_eagain()
+                    if not sent and self._coalesce_into_queued(frame):
+                        return False
+                    if not self._running and self._thread is not None:
+                        self._log.warning(
+                            "Stopped with %s bytes the device would not take",
+                            len(frame) - sent,
+                        )
+                        return False
+                    select([], [self._fd], [], self._retry_seconds)
+                    continue
+                view = view[n:]
+                sent += n
+        return True
+
+    def _coalesce_into_queued(self, frame: bytes) -> bool:
+        """
+        Hand an unstarted write to the next queued one, False when nothing is queued.
+        """
+        with self._condition:
+            if not self._queue:
+                return False
+            self._queue[0] = self._coalesce(frame, self._queue[0])
+            return True
+
+    def _coalesce(self, older: bytes, newer: bytes) -> bytes:
+        """
+        One write with the latest state of both, or only the newer one when they don't parse. Called holding the condition.
+        """
+        try:
+            merged = coalesce(self._encoder, (older, newer))
+        except ValueError as e:
+            self._log.warning("Dropped a write that could not be coalesced: %s", e)
+            self._drop()
+            return newer
+        self._stats.inc_merged()
+        return merged
+
+    def _drop(self) -> None:
+        """
+        Count a lost write and have the producer call onDrop. Called holding the condition.
+        """
+        self._stats.inc_dropped()
+        self._drop_pending = True
+
+    def __enter__(self) -> Writer:
+        if not self._running:
+            self.start()
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception_value: Optional[BaseException],
+        exception_traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+        if self._writer is not None:
+            self._writer.__exit__(exception_type, exception_value, exception_traceback)
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from types import TracebackType
-from typing import Any, Optional, Type
+from typing import Any, Optional, Sequence, Type, Union
+
+Buffer = Union[bytes, bytearray, memoryview]
 
 
 class Writer(ABC):
@@ -15,6 +17,13 @@ class Writer(ABC):
         Abstract write method, write color data to chosen location.
         """
 
+    def write_many(self, buffers: Sequence[Buffer]) -> None:
+        """
+        Write several buffers in order. Writers that can should do it in one call.
+        """
+        for b in buffers:
+            self.write(bytearray(b))
+
     @abstractmethod
     def __enter__(self) -> Writer:
         pass
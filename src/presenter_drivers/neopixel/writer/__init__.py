@@ -1,13 +1,19 @@
 from typing import Tuple
 
 from .FileWriter import FileWriter
+from .MmapRingWriter import MmapRingWriter
 from .PRUDeviceWriter import PRUDeviceWriter
+from .PRUEmulatorWriter import PRUEmulatorWriter
 from .STDOutWriter import STDOutWriter
+from .ThreadedWriter import ThreadedWriter
 from .Writer import Writer
 
 __all__: Tuple[str, ...] = (
     "FileWriter",
+    "MmapRingWriter",
     "PRUDeviceWriter",
+    "PRUEmulatorWriter",
     "STDOutWriter",
+    "ThreadedWriter",
     "Writer",
 )
@@ -2,15 +2,14 @@ from __future__ import annotations
 
 from enum import Enum, unique
 from logging import Logger
-from typing import Dict
+from typing import Dict, Optional, Sequence, Tuple
 
-import adafruit_ads1x15.ads1015 as ADS
-import board
-import busio
-from adafruit_ads1x15.analog_in import AnalogIn
-from typing_extensions import TypedDict
+from typing_extensions import Protocol, TypedDict
 
+from ..environment import ENV
 from ..logger.logger import create_logger
+from .cache import CachedCalibration, CalibrationCache, new_calibration
+from .hardware_sim.cckir import SimulationConfig, simulated_sensors
 
 DEFAULT_I2C_ADDR = 0x48  # For the ADS11x5
 A0_L_ADDR = DEFAULT_I2C_ADDR
@@ -24,6 +23,16 @@ USEABLE_CHANNELS = MAX_CHANNELS - 2  # We only have six sensors
 DEFAULT_LOGGER = create_logger("CCKIR")
 
 
+class AnalogInput(Protocol):
+    """
+    What CCKIR needs from an ADC channel, an adafruit_ads1x15 AnalogIn or a stand in.
+    """
+
+    @property
+    def value(self) -> int:
+        ...
+
+
 class CCKIR:
     @unique
     class Sensor(Enum):
@@ -37,19 +46,61 @@ class CCKIR:
 
     SensorPair = Dict[Sensor, int]
 
+    DEFAULT_VALIDATION_READINGS: int = 5
+    DEFAULT_VALIDATION_TOLERANCE: float = 0.25
+
     class Config(TypedDict, total=False):
         logger: Logger
+        board1Address: int
+        board2Address: int
+        calibrationCache: CalibrationCache.Config
+        validationReadings: int
+        validationTolerance: float
+        simulation: SimulationConfig
 
     def __init__(self, config: CCKIR.Config):
         self._logger: Logger = config.get("logger", DEFAULT_LOGGER)
-        self._sensors: list[AnalogIn] = []
-
-        self._setup()
+        self._addresses: Tuple[int, int] = (
+            config.get("board1Address", BOARD_1_ADDR),
+            config.get("board2Address", BOARD_2_ADDR),
+        )
+        self._sensors: list[AnalogInput] = []
+        self._cache: Optional[CalibrationCache] = None
+        self._calibration: Optional[CachedCalibration] = None
+
+        self._setup(config.get("simulation"))
+
+        if "calibrationCache" in config:
+            cache_config: CalibrationCache.Config = {"logger": self._logger}
+            cache_config.update(config["calibrationCache"])
+            self._cache = CalibrationCache(cache_config)
+            self._calibration = self._load_calibration(
+                config.get("validationReadings", CCKIR.DEFAULT_VALIDATION_READINGS),
+                config.get("validationTolerance", CCKIR.DEFAULT_VALIDATION_TOLERANCE),
+            )
+
+    def _setup(self, simulation: Optional[SimulationConfig] = None) -> None:
+        if simulation is not None:
+            self._sensors = list(simulated_sensors(simulation, self._addresses))
+            return
+
+        # Imported here so nothing touches I2C until the sensors are wanted, and boxes without it can still use a simulation.
+        try:
+            # pylint: disable=import-outside-toplevel
+            import adafruit_ads1x15.ads1015 as ADS
+            import board
+            import busio
+            from adafruit_ads1x15.analog_in import AnalogIn
+        except (ImportError, NotImplementedError, RuntimeError):
+            if ENV == "prod":
+                raise
+            self._logger.warning("No I2C hardware, simulating the IR sensors")
+            self._sensors = list(simulated_sensors({}, self._addresses))
+            return
 
-    def _setup(self) -> None:
         i2c = busio.I2C(board.SCL, board.SDA)
-        ads1 = ADS.ADS1015(i2c, address=BOARD_1_ADDR)
-        ads2 = ADS.ADS1015(i2c, address=BOARD_2_ADDR)
+        ads1 = ADS.ADS1015(i2c, address=self._addresses[0])
+        ads2 = ADS.ADS1015(i2c, address=self._addresses[1])
         self._sensors = [
             # left side
             # front_left
@@ -67,15 +118,63 @@ class CCKIR:
             AnalogIn(ads2, ADS.P2),
         ]
 
-    def get_sensors(self) -> list[AnalogIn]:
+    def _load_calibration(
+        self, readings: int, tolerance: float
+    ) -> Optional[CachedCalibration]:
+        if self._cache is None:
+            return None
+
+        calibration = self._cache.load(self._addresses)
+        if calibration is None:
+            self._logger.info("No cached IR calibration, calibration required")
+            return None
+        if len(calibration.ranges) != len(self._sensors):
+            self._logger.warning(
+                "Cached IR calibration is for a different sensor count"
+            )
+            return None
+        # Quick sanity pass. Sensors that were moved, fouled or replaced will read outside the cached ranges.
+        if not calibration.agrees_with(
+            [self.read_all() for _ in range(readings)], tolerance
+        ):
+            self._logger.warning("Live IR readings disagree with cached calibration")
+            return None
+
+        self._logger.info("Using cached IR calibration from %s", self._cache.path)
+        return calibration
+
+    def get_addresses(self) -> Tuple[int, int]:
+        return self._addresses
+
+    def get_calibration(self) -> Optional[CachedCalibration]:
+        """
+        The calibration loaded from the cache at construction, or the last one set. None means the sensors need calibrating.
+        """
+        return self._calibration
+
+    def set_calibration(
+        self, ranges: Sequence[Tuple[int, int]], thresholds: Sequence[float]
+    ) -> CachedCalibration:
+        self._calibration = new_calibration(ranges, thresholds)
+        if self._cache is not None:
+            self._cache.save(self._addresses, self._calibration)
+        return self._calibration
+
+    def get_sensors(self) -> list[AnalogInput]:
         return self._sensors
 
-    def get_sensor(self, index: CCKIR.Sensor) -> AnalogIn:
+    def get_sensor(self, index: CCKIR.Sensor) -> AnalogInput:
         return self._sensors[index.value]
 
     def read_sensor(self, index: CCKIR.Sensor) -> int:
         return self._sensors[index.value].value
 
+    def read_all(self) -> Tuple[int, ...]:
+        """
+        Read every sensor once, in `CCKIR.Sensor` order.
+        """
+        return tuple(s.value for s in self._sensors)
+
     def read_front(self) -> CCKIR.SensorPair:
         return {
             CCKIR.Sensor.LEFT_FRONT: self._sensors[CCKIR.Sensor.LEFT_FRONT.value].value,
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import json
+import os
+from contextlib import suppress
+from dataclasses import dataclass
+from logging import Logger
+from platform import node
+from tempfile import NamedTemporaryFile
+from time import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from typing_extensions import TypedDict
+
+from ..logger.logger import create_logger
+
+DEFAULT_LOGGER = create_logger("IRCalibrationCache")
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_PATH = "~/.cache/presenter_drivers/ir_calibration.json"
+BOARD_ID_FILES = (
+    "/proc/device-tree/serial-number",
+    "/sys/firmware/devicetree/base/serial-number",
+    "/etc/machine-id",
+)
+
+
+def board_identity() -> str:
+    """
+    Something that identifies the board the sensors are attached to. The BeagleBone exposes its serial number through the device tree.
+    """
+    for path in BOARD_ID_FILES:
+        try:
+            with open(path, "rb") as f:
+                ident = f.read().strip(b"\x00\n ").decode("ascii", "replace")
+        except OSError:
+            continue
+        if ident:
+            return ident
+    return node()
+
+
+@dataclass(frozen=True)
+class CachedCalibration:
+    ranges: Tuple[Tuple[int, int], ...]
+    thresholds: Tuple[float, ...]
+    created: float = 0.0
+    # Fraction of each range the off threshold sits below the on threshold, None leaves it to the detector.
+    hysteresis: Optional[float] = None
+
+    def agrees_with(self, readings: Sequence[Sequence[int]], tolerance: float) -> bool:
+        """
+        True when every reading falls inside the calibrated (low, high) range of its channel, widened by `tolerance` of the range.
+        """
+        for channel, (low, high) in enumerate(self.ranges):
+            slack = (high - low) * tolerance
+            for values in readings:
+                if not low - slack <= values[channel] <= high + slack:
+                    return False
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        d: Dict[str, Any] = {
+            "ranges": [list(r) for r in self.ranges],
+            "thresholds": list(self.thresholds),
+            "created": self.created,
+        }
+        if self.hysteresis is not None:
+            d["hysteresis"] = self.hysteresis
+        return d
+
+    @staticmethod
+    def from_dict(d: Dict[str, Any]) -> CachedCalibration:
+        return CachedCalibration(
+            ranges=tuple((int(r[0]), int(r[1])) for r in d["ranges"]),
+            thresholds=tuple(float(t) for t in d["thresholds"]),
+            created=float(d.get("created", 0.0)),
+            hysteresis=float(d["hysteresis"]) if "hysteresis" in d else None,
+        )
+
+
+class CalibrationCache:
+    """
+    Versioned JSON file of IR calibrations keyed by board identity and ADC I2C addresses.
+    A file written by a different CACHE_VERSION is ignored, not migrated.
+    """
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        path: str
+        boardId: str
+
+    def __init__(self, config: CalibrationCache.Config):
+        self._logger: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._path: str = os.path.expanduser(config.get("path", DEFAULT_CACHE_PATH))
+        self._board_id: str = config.get("boardId", "") or board_identity()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def key(self, addresses: Sequence[int]) -> str:
+        return ":".join([self._board_id] + [f"0x{a:02X}" for a in addresses])
+
+    def load(self, addresses: Sequence[int]) -> Optional[CachedCalibration]:
+        entry = self._read_entries().get(self.key(addresses))
+        if entry is None:
+            return None
+
+        try:
+            return CachedCalibration.from_dict(entry)
+        except (KeyError, TypeError, ValueError, IndexError):
+            self._logger.warning("Ignoring malformed calibration cache entry")
+            return None
+
+    def save(
+        self, addresses: Sequence[int], calibration: CachedCalibration
+    ) -> CalibrationCache:
+        entries = self._read_entries()
+        entries[self.key(addresses)] = calibration.to_dict()
+        self._write_entries(entries)
+        return self
+
+    def invalidate(self, addresses: Sequence[int]) -> CalibrationCache:
+        entries = self._read_entries()
+        if entries.pop(self.key(addresses), None) is not None:
+            self._write_entries(entries)
+        return self
+
+    def _read_entries(self) -> Dict[str, Any]:
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            self._logger.warning("Unable to read calibration cache %s", self._path)
+            return {}
+
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            self._logger.info("Calibration cache version mismatch, ignoring it")
+            return {}
+        entries = data.get("entries", {})
+        return entries if isinstance(entries, dict) else {}
+
+    def _write_entries(self, entries: Dict[str, Any]) -> None:
+        """
+        A cache that can't be written is only logged, the calibration stays usable in memory.
+        """
+        directory = os.path.dirname(self._path) or "."
+        partial: Optional[str] = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Write, sync then rename so a power cut never leaves a half written or empty cache behind.
+            with NamedTemporaryFile(
+                "w", encoding="utf-8", dir=directory, delete=False, suffix=".tmp"
+            ) as f:
+                partial = f.name
+                json.dump({"version": CACHE_VERSION, "entries": entries}, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(partial, self._path)
+        except OSError as e:
+            self._logger.warning(
+                "Unable to write calibration cache %s: %s", self._path, e
+            )
+            if partial is not None:
+                with suppress(OSError):
+                    os.unlink(partial)
+
+
+def new_calibration(
+    ranges: Sequence[Tuple[int, int]],
+    thresholds: Sequence[float],
+    hysteresis: Optional[float] = None,
+) -> CachedCalibration:
+    return CachedCalibration(tuple(ranges), tuple(thresholds), time(), hysteresis)
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import Enum, unique
+from logging import Logger
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from typing_extensions import TypedDict
+
+from ..logger.logger import create_logger
+from .cache import CachedCalibration
+from .CCKIR import CCKIR
+
+DEFAULT_LOGGER = create_logger("IRPresence")
+
+
+@unique
+class Pair(Enum):
+    FRONT = 0
+    MIDDLE = 1
+    REAR = 2
+
+
+PAIRS: Dict[Pair, Tuple[CCKIR.Sensor, CCKIR.Sensor]] = {
+    Pair.FRONT: (CCKIR.Sensor.LEFT_FRONT, CCKIR.Sensor.RIGHT_FRONT),
+    Pair.MIDDLE: (CCKIR.Sensor.LEFT_MIDDLE, CCKIR.Sensor.RIGHT_MIDDLE),
+    Pair.REAR: (CCKIR.Sensor.LEFT_REAR, CCKIR.Sensor.RIGHT_REAR),
+}
+
+
+@dataclass(frozen=True)
+class PresenceEvent:
+    """
+    A change of state. Exactly one of `sensor` or `pair` is set.
+    """
+
+    present: bool
+    timestamp_ns: int
+    sensor: Optional[CCKIR.Sensor] = None
+    pair: Optional[Pair] = None
+
+
+PresenceListener = Callable[[PresenceEvent], None]
+
+
+class PresenceDetector:
+    """
+    Paper presence with per channel hysteresis. A sensor turns on above its on threshold and only turns off again below its off threshold.
+    Channel state is held as a bit mask so a whole frame is compared in one step, events are only built for the bits that changed.
+    A pair is present while both of its sensors are.
+    """
+
+    DEFAULT_HYSTERESIS: float = 0.05
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        calibration: CachedCalibration
+        hysteresis: float
+        onThresholds: Sequence[float]
+        offThresholds: Sequence[float]
+
+    def __init__(self, config: PresenceDetector.Config):
+        self._logger: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._hysteresis: float = config.get(
+            "hysteresis", PresenceDetector.DEFAULT_HYSTERESIS
+        )
+        # On and off thresholds, published together as one reference.
+        self._thresholds: Tuple[Tuple[float, ...], Tuple[float, ...]] = ((), ())
+        self._state: int = 0
+        self._pair_state: int = 0
+        self._pair_masks: Tuple[Tuple[Pair, int], ...] = tuple(
+            (pair, (1 << left.value) | (1 << right.value))
+            for pair, (left, right) in PAIRS.items()
+        )
+        self._listeners: List[PresenceListener] = []
+
+        if "calibration" in config:
+            self.set_calibration(config["calibration"])
+        else:
+            on = config.get("onThresholds", ())
+            self.set_thresholds(on, config.get("offThresholds", on))
+
+    def set_calibration(self, calibration: CachedCalibration) -> PresenceDetector:
+        """
+        Use a calibration's thresholds. The off threshold sits `hysteresis` of the calibrated range below the on threshold,
+        the calibration's own hysteresis wins when it has one. Safe to pass as a DriftTracker `onUpdate` callback.
+        """
+        hysteresis = (
+            calibration.hysteresis
+            if calibration.hysteresis is not None
+            else self._hysteresis
+        )
+        return self.set_thresholds(
+            calibration.thresholds,
+            [
+                on - (high - low) * hysteresis
+                for on, (low, high) in zip(calibration.thresholds, calibration.ranges)
+            ],
+        )
+
+    def set_thresholds(
+        self, on: Sequence[float], off: Sequence[float]
+    ) -> PresenceDetector:
+        if len(on) != len(off):
+            raise ValueError("on and off thresholds must be the same length")
+        if any(o > n for n, o in zip(on, off)):
+            raise ValueError("off thresholds must not be above on thresholds")
+
+        # One store, so a frame is never compared against a mix of old and new thresholds.
+        self._thresholds = (tuple(on), tuple(off))
+        return self
+
+    def add_listener(self, listener: PresenceListener) -> PresenceDetector:
+        self._listeners.append(listener)
+        return self
+
+    def remove_listener(self, listener: PresenceListener) -> PresenceDetector:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+        return self
+
+    def is_present(self, sensor: CCKIR.Sensor) -> bool:
+        return bool(self._state & (1 << sensor.value))
+
+    def is_pair_present(self, pair: Pair) -> bool:
+        return bool(self._pair_state & (1 << pair.value))
+
+    def state(self) -> int:
+        """
+        Bit n is set while sensor n is covered.
+        """
+        return self._state
+
+    def reset(self) -> PresenceDetector:
+        self._state = 0
+        self._pair_state = 0
+        return self
+
+    def update(
+        self, values: Sequence[int], timestamp_ns: int = 0
+    ) -> List[PresenceEvent]:
+        on, off = self._thresholds
+        if not on:
+            # Nothing to compare against until calibration publishes thresholds.
+            return []
+        above = 0
+        below = 0
+        for c, (v, on_c, off_c) in enumerate(zip(values, on, off)):
+            if v > on_c:
+                above |= 1 << c
+            elif v < off_c:
+                below |= 1 << c
+
+        state = (self._state | above) & ~below
+        changed = state ^ self._state
+        if not changed:
+            return []
+        self._state = state
+
+        events = [
+            PresenceEvent(bool(state & (1 << s.value)), timestamp_ns, sensor=s)
+            for s in CCKIR.Sensor
+            if changed & (1 << s.value)
+        ]
+
+        pair_state = 0
+        for pair, mask in self._pair_masks:
+            if state & mask == mask:
+                pair_state |= 1 << pair.value
+        pair_changed = pair_state ^ self._pair_state
+        self._pair_state = pair_state
+        events.extend(
+            PresenceEvent(bool(pair_state & (1 << p.value)), timestamp_ns, pair=p)
+            for p in Pair
+            if pair_changed & (1 << p.value)
+        )
+
+        for event in events:
+            for listener in self._listeners:
+                listener(event)
+        return events
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+from array import array
+from logging import Logger
+from math import exp
+from threading import Thread
+from time import sleep
+from typing import Callable, Optional, Sequence, Tuple
+
+from typing_extensions import TypedDict
+
+from ..logger.logger import create_logger
+from ..stats.stats import AsTableStr
+from .cache import CachedCalibration, new_calibration
+from .sampler import NANOSECONDS_IN_SECOND, Frame, IRFrameBuffer, SamplerRunning
+
+DEFAULT_LOGGER = create_logger("IRDrift")
+
+
+class DriftTracker:
+    """
+    Keeps an IR calibration current while the unit is in service.
+    Frames are read from an IRSampler's buffer. While no sensor is above its threshold, and none has been for `holdOffSeconds`,
+    each channel's background level follows the readings with an exponential moving average of time constant `timeConstantSeconds`.
+    Ambient light is assumed to shift the paper level by the same amount as the background, so published ranges and
+    thresholds are the current ones moved by how far the background has moved, however the thresholds were made.
+    New calibrations are published by swapping a single reference, so readers always see a consistent set of ranges and thresholds.
+    """
+
+    DEFAULT_TIME_CONSTANT_S: float = 60.0
+    DEFAULT_HOLD_OFF_S: float = 1.0
+    DEFAULT_PUBLISH_INTERVAL_S: float = 1.0
+    DEFAULT_PERIOD_S: float = 0.05
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        buffer: IRFrameBuffer
+        calibration: CachedCalibration
+        timeConstantSeconds: float
+        holdOffSeconds: float
+        publishIntervalSeconds: float
+        periodSeconds: float
+        onUpdate: Callable[[CachedCalibration], None]
+
+    class _Stats(AsTableStr):
+        def __init__(self) -> None:
+            self._background_frames: int = 0
+            self._paper_frames: int = 0
+            self._published: int = 0
+
+        def get_headers(self) -> Sequence[str]:
+            return ["Background frames", "Paper frames", "Published"]
+
+        def get_row(self) -> Sequence[str]:
+            return [
+                str(self._background_frames),
+                str(self._paper_frames),
+                str(self._published),
+            ]
+
+        def inc_background_frames(self) -> DriftTracker._Stats:
+            self._background_frames += 1
+            return self
+
+        def inc_paper_frames(self) -> DriftTracker._Stats:
+            self._paper_frames += 1
+            return self
+
+        def inc_published(self) -> DriftTracker._Stats:
+            self._published += 1
+            return self
+
+    def __init__(self, config: DriftTracker.Config):
+        self._logger: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._buffer: IRFrameBuffer = config["buffer"]
+        self._calibration: CachedCalibration = config["calibration"]
+        self._time_constant_ns: float = (
+            config.get("timeConstantSeconds", DriftTracker.DEFAULT_TIME_CONSTANT_S)
+            * NANOSECONDS_IN_SECOND
+        )
+        self._hold_off_ns: int = int(
+            config.get("holdOffSeconds", DriftTracker.DEFAULT_HOLD_OFF_S)
+            * NANOSECONDS_IN_SECOND
+        )
+        self._publish_interval_ns: int = int(
+            config.get(
+                "publishIntervalSeconds", DriftTracker.DEFAULT_PUBLISH_INTERVAL_S
+            )
+            * NANOSECONDS_IN_SECOND
+        )
+        self._period_sec: float = config.get(
+            "periodSeconds", DriftTracker.DEFAULT_PERIOD_S
+        )
+        self._on_update: Optional[Callable[[CachedCalibration], None]] = config.get(
+            "onUpdate"
+        )
+
+        ranges = self._calibration.ranges
+        self._spread: Tuple[int, ...] = tuple(high - low for low, high in ranges)
+        self._background: array[float] = array("d", (low for low, _ in ranges))
+        self._thresholds: Tuple[float, ...] = self._calibration.thresholds
+
+        self._last_paper_ns: Optional[int] = None
+        self._last_frame_ns: Optional[int] = None
+        self._last_publish_ns: Optional[int] = None
+        self._next_seq: int = 0
+        self._running: bool = False
+        self._thread: Optional[Thread] = None
+        self._stats = DriftTracker._Stats()
+
+    @property
+    def stats(self) -> DriftTracker._Stats:
+        return self._stats
+
+    def calibration(self) -> CachedCalibration:
+        return self._calibration
+
+    def thresholds(self) -> Tuple[float, ...]:
+        return self._calibration.thresholds
+
+    def background(self) -> Tuple[float, ...]:
+        return tuple(self._background)
+
+    def update(self, frame: Frame) -> DriftTracker:
+        """
+        Fold one frame into the background model. Frames must be given in order.
+        """
+        t = frame.timestamp_ns
+        if any(v > th for v, th in zip(frame.values, self._thresholds)):
+            self._last_paper_ns = t
+            self._last_frame_ns = t
+            self._stats.inc_paper_frames()
+            return self
+
+        if (
+            self._last_paper_ns is not None
+            and t - self._last_paper_ns < self._hold_off_ns
+        ):
+            self._last_frame_ns = t
+            return self
+
+        if self._last_frame_ns is not None and t > self._last_frame_ns:
+            alpha = 1 - exp(-(t - self._last_frame_ns) / self._time_constant_ns)
+            background = self._background
+            for c, v in enumerate(frame.values):
+                background[c] += alpha * (v - background[c])
+            self._stats.inc_background_frames()
+        self._last_frame_ns = t
+
+        if self._last_publish_ns is None:
+            self._last_publish_ns = t
+        elif t - self._last_publish_ns >= self._publish_interval_ns:
+            self._last_publish_ns = t
+            self.publish()
+        return self
+
+    def publish(self) -> CachedCalibration:
+        current = self._calibration
+        lows = [round(low) for low in self._background]
+        ranges = tuple((low, low + spread) for low, spread in zip(lows, self._spread))
+        thresholds = tuple(
+            threshold + low - old_low
+            for threshold, low, (old_low, _) in zip(
+                current.thresholds, lows, current.ranges
+            )
+        )
+        calibration = new_calibration(ranges, thresholds, current.hysteresis)
+        self._thresholds = calibration.thresholds
+        self._calibration = calibration
+        self._stats.inc_published()
+        if self._on_update is not None:
+            self._on_update(calibration)
+        return calibration
+
+    def start(self) -> DriftTracker:
+        if self._running:
+            raise SamplerRunning()
+
+        self._next_seq = self._buffer.seq
+        self._running = True
+        self._thread = Thread(target=self._thread_function, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> DriftTracker:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def _thread_function(self) -> None:
+        self._logger.info("IR drift tracking started")
+
+        while self._running:
+            for frame in self._buffer.since(self._next_seq):
+                self.update(frame)
+                self._next_seq = frame.seq + 1
+            sleep(self._period_sec)
+
+        self._logger.info("IR drift tracking stopped")
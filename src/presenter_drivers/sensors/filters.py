@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from array import array
+from typing import Dict, Optional, Sequence, Tuple, Type, Union, cast
+
+from typing_extensions import TypedDict
+
+from .CCKIR import USEABLE_CHANNELS
+
+FilterOutput = Optional[Tuple[float, ...]]
+
+
+class FilterStage(ABC):
+    """
+    One stage of IR signal conditioning. A stage takes a reading of every channel and returns the filtered reading,
+    or None when it has nothing to emit yet (a decimator between outputs).
+    """
+
+    @abstractmethod
+    def apply(self, values: Sequence[float]) -> FilterOutput:
+        pass
+
+    @abstractmethod
+    def latency_samples(self) -> float:
+        """
+        Delay the stage adds, in samples of its own input.
+        """
+
+    def decimation(self) -> int:
+        """
+        How many input samples go into one output sample.
+        """
+        return 1
+
+    @abstractmethod
+    def reset(self) -> None:
+        pass
+
+
+class EMAFilter(FilterStage):
+    DEFAULT_ALPHA: float = 0.25
+
+    class Config(TypedDict, total=False):
+        alpha: float
+        channels: int
+
+    def __init__(self, config: EMAFilter.Config):
+        self._alpha: float = config.get("alpha", EMAFilter.DEFAULT_ALPHA)
+        if not 0.0 < self._alpha <= 1.0:
+            raise ValueError("alpha must be in (0, 1]")
+        self._channels: int = config.get("channels", USEABLE_CHANNELS)
+        self._state: array[float] = array("d", bytes(8 * self._channels))
+        self._primed: bool = False
+
+    def apply(self, values: Sequence[float]) -> FilterOutput:
+        state = self._state
+        if not self._primed:
+            state[:] = array("d", values)
+            self._primed = True
+            return tuple(state)
+
+        alpha = self._alpha
+        for c in range(self._channels):
+            state[c] += alpha * (values[c] - state[c])
+        return tuple(state)
+
+    def latency_samples(self) -> float:
+        return (1 - self._alpha) / self._alpha
+
+    def reset(self) -> None:
+        self._primed = False
+
+
+class MedianFilter(FilterStage):
+    DEFAULT_WINDOW: int = 5
+
+    class Config(TypedDict, total=False):
+        window: int
+        channels: int
+
+    def __init__(self, config: MedianFilter.Config):
+        self._window: int = config.get("window", MedianFilter.DEFAULT_WINDOW)
+        if self._window <= 0:
+            raise ValueError("window must be positive")
+        self._channels: int = config.get("channels", USEABLE_CHANNELS)
+        # One window per channel, laid out back to back.
+        self._history: array[float] = array(
+            "d", bytes(8 * self._window * self._channels)
+        )
+        self._index: int = 0
+        self._count: int = 0
+
+    def apply(self, values: Sequence[float]) -> FilterOutput:
+        w = self._window
+        history = self._history
+        for c in range(self._channels):
+            history[c * w + self._index] = values[c]
+        self._index = (self._index + 1) % w
+        self._count = min(self._count + 1, w)
+
+        n = self._count
+        mid = n // 2
+        out = []
+        for c in range(self._channels):
+            ordered = sorted(history[c * w : c * w + n])
+            out.append(ordered[mid] if n % 2 else (ordered[mid - 1] + ordered[mid]) / 2)
+        return tuple(out)
+
+    def latency_samples(self) -> float:
+        return (self._window - 1) / 2
+
+    def reset(self) -> None:
+        self._index = 0
+        self._count = 0
+
+
+class Decimator(FilterStage):
+    """
+    Oversample and decimate. Averages every `factor` readings into one, which cuts uncorrelated noise by sqrt(factor).
+    """
+
+    DEFAULT_FACTOR: int = 4
+
+    class Config(TypedDict, total=False):
+        factor: int
+        channels: int
+
+    def __init__(self, config: Decimator.Config):
+        self._factor: int = config.get("factor", Decimator.DEFAULT_FACTOR)
+        if self._factor <= 0:
+            raise ValueError("factor must be positive")
+        self._channels: int = config.get("channels", USEABLE_CHANNELS)
+        self._sums: array[float] = array("d", bytes(8 * self._channels))
+        self._count: int = 0
+
+    def apply(self, values: Sequence[float]) -> FilterOutput:
+        sums = self._sums
+        for c in range(self._channels):
+            sums[c] += values[c]
+        self._count += 1
+        if self._count < self._factor:
+            return None
+
+        out = tuple(s / self._factor for s in sums)
+        self.reset()
+        return out
+
+    def latency_samples(self) -> float:
+        return (self._factor - 1) / 2
+
+    def decimation(self) -> int:
+        return self._factor
+
+    def reset(self) -> None:
+        self._count = 0
+        for c in range(self._channels):
+            self._sums[c] = 0.0
+
+
+class FilterPipeline(FilterStage):
+    """
+    Runs stages in order, stopping early when a stage has no output.
+    """
+
+    def __init__(self, stages: Sequence[FilterStage]):
+        self._stages: Tuple[FilterStage, ...] = tuple(stages)
+
+    @property
+    def stages(self) -> Tuple[FilterStage, ...]:
+        return self._stages
+
+    def apply(self, values: Sequence[float]) -> FilterOutput:
+        out: FilterOutput = tuple(values)
+        for stage in self._stages:
+            out = stage.apply(cast(Tuple[float, ...], out))
+            if out is None:
+                return None
+        return out
+
+    def latency_samples(self) -> float:
+        """
+        Total delay in samples of the pipeline's input. Stages after a decimator run at a lower rate so their delay is scaled up.
+        """
+        total = 0.0
+        rate = 1
+        for stage in self._stages:
+            total += stage.latency_samples() * rate
+            rate *= stage.decimation()
+        return total
+
+    def latency_seconds(self, sample_period_seconds: float) -> float:
+        return self.latency_samples() * sample_period_seconds
+
+    def decimation(self) -> int:
+        rate = 1
+        for stage in self._stages:
+            rate *= stage.decimation()
+        return rate
+
+    def reset(self) -> None:
+        for stage in self._stages:
+            stage.reset()
+
+
+FilterConfig = Union[EMAFilter.Config, MedianFilter.Config, Decimator.Config, None]
+
+
+class FilterDef(TypedDict, total=False):
+    type: str
+    config: FilterConfig
+
+
+def filterFactory(typ: str, config: FilterConfig = None) -> FilterStage:
+    f = cast(
+        Dict[str, Type[FilterStage]],
+        {
+            "EMA": EMAFilter,
+            "Median": MedianFilter,
+            "Decimator": Decimator,
+        },
+    )
+
+    if typ not in f:
+        raise ValueError(f"Unknown filter type {typ}")
+    return f[typ](config if config else cast(FilterConfig, {}))  # type: ignore [call-arg]
+
+
+def pipelineFactory(defs: Sequence[FilterDef]) -> FilterPipeline:
+    return FilterPipeline([filterFactory(d["type"], d.get("config")) for d in defs])
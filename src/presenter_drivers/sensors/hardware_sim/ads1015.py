@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from random import Random
+from threading import Lock
+from time import perf_counter, sleep
+from typing import Callable, Optional, Sequence, Tuple
+
+from typing_extensions import TypedDict
+
+# Seconds since the device was created to a reading in 12 bit ADC counts.
+Waveform = Callable[[float], float]
+
+ADS1015_BITS = 12
+ADS1015_MAX = (1 << (ADS1015_BITS - 1)) - 1
+ADS1015_MIN = -(1 << (ADS1015_BITS - 1))
+ADS1015_RATES: Tuple[int, ...] = (128, 250, 490, 920, 1600, 2400, 3300)
+ADS1015_PINS = 4
+
+
+class FakeI2C:
+    """
+    A bus is one transaction at a time, two ADCs on the same bus can not convert concurrently.
+    """
+
+    def __init__(self) -> None:
+        self.lock: Lock = Lock()
+
+
+class FakeADS1015:
+    """
+    Software ADS1015 in single shot mode. A read holds the bus for the I2C transfer plus one conversion at `dataRate`
+    and returns the pin's waveform plus gaussian noise, scaled to 16 bits like the Adafruit driver.
+    """
+
+    DEFAULT_DATA_RATE: int = 1600
+    # Config write, conversion ready poll and result read at 400kHz.
+    DEFAULT_I2C_OVERHEAD_S: float = 0.0002
+
+    class Config(TypedDict, total=False):
+        i2c: FakeI2C
+        address: int
+        dataRate: int
+        i2cOverheadSeconds: float
+        noise: float
+        seed: int
+        realtime: bool
+        waveforms: Sequence[Waveform]
+
+    def __init__(self, config: FakeADS1015.Config):
+        self._i2c: FakeI2C = config.get("i2c", FakeI2C())
+        self.address: int = config.get("address", 0x48)
+        data_rate = config.get("dataRate", FakeADS1015.DEFAULT_DATA_RATE)
+        if data_rate not in ADS1015_RATES:
+            raise ValueError(f"Data rate must be one of {ADS1015_RATES}")
+        self._read_seconds: float = 1 / data_rate + config.get(
+            "i2cOverheadSeconds", FakeADS1015.DEFAULT_I2C_OVERHEAD_S
+        )
+        self._noise: float = config.get("noise", 0.0)
+        self._random: Random = Random(config.get("seed", self.address))
+        self._realtime: bool = config.get("realtime", True)
+        waveforms = list(config.get("waveforms", ()))[:ADS1015_PINS]
+        self._waveforms: Tuple[Waveform, ...] = tuple(
+            waveforms + [constant(0)] * (ADS1015_PINS - len(waveforms))
+        )
+        self._start: float = perf_counter()
+        self._reads: int = 0
+
+    @property
+    def reads(self) -> int:
+        return self._reads
+
+    @property
+    def read_seconds(self) -> float:
+        """
+        How long one reading keeps the bus busy.
+        """
+        return self._read_seconds
+
+    def restart(self) -> FakeADS1015:
+        """
+        Play the waveforms from the beginning again.
+        """
+        self._start = perf_counter()
+        return self
+
+    def read(self, pin: int) -> int:
+        with self._i2c.lock:
+            if self._realtime:
+                sleep(self._read_seconds)
+            v = self._waveforms[pin](perf_counter() - self._start)
+            if self._noise:
+                v += self._random.gauss(0.0, self._noise)
+            self._reads += 1
+        return max(ADS1015_MIN, min(ADS1015_MAX, round(v))) << (16 - ADS1015_BITS)
+
+
+class FakeAnalogIn:
+    """
+    Stands in for adafruit_ads1x15.analog_in.AnalogIn on a single ended pin.
+    """
+
+    def __init__(self, ads: FakeADS1015, pin: int):
+        if not 0 <= pin < ADS1015_PINS:
+            raise ValueError(f"Pin must be 0 to {ADS1015_PINS - 1}")
+        self._ads = ads
+        self._pin = pin
+
+    @property
+    def value(self) -> int:
+        return self._ads.read(self._pin)
+
+
+def constant(level: float) -> Waveform:
+    return lambda t: level
+
+
+def square(
+    low: float, high: float, period_s: float, duty: float = 0.5, phase_s: float = 0.0
+) -> Waveform:
+    return lambda t: high if ((t - phase_s) % period_s) < period_s * duty else low
+
+
+def ramp(start: float, end: float, duration_s: float) -> Waveform:
+    """
+    From `start` to `end` over `duration_s`, then holds `end`.
+    """
+    return lambda t: start + (end - start) * min(max(t / duration_s, 0.0), 1.0)
+
+
+def pulses(
+    low: float,
+    high: float,
+    intervals: Sequence[Tuple[float, float]],
+    edge_s: float = 0.0,
+    repeat_s: Optional[float] = None,
+) -> Waveform:
+    """
+    `high` during each (start, end) interval and `low` otherwise, with linear edges `edge_s` long. With `repeat_s` the
+    intervals come round again every `repeat_s` seconds.
+    """
+
+    def f(t: float) -> float:
+        if repeat_s:
+            t %= repeat_s
+        level = 0.0
+        for start, end in intervals:
+            if start <= t < end:
+                rise = (t - start) / edge_s if edge_s else 1.0
+                fall = (end - t) / edge_s if edge_s else 1.0
+                level = max(level, min(rise, fall, 1.0))
+        return low + (high - low) * level
+
+    return f
+
+
+def added(*waveforms: Waveform) -> Waveform:
+    return lambda t: sum(w(t) for w in waveforms)
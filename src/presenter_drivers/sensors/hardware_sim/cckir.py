@@ -0,0 +1,154 @@
+"""
+The CCKIR boards in software: two ADS1015s on one I2C bus, three IR sensors each, driven by a scenario.
+Waveforms are listed in CCKIR.Sensor order, left front/middle/rear on the first board then right front/middle/rear on the second.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from typing_extensions import TypedDict
+
+from .ads1015 import (
+    FakeADS1015,
+    FakeAnalogIn,
+    FakeI2C,
+    Waveform,
+    added,
+    constant,
+    pulses,
+    ramp,
+)
+
+SENSORS_PER_BOARD = 3
+
+BACKGROUND = 150
+PAPER = 1400
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    waveforms: Tuple[Waveform, ...]
+    # When the front pair is covered, seconds from the start, to measure detection latency against.
+    presence: Tuple[Tuple[float, float], ...] = ()
+    repeat_s: float = 0.0
+
+
+def idle(background: float = BACKGROUND) -> Scenario:
+    return Scenario("idle", (constant(background),) * (2 * SENSORS_PER_BOARD))
+
+
+def check_pass(
+    background: float = BACKGROUND,
+    paper: float = PAPER,
+    start_s: float = 1.0,
+    dwell_s: float = 2.0,
+    stagger_s: float = 0.15,
+    edge_s: float = 0.02,
+    repeat_s: float = 6.0,
+) -> Scenario:
+    """
+    A check slides in over the front, middle and then rear pair `stagger_s` apart, sits for `dwell_s` and is taken back out
+    the way it came. Repeats every `repeat_s`.
+    """
+    covered = [
+        (
+            start_s + k * stagger_s,
+            start_s + dwell_s + (SENSORS_PER_BOARD - 1 - k) * stagger_s,
+        )
+        for k in range(SENSORS_PER_BOARD)
+    ]
+    side = tuple(
+        pulses(background, paper, [interval], edge_s, repeat_s) for interval in covered
+    )
+    return Scenario("checkPass", side + side, (covered[0],), repeat_s)
+
+
+def fouled(
+    sensor: int = 0, level: float = (BACKGROUND + PAPER) / 2, **kwargs: float
+) -> Scenario:
+    """
+    A check pass with one sensor stuck part covered, dirt on the lens or a scrap of paper.
+    """
+    scenario = check_pass(**kwargs)
+    waveforms = list(scenario.waveforms)
+    waveforms[sensor] = constant(level)
+    return Scenario("fouled", tuple(waveforms), scenario.presence, scenario.repeat_s)
+
+
+def drifting(drift: float = 300, duration_s: float = 60.0, **kwargs: float) -> Scenario:
+    """
+    A check pass while the background creeps up, ambient light changing through the day.
+    """
+    scenario = check_pass(**kwargs)
+    creep = ramp(0.0, drift, duration_s)
+    return Scenario(
+        "drift",
+        tuple(added(w, creep) for w in scenario.waveforms),
+        scenario.presence,
+        scenario.repeat_s,
+    )
+
+
+SCENARIOS: Dict[str, Callable[[], Scenario]] = {
+    "idle": idle,
+    "checkPass": check_pass,
+    "fouled": fouled,
+    "drift": drifting,
+}
+
+
+class SimulationConfig(TypedDict, total=False):
+    scenario: str
+    waveforms: Sequence[Waveform]
+    dataRate: int
+    i2cOverheadSeconds: float
+    noise: float
+    seed: int
+    realtime: bool
+
+
+def simulated_boards(
+    config: SimulationConfig, addresses: Sequence[int]
+) -> List[FakeADS1015]:
+    if "waveforms" in config:
+        waveforms = tuple(config["waveforms"])
+    else:
+        name = config.get("scenario", "idle")
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown IR scenario {name}")
+        waveforms = SCENARIOS[name]().waveforms
+
+    i2c = FakeI2C()
+    boards = []
+    for board, address in enumerate(addresses):
+        ads_config: FakeADS1015.Config = {
+            "i2c": i2c,
+            "address": address,
+            "waveforms": waveforms[
+                board * SENSORS_PER_BOARD : (board + 1) * SENSORS_PER_BOARD
+            ],
+        }
+        if "dataRate" in config:
+            ads_config["dataRate"] = config["dataRate"]
+        if "i2cOverheadSeconds" in config:
+            ads_config["i2cOverheadSeconds"] = config["i2cOverheadSeconds"]
+        if "noise" in config:
+            ads_config["noise"] = config["noise"]
+        if "seed" in config:
+            ads_config["seed"] = config["seed"] + board
+        if "realtime" in config:
+            ads_config["realtime"] = config["realtime"]
+        boards.append(FakeADS1015(ads_config))
+    return boards
+
+
+def simulated_sensors(
+    config: SimulationConfig, addresses: Sequence[int]
+) -> List[FakeAnalogIn]:
+    return [
+        FakeAnalogIn(ads, pin)
+        for ads in simulated_boards(config, addresses)
+        for pin in range(SENSORS_PER_BOARD)
+    ]
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+from array import array
+from logging import Logger
+from threading import Thread
+from time import sleep
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from typing_extensions import TypedDict
+
+from ..logger.logger import create_logger
+from .CCKIR import USEABLE_CHANNELS
+from .sampler import (
+    NANOSECONDS_IN_SECOND,
+    Frame,
+    IRFrameBuffer,
+    SamplerException,
+    SamplerRunning,
+)
+
+DEFAULT_LOGGER = create_logger("IRHistory")
+
+NANOSECONDS_IN_MINUTE = 60 * NANOSECONDS_IN_SECOND
+
+INT32_MAX = 2**31 - 1
+INT32_MIN = -(2**31)
+
+
+class Summary(NamedTuple):
+    start_ns: int
+    readings: int
+    mins: Tuple[int, ...]
+    means: Tuple[float, ...]
+    maxs: Tuple[int, ...]
+
+
+class SummaryTier:
+    """
+    Fixed size ring of per channel min/sum/max buckets, `resolution_ns` wide and aligned to multiples of it.
+    Buckets are closed in time order so the ring stays sorted and a range is found with a binary search.
+    """
+
+    def __init__(
+        self, resolution_ns: int, capacity: int, channels: int = USEABLE_CHANNELS
+    ):
+        if resolution_ns <= 0 or capacity <= 0 or channels <= 0:
+            raise ValueError("resolution, capacity and channels must be positive")
+
+        self._resolution_ns: int = resolution_ns
+        self._capacity: int = capacity
+        self._channels: int = channels
+        self._starts: array[int] = array("q", bytes(8 * capacity))
+        self._counts: array[int] = array("l", bytes(array("l").itemsize * capacity))
+        self._mins: array[int] = array("i", bytes(4 * capacity * channels))
+        self._maxs: array[int] = array("i", bytes(4 * capacity * channels))
+        self._sums: array[float] = array("d", bytes(8 * capacity * channels))
+        # Closed buckets. Bucket n lives in slot n % capacity.
+        self._closed: int = 0
+
+        # The bucket being filled.
+        self._open_start: Optional[int] = None
+        self._open_count: int = 0
+        self._open_mins: array[int] = array("i", [INT32_MAX] * channels)
+        self._open_maxs: array[int] = array("i", [INT32_MIN] * channels)
+        self._open_sums: array[float] = array("d", bytes(8 * channels))
+
+    @property
+    def resolution_ns(self) -> int:
+        return self._resolution_ns
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def __len__(self) -> int:
+        return min(self._closed, self._capacity)
+
+    def add(self, timestamp_ns: int, values: Sequence[int]) -> Optional[Summary]:
+        """
+        Fold one reading in. Returns the bucket it closed, if any.
+        """
+        return self.merge(timestamp_ns, 1, values, values, values)
+
+    def merge(
+        self,
+        timestamp_ns: int,
+        count: int,
+        mins: Sequence[int],
+        sums: Sequence[float],
+        maxs: Sequence[int],
+    ) -> Optional[Summary]:
+        """
+        Fold a finer bucket in. Returns the bucket it closed, if any.
+        """
+        start = timestamp_ns - timestamp_ns % self._resolution_ns
+        closed = None
+        if self._open_start is not None and start != self._open_start:
+            closed = self._close()
+        if self._open_start is None:
+            self._open_start = start
+
+        self._open_count += count
+        open_mins, open_maxs, open_sums = (
+            self._open_mins,
+            self._open_maxs,
+            self._open_sums,
+        )
+        for c in range(self._channels):
+            if mins[c] < open_mins[c]:
+                open_mins[c] = mins[c]
+            if maxs[c] > open_maxs[c]:
+                open_maxs[c] = maxs[c]
+            open_sums[c] += sums[c]
+        return closed
+
+    def flush(self) -> Optional[Summary]:
+        """
+        Close the bucket being filled, even though its time is not up.
+        """
+        return self._close() if self._open_start is not None else None
+
+    def get(self, index: int) -> Summary:
+        """
+        Closed bucket `index`, 0 is the oldest still held.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        slot = (self._closed - len(self) + index) % self._capacity
+        start = slot * self._channels
+        end = start + self._channels
+        count = self._counts[slot]
+        return Summary(
+            self._starts[slot],
+            count,
+            tuple(self._mins[start:end]),
+            tuple(s / count for s in self._sums[start:end]),
+            tuple(self._maxs[start:end]),
+        )
+
+    def range(self, start_ns: int, end_ns: int) -> List[Summary]:
+        """
+        Closed buckets starting in [start_ns, end_ns).
+        """
+        lo = self._bisect(start_ns)
+        hi = self._bisect(end_ns)
+        return [self.get(i) for i in range(lo, hi)]
+
+    def oldest_ns(self) -> Optional[int]:
+        return self.get(0).start_ns if len(self) else None
+
+    def nbytes(self) -> int:
+        ints = self._starts.itemsize * len(self._starts) + self._counts.itemsize * len(
+            self._counts
+        )
+        return ints + 4 * (len(self._mins) + len(self._maxs)) + 8 * len(self._sums)
+
+    def _bisect(self, timestamp_ns: int) -> int:
+        lo, hi = 0, len(self)
+        first = self._closed - hi
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._starts[(first + mid) % self._capacity] < timestamp_ns:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _close(self) -> Summary:
+        slot = self._closed % self._capacity
+        start = slot * self._channels
+        end = start + self._channels
+        self._starts[slot] = self._open_start or 0
+        self._counts[slot] = self._open_count
+        self._mins[start:end] = self._open_mins
+        self._maxs[start:end] = self._open_maxs
+        self._sums[start:end] = self._open_sums
+        self._closed += 1
+
+        self._open_start = None
+        self._open_count = 0
+        for c in range(self._channels):
+            self._open_mins[c] = INT32_MAX
+            self._open_maxs[c] = INT32_MIN
+            self._open_sums[c] = 0.0
+
+        return self.get(len(self) - 1)
+
+
+class IRHistory:
+    """
+    Days of IR readings in fixed memory. The most recent readings are kept raw, older ones as per second and then per minute
+    min/mean/max. Each reading is folded into the open second bucket and a finished second into the open minute bucket,
+    so appending costs the same however long the history is.
+    """
+
+    DEFAULT_RAW_CAPACITY: int = 2048
+    DEFAULT_SECONDS_CAPACITY: int = 4 * 60 * 60
+    DEFAULT_MINUTES_CAPACITY: int = 3 * 24 * 60
+    DEFAULT_PERIOD_S: float = 0.25
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        buffer: IRFrameBuffer
+        channels: int
+        rawCapacity: int
+        secondsCapacity: int
+        minutesCapacity: int
+        periodSeconds: float
+
+    def __init__(self, config: IRHistory.Config):
+        self._logger: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._buffer: Optional[IRFrameBuffer] = config.get("buffer")
+        channels = config.get(
+            "channels",
+            self._buffer.channels if self._buffer is not None else USEABLE_CHANNELS,
+        )
+        self._raw = IRFrameBuffer(
+            config.get("rawCapacity", IRHistory.DEFAULT_RAW_CAPACITY), channels
+        )
+        self._seconds = SummaryTier(
+            NANOSECONDS_IN_SECOND,
+            config.get("secondsCapacity", IRHistory.DEFAULT_SECONDS_CAPACITY),
+            channels,
+        )
+        self._minutes = SummaryTier(
+            NANOSECONDS_IN_MINUTE,
+            config.get("minutesCapacity", IRHistory.DEFAULT_MINUTES_CAPACITY),
+            channels,
+        )
+        self._period_sec: float = config.get(
+            "periodSeconds", IRHistory.DEFAULT_PERIOD_S
+        )
+
+        self._next_seq: int = 0
+        self._running: bool = False
+        self._thread: Optional[Thread] = None
+
+    @property
+    def raw(self) -> IRFrameBuffer:
+        return self._raw
+
+    @property
+    def seconds(self) -> SummaryTier:
+        return self._seconds
+
+    @property
+    def minutes(self) -> SummaryTier:
+        return self._minutes
+
+    def append(self, timestamp_ns: int, values: Sequence[int]) -> IRHistory:
+        self._raw.push(timestamp_ns, values)
+        closed = self._seconds.add(timestamp_ns, values)
+        if closed is not None:
+            self._minutes.merge(
+                closed.start_ns,
+                closed.readings,
+                closed.mins,
+                [m * closed.readings for m in closed.means],
+                closed.maxs,
+            )
+        return self
+
+    def update(self, frame: Frame) -> IRHistory:
+        return self.append(frame.timestamp_ns, frame.values)
+
+    def frames(self, start_ns: int, end_ns: int) -> List[Frame]:
+        """
+        Raw readings in [start_ns, end_ns) that are still held.
+        """
+        return self._raw.since(self._raw.bisect(start_ns), self._raw.bisect(end_ns))
+
+    def query(self, start_ns: int, end_ns: int) -> List[Summary]:
+        """
+        Summaries over [start_ns, end_ns) from the finest tier that still reaches back to `start_ns`.
+        """
+        oldest = self._seconds.oldest_ns()
+        if oldest is not None and oldest <= start_ns:
+            return self._seconds.range(start_ns, end_ns)
+        return self._minutes.range(start_ns, end_ns)
+
+    def nbytes(self) -> int:
+        """
+        Memory held by the tiers, fixed at construction.
+        """
+        raw = self._raw.capacity * (8 + 4 * self._raw.channels)
+        return raw + self._seconds.nbytes() + self._minutes.nbytes()
+
+    def start(self) -> IRHistory:
+        if self._buffer is None:
+            raise SamplerException("Recording history from a thread needs a buffer")
+        if self._running:
+            raise SamplerRunning()
+
+        self._next_seq = self._buffer.seq
+        self._running = True
+        self._thread = Thread(target=self._thread_function, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> IRHistory:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def _drain(self, buffer: IRFrameBuffer) -> None:
+        for frame in buffer.since(self._next_seq):
+            self.update(frame)
+            self._next_seq = frame.seq + 1
+
+    def _thread_function(self) -> None:
+        self._logger.info("IR history started, %d bytes", self.nbytes())
+
+        while self._running:
+            if self._buffer is not None:
+                self._drain(self._buffer)
+            sleep(self._period_sec)
+        if self._buffer is not None:
+            self._drain(self._buffer)
+
+        self._logger.info("IR history stopped")
@@ -52,17 +52,36 @@ from dataclasses import dataclass
 from logging import Logger
 from threading import Lock, Thread
 from time import sleep
-from typing import Optional, Sequence, Tuple, cast
+from typing import Optional, Sequence, Tuple, Union, cast
 
 from adafruit_ads1x15.analog_in import AnalogIn
 from typing_extensions import TypedDict
 
 from ..logger.logger import create_logger
 from ..stats.stats import AsTableStr
+from ..stats.streaming import P2Quantile, RunningStats
+from .CCKIR import AnalogInput
+from .sampler import IRFrameBuffer
 
 DEFAULT_LOGGER = create_logger("IR")
 
 
+DEFAULT_THRESHOLD_MARGIN = 0.1
+
+
+def on_thresholds(
+    ranges: Sequence[Tuple[int, int]], margin: float = DEFAULT_THRESHOLD_MARGIN
+) -> Tuple[float, ...]:
+    """
+    Turn calibrated (low, high) pairs into "paper present" thresholds, `margin` of the way from the mid point to the high value.
+    """
+    thresholds = []
+    for low, high in ranges:
+        mid = low + (high - low) / 2
+        thresholds.append(mid + (high - mid) * margin)
+    return tuple(thresholds)
+
+
 class IRExceptoin(Exception):
     pass
 
@@ -92,17 +111,16 @@ class Calibrator(ABC):
 class MinMax(Calibrator):
     DEFAULT_MAX_THREAD_RUNTIME_S: float = 2 * 60
     DEFAULT_READ_DELAY_S: float = 0.1
-    _data_lock: Lock = Lock()
 
     class Config(TypedDict, total=False):
         maxThreadRuntimeSeconds: float
         readDelaySeconds: float
         logger: Logger
-        sensors: list[AnalogIn]
+        sensors: list[AnalogInput]
 
     @dataclass
     class _ChannelReading:
-        pin: AnalogIn
+        pin: AnalogInput
         min_value: Optional[int] = None
         max_value: Optional[int] = None
 
@@ -138,13 +156,14 @@ class MinMax(Calibrator):
         )
 
         self._calibrating: bool = False
+        self._data_lock: Lock = Lock()
         self._calibrationthread: Thread = Thread(target=MinMax._default_thread)
         self._channels: list[MinMax._ChannelReading] = [
             MinMax._ChannelReading(s) for s in config.get("sensors", [])
         ]
         self._stats = MinMax._Stats()
 
-    def add(self, sensor: AnalogIn) -> MinMax:
+    def add(self, sensor: AnalogInput) -> MinMax:
         if self._calibrating:
             raise CalibrationInProgress()
 
@@ -171,10 +190,10 @@ class MinMax(Calibrator):
         self._logger.info("Calibrating Started")
 
         while self._calibrating:
-            with MinMax._data_lock:
+            with self._data_lock:
                 for channel in self._channels:
                     v = channel.pin.value
-                    self._logger.debug(f"read: {v}")
+                    self._logger.debug("read: %s", v)
                     if channel.min_value is None or v < channel.min_value:
                         channel.min_value = v
                     if channel.max_value is None or v > channel.max_value:
@@ -183,3 +202,143 @@ class MinMax(Calibrator):
             sleep(self._read_delay_sec)
 
         self._logger.info("Calibration Finished - we have min and max")
+
+
+@dataclass(frozen=True)
+class ChannelCalibration:
+    count: int
+    mean: float
+    stddev: float
+    low: float
+    median: float
+    high: float
+
+
+class StreamingCalibrator(Calibrator):
+    """
+    Drop in replacement for MinMax. Instead of the raw extremes it keeps a running mean/variance and P² estimates of a low quantile,
+    the median and a high quantile for every channel. A single noise spike can not move the quantiles, so `stop()` returns usable
+    (low, high) pairs from a much shorter calibration window.
+    Readings come from the sensors directly or, when a `buffer` is given, from an IRSampler's frame buffer so no I2C reads are made.
+    """
+
+    DEFAULT_READ_DELAY_S: float = 0.01
+    DEFAULT_LOW_QUANTILE: float = 0.05
+    DEFAULT_HIGH_QUANTILE: float = 0.95
+
+    class Config(TypedDict, total=False):
+        readDelaySeconds: float
+        lowQuantile: float
+        highQuantile: float
+        logger: Logger
+        sensors: list[AnalogInput]
+        buffer: IRFrameBuffer
+        channels: int
+
+    def __init__(self, config: StreamingCalibrator.Config):
+        self._logger: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._read_delay_sec: float = config.get(
+            "readDelaySeconds", StreamingCalibrator.DEFAULT_READ_DELAY_S
+        )
+        self._sensors: list[AnalogInput] = config.get("sensors", [])
+        self._buffer: Optional[IRFrameBuffer] = config.get("buffer")
+
+        channels = config.get("channels", 0)
+        if not channels:
+            channels = (
+                self._buffer.channels
+                if self._buffer is not None
+                else len(self._sensors)
+            )
+        self._channel_count: int = channels
+        self._running_stats = RunningStats(channels)
+        self._low = P2Quantile(
+            channels,
+            config.get("lowQuantile", StreamingCalibrator.DEFAULT_LOW_QUANTILE),
+        )
+        self._median = P2Quantile(channels, 0.5)
+        self._high = P2Quantile(
+            channels,
+            config.get("highQuantile", StreamingCalibrator.DEFAULT_HIGH_QUANTILE),
+        )
+
+        self._calibrating: bool = False
+        self._next_seq: int = 0
+        self._calibrationthread: Thread = Thread(target=MinMax._default_thread)
+        self._stats = MinMax._Stats()
+
+    @property
+    def channels(self) -> int:
+        return self._channel_count
+
+    def update(self, values: Sequence[Union[int, float]]) -> StreamingCalibrator:
+        """
+        Fold one reading of every channel into the estimates.
+        """
+        self._running_stats.update(values)
+        self._low.update(values)
+        self._median.update(values)
+        self._high.update(values)
+        self._stats.inc_readings()
+        return self
+
+    def results(self) -> Tuple[ChannelCalibration, ...]:
+        return tuple(
+            ChannelCalibration(self._running_stats.count, *v)
+            for v in zip(
+                self._running_stats.mean(),
+                self._running_stats.stddev(),
+                self._low.value(),
+                self._median.value(),
+                self._high.value(),
+            )
+        )
+
+    def reset(self) -> StreamingCalibrator:
+        if self._calibrating:
+            raise CalibrationInProgress()
+
+        self._running_stats.reset()
+        self._low.reset()
+        self._median.reset()
+        self._high.reset()
+        self._stats.reset()
+        return self
+
+    def start(self) -> None:
+        if self._calibrating:
+            raise CalibrationInProgress()
+
+        if self._buffer is not None:
+            self._next_seq = self._buffer.seq
+        self._calibrating = True
+        self._calibrationthread = Thread(target=self._thread_function)
+        self._calibrationthread.start()
+
+    def stop(self) -> Tuple[Tuple[int, int], ...]:
+        self._calibrating = False
+        self._calibrationthread.join()
+        self._calibrationthread = Thread(target=MinMax._default_thread)
+        return tuple((round(c.low), round(c.high)) for c in self.results())
+
+    def _thread_function(self) -> None:
+        self._logger.info("Calibrating Started")
+
+        while self._calibrating:
+            if self._buffer is not None:
+                self._drain_buffer(self._buffer)
+            else:
+                self.update([s.value for s in self._sensors])
+            sleep(self._read_delay_sec)
+
+        if self._buffer is not None:
+            self._drain_buffer(self._buffer)
+
+        self._logger.info(
+            "Calibration Finished - %d readings", self._running_stats.count
+        )
+
+    def _drain_buffer(self, buffer: IRFrameBuffer) -> None:
+        for frame in buffer.since(self._next_seq):
+            self.update(frame.values)
+            self._next_seq = frame.seq + 1
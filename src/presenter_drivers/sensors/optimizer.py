@@ -0,0 +1,400 @@
+"""
+Offline search for IR thresholds over recorded sessions with labelled presence intervals.
+
+A session file is JSON:
+    {"recording": "front.rec", "intervals": [{"start": 1.5, "end": 3.0, "sensors": ["LEFT_FRONT", "RIGHT_FRONT"]}]}
+`start` and `end` are seconds from the first frame of the recording, a relative `recording` path is relative to the session file
+and an interval without `sensors` covers every sensor.
+
+    python -m presenter_drivers.sensors.optimizer session.json [session.json ...] --cache ir_calibration.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from logging import Logger
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from tabulate import tabulate
+from typing_extensions import TypedDict
+
+from ..logger.logger import create_logger
+from .cache import (
+    DEFAULT_CACHE_PATH,
+    CachedCalibration,
+    CalibrationCache,
+    new_calibration,
+)
+from .CCKIR import BOARD_1_ADDR, BOARD_2_ADDR, CCKIR
+from .ir import on_thresholds
+from .recording import IRRecording
+
+DEFAULT_LOGGER = create_logger("IRThresholdOptimizer")
+
+NANOSECONDS_IN_SECOND = 1000000000
+
+
+class OptimizerException(Exception):
+    pass
+
+
+class NoFeasibleThresholds(OptimizerException):
+    pass
+
+
+@dataclass(frozen=True)
+class Interval:
+    start_ns: int
+    end_ns: int
+    sensors: Tuple[CCKIR.Sensor, ...] = tuple(CCKIR.Sensor)
+
+
+@dataclass(frozen=True)
+class ChannelResult:
+    threshold: float
+    latency_ns: float
+    false_positives: int
+    missed: int
+    bounces: int
+
+
+@dataclass(frozen=True)
+class OptimizerResult:
+    hysteresis: float
+    calibration: CachedCalibration
+    channels: Tuple[Optional[ChannelResult], ...]
+
+    @property
+    def latency_ns(self) -> float:
+        """
+        Mean detection latency over the labelled channels.
+        """
+        labelled = [c.latency_ns for c in self.channels if c is not None]
+        return sum(labelled) / len(labelled) if labelled else 0.0
+
+
+def load_session(path: str) -> Tuple[IRRecording, List[Interval]]:
+    with open(path, encoding="utf-8") as f:
+        session = json.load(f)
+
+    recording = IRRecording(
+        os.path.join(os.path.dirname(path), os.path.expanduser(session["recording"]))
+    )
+    first = recording[0].timestamp_ns if len(recording) else 0
+    intervals = [
+        Interval(
+            first + int(i["start"] * NANOSECONDS_IN_SECOND),
+            first + int(i["end"] * NANOSECONDS_IN_SECOND),
+            tuple(CCKIR.Sensor[s] for s in i["sensors"])
+            if "sensors" in i
+            else tuple(CCKIR.Sensor),
+        )
+        for i in session.get("intervals", [])
+    ]
+    return recording, intervals
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+def _lowest_bit(mask: int) -> int:
+    return (mask & -mask).bit_length() - 1
+
+
+def _masks(
+    values: Sequence[int],
+    thresholds: Sequence[float],
+    position: Callable[[Sequence[float], float], int],
+) -> List[int]:
+    """
+    One bit mask per (ascending) threshold, bit i set when `position(thresholds, values[i])` is past that threshold.
+    Frames are bucketed in a single pass and the masks are built from the top bucket down, so every threshold costs a few big int ORs.
+    """
+    n = len(values)
+    buckets = [bytearray((n + 7) // 8) for _ in range(len(thresholds) + 1)]
+    for i, v in enumerate(values):
+        buckets[position(thresholds, v)][i >> 3] |= 1 << (i & 7)
+
+    masks = []
+    acc = 0
+    for k in range(len(thresholds) - 1, -1, -1):
+        acc |= int.from_bytes(buckets[k + 1], "little")
+        masks.append(acc)
+    masks.reverse()
+    return masks
+
+
+def masks_above(values: Sequence[int], thresholds: Sequence[float]) -> List[int]:
+    return _masks(values, thresholds, bisect_left)
+
+
+def masks_below(values: Sequence[int], thresholds: Sequence[float]) -> List[int]:
+    full = (1 << len(values)) - 1
+    return [full & ~m for m in _masks(values, thresholds, bisect_right)]
+
+
+def hysteresis_state(above: int, below: int, frames: int) -> int:
+    """
+    The detector's on/off state for every frame at once. A frame is on when it is above, or when an earlier frame was above
+    and nothing since has been below. Within each run of not-below frames, adding the above bits carries from the first
+    above bit to the end of the run, clearing exactly the bits that latch on.
+    """
+    run = ((1 << frames) - 1) & ~below
+    return (run & ~(run + above)) | above
+
+
+class _Session:
+    """
+    A recording turned into per channel bit vectors, bit i is frame i.
+    """
+
+    def __init__(
+        self,
+        recording: IRRecording,
+        intervals: Sequence[Interval],
+        channels: int,
+        release_ns: int,
+    ):
+        self.timestamps: List[int] = recording.timestamps()
+        self.frames: int = len(self.timestamps)
+        self.values: List[List[int]] = [recording.channel(c) for c in range(channels)]
+        # Labelled frames per channel and, per channel, the mask, start and release frame (-1 past the end) of each interval that covers it.
+        self.truth: List[int] = [0] * channels
+        self.intervals: List[List[Tuple[int, int, int]]] = [[] for _ in range(channels)]
+        for interval in intervals:
+            lo = bisect_left(self.timestamps, interval.start_ns)
+            hi = bisect_right(self.timestamps, interval.end_ns)
+            if hi <= lo:
+                continue
+            mask = ((1 << (hi - lo)) - 1) << lo
+            release = bisect_left(self.timestamps, interval.end_ns + release_ns)
+            if release >= self.frames:
+                release = -1
+            for sensor in interval.sensors:
+                if sensor.value < channels:
+                    self.truth[sensor.value] |= mask
+                    self.intervals[sensor.value].append(
+                        (mask, interval.start_ns, release)
+                    )
+
+
+class ThresholdOptimizer:
+    """
+    Grid search of on thresholds and hysteresis. Every candidate is scored on whole recordings at once with big int bit vectors
+    (one bit per frame), the same representation PresenceDetector uses per frame.
+
+    For each hysteresis value every labelled channel gets the threshold with the lowest mean detection latency that has no
+    false positives and misses no interval. A false positive is an on edge outside a labelled interval, or still being on
+    `releaseSeconds` after an interval ends. The hysteresis with the lowest mean
+    latency wins, ties go to more hysteresis and then a higher threshold. Channels without labels keep the `on_thresholds` heuristic.
+    """
+
+    DEFAULT_STEPS: int = 64
+    DEFAULT_HYSTERESIS: Tuple[float, ...] = (0.0, 0.02, 0.05, 0.1, 0.2)
+    DEFAULT_RELEASE_S: float = 0.25
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        steps: int
+        hysteresis: Sequence[float]
+        ranges: Sequence[Tuple[int, int]]
+        channels: int
+        releaseSeconds: float
+
+    def __init__(self, config: ThresholdOptimizer.Config):
+        self._logger: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._steps: int = config.get("steps", ThresholdOptimizer.DEFAULT_STEPS)
+        self._hysteresis: Tuple[float, ...] = tuple(
+            sorted(config.get("hysteresis", ThresholdOptimizer.DEFAULT_HYSTERESIS))
+        )
+        self._ranges: Optional[Tuple[Tuple[int, int], ...]] = (
+            tuple(config["ranges"]) if "ranges" in config else None
+        )
+        self._channels: int = config.get("channels", len(CCKIR.Sensor))
+        self._release_ns: int = int(
+            config.get("releaseSeconds", ThresholdOptimizer.DEFAULT_RELEASE_S)
+            * NANOSECONDS_IN_SECOND
+        )
+        self._sessions: List[_Session] = []
+
+    def add_session(
+        self, recording: IRRecording, intervals: Sequence[Interval]
+    ) -> ThresholdOptimizer:
+        if recording.channels < self._channels:
+            raise OptimizerException(
+                f"Recording has {recording.channels} channels, need {self._channels}"
+            )
+        if len(recording):
+            self._sessions.append(
+                _Session(recording, intervals, self._channels, self._release_ns)
+            )
+        return self
+
+    def ranges(self) -> Tuple[Tuple[int, int], ...]:
+        """
+        The configured ranges, or the extremes seen across every session.
+        """
+        if self._ranges is not None:
+            return self._ranges
+        if not self._sessions:
+            raise OptimizerException("No recorded frames")
+        return tuple(
+            (
+                min(min(s.values[c]) for s in self._sessions),
+                max(max(s.values[c]) for s in self._sessions),
+            )
+            for c in range(self._channels)
+        )
+
+    def optimize(self) -> OptimizerResult:
+        ranges = self.ranges()
+        best: Optional[Tuple[float, float, Tuple[Optional[ChannelResult], ...]]] = None
+        for h in self._hysteresis:
+            results = tuple(
+                self._optimize_channel(c, ranges[c], h) for c in range(self._channels)
+            )
+            labelled = [self._is_labelled(c) for c in range(self._channels)]
+            if any(r is None for r, lab in zip(results, labelled) if lab):
+                self._logger.debug("No feasible thresholds with hysteresis %s", h)
+                continue
+            scored = [r.latency_ns for r in results if r is not None]
+            latency = sum(scored) / len(scored) if scored else 0.0
+            # Iterating in ascending hysteresis, `<=` lets the larger value win a tie.
+            if best is None or latency <= best[1]:
+                best = (h, latency, results)
+
+        if best is None:
+            raise NoFeasibleThresholds(
+                "No thresholds detect every interval without false positives"
+            )
+        h, _, results = best
+        fallback = on_thresholds(ranges)
+        thresholds = tuple(
+            r.threshold if r is not None else fallback[c] for c, r in enumerate(results)
+        )
+        return OptimizerResult(h, new_calibration(ranges, thresholds, h), results)
+
+    def _is_labelled(self, channel: int) -> bool:
+        return any(s.intervals[channel] for s in self._sessions)
+
+    def _optimize_channel(
+        self, channel: int, limits: Tuple[int, int], hysteresis: float
+    ) -> Optional[ChannelResult]:
+        if not self._is_labelled(channel):
+            return None
+
+        low, high = limits
+        spread = high - low
+        on = [low + spread * (k + 1) / (self._steps + 1) for k in range(self._steps)]
+        off = [t - spread * hysteresis for t in on]
+
+        above = [masks_above(s.values[channel], on) for s in self._sessions]
+        below = [masks_below(s.values[channel], off) for s in self._sessions]
+
+        best: Optional[ChannelResult] = None
+        for k in range(self._steps):
+            result = self._score(
+                channel, on[k], [a[k] for a in above], [b[k] for b in below]
+            )
+            if result.false_positives or result.missed:
+                continue
+            if best is None or (result.latency_ns, result.bounces) <= (
+                best.latency_ns,
+                best.bounces,
+            ):
+                best = result
+        return best
+
+    def _score(
+        self, channel: int, threshold: float, above: Sequence[int], below: Sequence[int]
+    ) -> ChannelResult:
+        false_positives = 0
+        missed = 0
+        bounces = 0
+        latencies = []
+        for session, a, b in zip(self._sessions, above, below):
+            state = hysteresis_state(a, b, session.frames)
+            edges = state & ~(state << 1)
+            truth = session.truth[channel]
+            false_positives += _popcount(edges & ~truth)
+
+            detected = 0
+            for mask, start_ns, release in session.intervals[channel]:
+                if release >= 0 and (state & ~truth) >> release & 1:
+                    false_positives += 1
+                hit = state & mask
+                if not hit:
+                    missed += 1
+                    continue
+                detected += 1
+                latencies.append(session.timestamps[_lowest_bit(hit)] - start_ns)
+            bounces += max(_popcount(edges & truth) - detected, 0)
+
+        return ChannelResult(
+            threshold,
+            sum(latencies) / len(latencies) if latencies else 0.0,
+            false_positives,
+            missed,
+            bounces,
+        )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> OptimizerResult:
+    parser = argparse.ArgumentParser(
+        description="Pick IR thresholds from labelled recordings"
+    )
+    parser.add_argument("sessions", nargs="+", help="session JSON files")
+    parser.add_argument("--steps", type=int, default=ThresholdOptimizer.DEFAULT_STEPS)
+    parser.add_argument(
+        "--hysteresis",
+        type=float,
+        nargs="+",
+        default=list(ThresholdOptimizer.DEFAULT_HYSTERESIS),
+    )
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--board-id", default="")
+    parser.add_argument(
+        "--addresses",
+        type=lambda a: int(a, 0),
+        nargs=2,
+        default=[BOARD_1_ADDR, BOARD_2_ADDR],
+    )
+    parser.add_argument("--dry-run", action="store_true", help="print the result only")
+    args = parser.parse_args(argv)
+
+    optimizer = ThresholdOptimizer({"steps": args.steps, "hysteresis": args.hysteresis})
+    for path in args.sessions:
+        recording, intervals = load_session(path)
+        with recording:
+            optimizer.add_session(recording, intervals)
+    result = optimizer.optimize()
+
+    print(f"Hysteresis {result.hysteresis}")
+    print(
+        tabulate(
+            [
+                (
+                    CCKIR.Sensor(c).name,
+                    f"{result.calibration.thresholds[c]:.1f}",
+                    f"{r.latency_ns / 1000000:.1f}" if r else "-",
+                    r.bounces if r else "-",
+                )
+                for c, r in enumerate(result.channels)
+            ],
+            headers=["Sensor", "Threshold", "Latency ms", "Bounces"],
+        )
+    )
+
+    if not args.dry_run:
+        cache = CalibrationCache({"path": args.cache, "boardId": args.board_id})
+        cache.save(args.addresses, result.calibration)
+        print(f"Saved to {cache.path} as {cache.key(args.addresses)}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
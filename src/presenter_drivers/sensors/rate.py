@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from enum import Enum
+from logging import Logger
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, Optional, Sequence
+
+from typing_extensions import TypedDict
+
+from ..logger.logger import create_logger
+from ..stats.stats import AsTableStr
+
+if TYPE_CHECKING:
+    # Both need GPIO to import, the policy only calls into instances it is given.
+    from ..motor.driver import MotorDriver
+    from .CCKDoor import AccessDoorSwitch
+
+DEFAULT_LOGGER = create_logger("IRSamplingPolicy")
+
+NANOSECONDS_IN_SECOND = 1000000000
+
+
+class SamplingPolicy(ABC):
+    @abstractmethod
+    def period_seconds(self) -> float:
+        """
+        How long to wait between readings right now.
+        """
+
+    def poll_seconds(self) -> float:
+        """
+        How often a sampler waiting out a long period should ask again, so it can speed up without finishing the wait.
+        """
+        return self.period_seconds()
+
+
+class FixedRate(SamplingPolicy):
+    def __init__(self, period_seconds: float):
+        self._period_seconds: float = period_seconds
+
+    def period_seconds(self) -> float:
+        return self._period_seconds
+
+
+class MotorDoorPolicy(SamplingPolicy):
+    """
+    Sample at the active rate while the paw motor is running or the access door has recently changed state,
+    and for `holdSeconds` afterwards. Drop to the idle rate otherwise.
+    """
+
+    DEFAULT_ACTIVE_PERIOD_S: float = 0.005
+    DEFAULT_IDLE_PERIOD_S: float = 0.25
+    DEFAULT_HOLD_S: float = 2.0
+    DEFAULT_POLL_S: float = 0.02
+
+    class Mode(Enum):
+        IDLE = 0
+        ACTIVE = 1
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        motor: MotorDriver
+        door: AccessDoorSwitch
+        activePeriodSeconds: float
+        idlePeriodSeconds: float
+        holdSeconds: float
+        pollSeconds: float
+
+    class _Stats(AsTableStr):
+        def __init__(self) -> None:
+            self._mode: MotorDoorPolicy.Mode = MotorDoorPolicy.Mode.IDLE
+            self._ramp_ups: int = 0
+            self._ramp_downs: int = 0
+
+        def get_headers(self) -> Sequence[str]:
+            return ["Mode", "Ramp ups", "Ramp downs"]
+
+        def get_row(self) -> Sequence[str]:
+            return [self._mode.name, str(self._ramp_ups), str(self._ramp_downs)]
+
+        @property
+        def mode(self) -> MotorDoorPolicy.Mode:
+            return self._mode
+
+        def set_mode(self, mode: MotorDoorPolicy.Mode) -> MotorDoorPolicy._Stats:
+            if mode != self._mode:
+                if mode == MotorDoorPolicy.Mode.ACTIVE:
+                    self._ramp_ups += 1
+                else:
+                    self._ramp_downs += 1
+                self._mode = mode
+            return self
+
+    def __init__(self, config: MotorDoorPolicy.Config):
+        self._logger: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._motor: Optional[MotorDriver] = config.get("motor")
+        self._door: Optional[AccessDoorSwitch] = config.get("door")
+        self._active_period: float = config.get(
+            "activePeriodSeconds", MotorDoorPolicy.DEFAULT_ACTIVE_PERIOD_S
+        )
+        self._idle_period: float = config.get(
+            "idlePeriodSeconds", MotorDoorPolicy.DEFAULT_IDLE_PERIOD_S
+        )
+        self._hold_ns: int = int(
+            config.get("holdSeconds", MotorDoorPolicy.DEFAULT_HOLD_S)
+            * NANOSECONDS_IN_SECOND
+        )
+        self._poll_seconds: float = config.get(
+            "pollSeconds", MotorDoorPolicy.DEFAULT_POLL_S
+        )
+
+        self._door_open: Optional[bool] = None
+        self._last_activity_ns: Optional[int] = None
+        self._stats = MotorDoorPolicy._Stats()
+
+    @property
+    def stats(self) -> MotorDoorPolicy._Stats:
+        return self._stats
+
+    def mode(self) -> MotorDoorPolicy.Mode:
+        now = perf_counter_ns()
+        if self._motor is not None and self._motor.is_running():
+            self._last_activity_ns = now
+
+        if self._door is not None:
+            door_open = self._door.is_open()
+            if self._door_open is not None and door_open != self._door_open:
+                self._last_activity_ns = now
+            self._door_open = door_open
+
+        mode = (
+            MotorDoorPolicy.Mode.ACTIVE
+            if self._last_activity_ns is not None
+            and now - self._last_activity_ns < self._hold_ns
+            else MotorDoorPolicy.Mode.IDLE
+        )
+        if mode != self._stats.mode:
+            self._logger.debug("IR sampling mode %s", mode.name)
+        self._stats.set_mode(mode)
+        return mode
+
+    def period_seconds(self) -> float:
+        if self.mode() == MotorDoorPolicy.Mode.ACTIVE:
+            return self._active_period
+        return self._idle_period
+
+    def poll_seconds(self) -> float:
+        return min(self._poll_seconds, self._idle_period)
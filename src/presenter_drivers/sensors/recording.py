@@ -0,0 +1,340 @@
+"""
+IR recordings are a 16 byte header followed by fixed size little endian records, so they can be appended to while being read
+and memory mapped without parsing.
+
+Header: magic(8s) version(H) channels(H) reserved(4x)
+Record: timestamp_ns(q) value(i) * channels, padded to a multiple of 8 bytes.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+from bisect import bisect_right
+from logging import Logger
+from threading import Thread
+from time import perf_counter_ns, sleep
+from types import TracebackType
+from typing import BinaryIO, List, Optional, Sequence, Tuple, Type
+
+from typing_extensions import TypedDict
+
+from ..logger.logger import create_logger
+from .CCKIR import CCKIR, USEABLE_CHANNELS
+from .hardware_sim.cckir import SimulationConfig
+from .sampler import Frame, IRFrameBuffer, SamplerRunning
+
+DEFAULT_LOGGER = create_logger("IRRecording")
+
+MAGIC = b"CCKIRREC"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHH4x")
+# Records can only be viewed as native words when native is the file's little endian.
+NATIVE_WORDS = sys.byteorder == "little"
+
+
+class RecordingException(Exception):
+    pass
+
+
+class InvalidRecording(RecordingException):
+    pass
+
+
+def record_struct(channels: int) -> struct.Struct:
+    padding = (-(8 + 4 * channels)) % 8
+    return struct.Struct(f"<q{channels}i{padding}x")
+
+
+class IRRecorder:
+    """
+    Appends frames to a recording. Frames can be written directly or, after `start()`, drained from an IRSampler's buffer by a thread.
+    """
+
+    DEFAULT_PERIOD_S: float = 0.1
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        path: str
+        channels: int
+        buffer: IRFrameBuffer
+        periodSeconds: float
+
+    def __init__(self, config: IRRecorder.Config):
+        self._logger: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._path: str = config["path"]
+        self._buffer: Optional[IRFrameBuffer] = config.get("buffer")
+        self._period_sec: float = config.get(
+            "periodSeconds", IRRecorder.DEFAULT_PERIOD_S
+        )
+        channels = config.get(
+            "channels",
+            self._buffer.channels if self._buffer is not None else USEABLE_CHANNELS,
+        )
+        self._record: struct.Struct = record_struct(channels)
+        self._channels: int = channels
+        self._file: BinaryIO = self._open()
+
+        self._frames: int = 0
+        self._next_seq: int = 0
+        self._running: bool = False
+        self._thread: Optional[Thread] = None
+
+    @property
+    def frames(self) -> int:
+        return self._frames
+
+    def _open(self) -> BinaryIO:
+        exists = os.path.exists(self._path) and os.path.getsize(self._path) > 0
+        if exists:
+            with open(self._path, "rb") as existing:
+                header = existing.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise InvalidRecording(
+                    f"Can not append to {self._path}, it is too short"
+                )
+            magic, version, channels = HEADER.unpack(header)
+            if (
+                magic != MAGIC
+                or version != FORMAT_VERSION
+                or channels != self._channels
+            ):
+                raise InvalidRecording(f"Can not append to {self._path}")
+
+        f = open(self._path, "ab")  # pylint: disable=consider-using-with
+        if not exists:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, self._channels))
+        return f
+
+    def write(self, timestamp_ns: int, values: Sequence[int]) -> IRRecorder:
+        self._file.write(self._record.pack(timestamp_ns, *values))
+        self._frames += 1
+        return self
+
+    def write_frame(self, frame: Frame) -> IRRecorder:
+        return self.write(frame.timestamp_ns, frame.values)
+
+    def flush(self) -> IRRecorder:
+        self._file.flush()
+        return self
+
+    def start(self) -> IRRecorder:
+        if self._buffer is None:
+            raise RecordingException("Recording from a thread needs a buffer")
+        if self._running:
+            raise SamplerRunning()
+
+        self._next_seq = self._buffer.seq
+        self._running = True
+        self._thread = Thread(target=self._thread_function, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> IRRecorder:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.flush()
+
+    def close(self) -> None:
+        self.stop()
+        self._file.close()
+
+    def __enter__(self) -> IRRecorder:
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception_value: Optional[BaseException],
+        exception_traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def _drain(self, buffer: IRFrameBuffer) -> None:
+        frames = buffer.since(self._next_seq)
+        if frames and frames[0].seq != self._next_seq:
+            self._logger.warning(
+                "Recorder fell behind, lost %d frames", frames[0].seq - self._next_seq
+            )
+        for frame in frames:
+            self.write_frame(frame)
+            self._next_seq = frame.seq + 1
+
+    def _thread_function(self) -> None:
+        self._logger.info("Recording to %s", self._path)
+
+        while self._running:
+            if self._buffer is not None:
+                self._drain(self._buffer)
+            sleep(self._period_sec)
+        if self._buffer is not None:
+            self._drain(self._buffer)
+
+        self._logger.info("Recorded %d frames", self._frames)
+
+
+class IRRecording:
+    """
+    Read only, memory mapped view of a recording. Timestamps and channels are strided views straight onto the file.
+    """
+
+    def __init__(self, path: str):
+        self._path: str = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise InvalidRecording(f"{path} is too short")
+            magic, version, channels = HEADER.unpack(header)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise InvalidRecording(
+                    f"{path} is not a version {FORMAT_VERSION} IR recording"
+                )
+            self._map: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._channels: int = channels
+        self._record: struct.Struct = record_struct(channels)
+        size = len(self._map) - HEADER.size
+        self._count: int = size // self._record.size
+        self._body: memoryview = memoryview(self._map)[
+            HEADER.size : HEADER.size + self._count * self._record.size
+        ]
+        # Record size is a multiple of 8 so the body can be viewed as 64 and 32 bit words.
+        self._words64: Optional[memoryview] = (
+            self._body.cast("q") if NATIVE_WORDS else None
+        )
+        self._words32: Optional[memoryview] = (
+            self._body.cast("i") if NATIVE_WORDS else None
+        )
+
+    @property
+    def channels(self) -> int:
+        return self._channels
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Frame:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        timestamp_ns, *values = self._record.unpack_from(
+            self._body, index * self._record.size
+        )
+        return Frame(index, timestamp_ns, tuple(values[: self._channels]))
+
+    def timestamps(self) -> List[int]:
+        if self._words64 is None:
+            return [record[0] for record in self._record.iter_unpack(self._body)]
+        return self._words64[:: self._record.size // 8].tolist()
+
+    def channel(self, channel: int) -> List[int]:
+        if not 0 <= channel < self._channels:
+            raise IndexError(channel)
+        if self._words32 is None:
+            return [
+                record[1 + channel] for record in self._record.iter_unpack(self._body)
+            ]
+        return self._words32[2 + channel :: self._record.size // 4].tolist()
+
+    def close(self) -> None:
+        if self._words64 is not None:
+            self._words64.release()
+        if self._words32 is not None:
+            self._words32.release()
+        self._body.release()
+        self._map.close()
+
+    def __enter__(self) -> IRRecording:
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception_value: Optional[BaseException],
+        exception_traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class ReplaySensor:
+    """
+    Stands in for an AnalogIn, `value` is the replayed reading of one channel.
+    """
+
+    def __init__(self, replay: ReplayCCKIR, channel: int):
+        self._replay = replay
+        self._channel = channel
+
+    @property
+    def value(self) -> int:
+        return self._replay.current_values()[self._channel]
+
+
+class ReplayCCKIR(CCKIR):
+    """
+    A CCKIR that plays back a recording instead of reading I2C.
+    With a `speed` above 0 frames are replayed against the clock at that multiple of real time.
+    With a `speed` of 0 every `read_all()` steps to the next frame, as fast as the caller can go.
+    """
+
+    class Config(CCKIR.Config, total=False):
+        recording: str
+        speed: float
+        loop: bool
+
+    def __init__(self, config: ReplayCCKIR.Config):
+        self._recording: IRRecording = IRRecording(config["recording"])
+        if len(self._recording) == 0:
+            raise InvalidRecording(f"{config['recording']} has no frames")
+        self._speed: float = config.get("speed", 1.0)
+        self._loop: bool = config.get("loop", False)
+        self._timestamps: List[int] = self._recording.timestamps()
+        self._index: int = 0
+        self._start_ns: int = perf_counter_ns()
+        super().__init__(config)
+
+    def _setup(self, simulation: Optional[SimulationConfig] = None) -> None:
+        self._sensors = [ReplaySensor(self, c) for c in range(self._recording.channels)]
+
+    def rewind(self) -> ReplayCCKIR:
+        self._index = 0
+        self._start_ns = perf_counter_ns()
+        return self
+
+    def finished(self) -> bool:
+        if self._speed > 0:
+            return not self._loop and self._position() >= len(self._recording) - 1
+        return not self._loop and self._index >= len(self._recording)
+
+    def current_frame(self) -> Frame:
+        if self._speed > 0:
+            return self._recording[self._position()]
+        return self._recording[min(self._index, len(self._recording) - 1)]
+
+    def current_values(self) -> Tuple[int, ...]:
+        return self.current_frame().values
+
+    def read_all(self) -> Tuple[int, ...]:
+        if self._speed > 0:
+            return self.current_values()
+
+        if self._index >= len(self._recording) and self._loop:
+            self._index = 0
+        frame = self._recording[min(self._index, len(self._recording) - 1)]
+        self._index += 1
+        return frame.values
+
+    def close(self) -> None:
+        self._recording.close()
+
+    def _position(self) -> int:
+        first = self._timestamps[0]
+        span = self._timestamps[-1] - first
+        elapsed = (perf_counter_ns() - self._start_ns) * self._speed
+        if self._loop and span > 0:
+            elapsed %= span
+        return max(bisect_right(self._timestamps, first + elapsed) - 1, 0)
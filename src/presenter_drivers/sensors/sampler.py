@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+from array import array
+from logging import Logger
+from threading import Thread
+from time import perf_counter_ns, sleep
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from typing_extensions import TypedDict
+
+from ..logger.logger import create_logger
+from ..stats.stats import AsTableStr
+from .CCKIR import CCKIR, USEABLE_CHANNELS
+from .filters import FilterDef, FilterPipeline, pipelineFactory
+from .rate import FixedRate, SamplingPolicy
+
+DEFAULT_LOGGER = create_logger("IRSampler")
+
+NANOSECONDS_IN_SECOND = 1000000000
+
+
+class SamplerException(Exception):
+    pass
+
+
+class SamplerRunning(SamplerException):
+    pass
+
+
+class Frame(NamedTuple):
+    seq: int
+    timestamp_ns: int
+    values: Tuple[int, ...]
+
+
+class IRFrameBuffer:
+    """
+    Fixed size ring buffer of timestamped IR frames.
+    There must only be one writer. Any number of readers can call `latest()`/`window()` without taking a lock,
+    a read that races the writer is detected with the sequence number and retried.
+    """
+
+    DEFAULT_CAPACITY: int = 1024
+    MAX_READ_RETRIES: int = 8
+
+    def __init__(
+        self, capacity: int = DEFAULT_CAPACITY, channels: int = USEABLE_CHANNELS
+    ):
+        if capacity <= 0 or channels <= 0:
+            raise ValueError("capacity and channels must be positive")
+
+        self._capacity: int = capacity
+        self._channels: int = channels
+        self._timestamps: array[int] = array("q", bytes(8 * capacity))
+        self._values: array[int] = array("i", bytes(4 * capacity * channels))
+        # Number of frames published. Frame n lives in slot n % capacity.
+        self._seq: int = 0
+        # Sequence number of the frame currently being written.
+        self._writing: int = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def channels(self) -> int:
+        return self._channels
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def push(self, timestamp_ns: int, values: Sequence[int]) -> int:
+        seq = self._seq
+        self._writing = seq
+        slot = seq % self._capacity
+        start = slot * self._channels
+        self._timestamps[slot] = timestamp_ns
+        self._values[start : start + self._channels] = array("i", values)
+        self._seq = seq + 1
+        return seq
+
+    def latest(self) -> Optional[Frame]:
+        for _ in range(IRFrameBuffer.MAX_READ_RETRIES):
+            seq = self._seq - 1
+            if seq < 0:
+                return None
+            frame = self._read(seq)
+            if frame is not None:
+                return frame
+        return None
+
+    def get(self, seq: int) -> Optional[Frame]:
+        """
+        Return frame `seq` if it is still held in the buffer.
+        """
+        if not self._seq - self._capacity <= seq < self._seq:
+            return None
+        return self._read(seq)
+
+    def bisect(self, timestamp_ns: int) -> int:
+        """
+        Sequence number of the first held frame stamped at or after `timestamp_ns`, for frames pushed in time order.
+        A frame overwritten during the search is dropped again by `since()`.
+        """
+        hi = self._seq
+        lo = max(0, hi - self._capacity)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._timestamps[mid % self._capacity] < timestamp_ns:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def window(self, count: int) -> List[Frame]:
+        """
+        Return up to `count` of the most recent frames, oldest first.
+        """
+        end = self._seq
+        return self.since(end - min(count, self._capacity, end), end)
+
+    def since(self, seq: int, end: Optional[int] = None) -> List[Frame]:
+        """
+        Return every frame still held in the buffer from `seq` up to (not including) `end`, oldest first.
+        """
+        end = self._seq if end is None else end
+        frames: List[Frame] = []
+        for n in range(max(seq, end - self._capacity, 0), end):
+            frame = self._read(n)
+            if frame is not None:
+                frames.append(frame)
+        return frames
+
+    def _read(self, seq: int) -> Optional[Frame]:
+        slot = seq % self._capacity
+        start = slot * self._channels
+        timestamp_ns = self._timestamps[slot]
+        values = tuple(self._values[start : start + self._channels])
+        # The slot is only reused once the writer starts frame seq + capacity.
+        if self._writing - seq >= self._capacity:
+            return None
+        return Frame(seq, timestamp_ns, values)
+
+
+class IRSampler:
+    """
+    Owns the I2C reads for a CCKIR. A background thread reads every sensor at a fixed rate and pushes the frames into an IRFrameBuffer
+    so consumers never have to touch the bus.
+    Readings can be conditioned by a FilterPipeline, given directly as `pipeline` or built from `filters` definitions, before they are published.
+    A SamplingPolicy, such as MotorDoorPolicy, can vary the rate. Otherwise it is fixed at `periodSeconds`.
+    """
+
+    DEFAULT_PERIOD_S: float = 0.01
+
+    class Config(TypedDict, total=False):
+        logger: Logger
+        cckir: CCKIR
+        periodSeconds: float
+        buffer: IRFrameBuffer
+        bufferCapacity: int
+        pipeline: FilterPipeline
+        filters: Sequence[FilterDef]
+        policy: SamplingPolicy
+
+    class _Stats(AsTableStr):
+        RATE_SMOOTHING: float = 0.1
+
+        def __init__(self) -> None:
+            self._readings: int = 0
+            self._overruns: int = 0
+            self._rate_hz: float = 0.0
+            self._last_reading_ns: Optional[int] = None
+
+        def get_headers(self) -> Sequence[str]:
+            return ["Readings", "Overruns", "Rate (Hz)"]
+
+        def get_row(self) -> Sequence[str]:
+            return [str(self._readings), str(self._overruns), f"{self._rate_hz:.1f}"]
+
+        @property
+        def rate_hz(self) -> float:
+            return self._rate_hz
+
+        def record_reading_time(self, t_ns: int) -> IRSampler._Stats:
+            if self._last_reading_ns is not None and t_ns > self._last_reading_ns:
+                rate = NANOSECONDS_IN_SECOND / (t_ns - self._last_reading_ns)
+                if self._rate_hz == 0.0:
+                    self._rate_hz = rate
+                else:
+                    self._rate_hz += IRSampler._Stats.RATE_SMOOTHING * (
+                        rate - self._rate_hz
+                    )
+            self._last_reading_ns = t_ns
+            return self
+
+        def inc_readings(self) -> IRSampler._Stats:
+            self._readings += 1
+            return self
+
+        def inc_overruns(self) -> IRSampler._Stats:
+            self._overruns += 1
+            return self
+
+        def reset(self) -> IRSampler._Stats:
+            self._readings = 0
+            self._overruns = 0
+            self._rate_hz = 0.0
+            self._last_reading_ns = None
+            return self
+
+    def __init__(self, config: IRSampler.Config):
+        self._logger: Logger = config.get("logger", DEFAULT_LOGGER)
+        self._cckir: CCKIR = config["cckir"]
+        self._policy: SamplingPolicy = config.get(
+            "policy",
+            FixedRate(config.get("periodSeconds", IRSampler.DEFAULT_PERIOD_S)),
+        )
+        self._buffer: IRFrameBuffer = config.get(
+            "buffer",
+            IRFrameBuffer(config.get("bufferCapacity", IRFrameBuffer.DEFAULT_CAPACITY)),
+        )
+
+        self._pipeline: Optional[FilterPipeline] = config.get("pipeline")
+        if self._pipeline is None and "filters" in config:
+            self._pipeline = pipelineFactory(config["filters"])
+
+        self._running: bool = False
+        self._thread: Optional[Thread] = None
+        self._stats = IRSampler._Stats()
+
+    @property
+    def buffer(self) -> IRFrameBuffer:
+        return self._buffer
+
+    @property
+    def stats(self) -> IRSampler._Stats:
+        return self._stats
+
+    @property
+    def pipeline(self) -> Optional[FilterPipeline]:
+        return self._pipeline
+
+    @property
+    def policy(self) -> SamplingPolicy:
+        return self._policy
+
+    def latency_seconds(self) -> float:
+        """
+        Delay between a change at the sensors and it being published at the current sampling rate, not counting the I2C read itself.
+        """
+        if self._pipeline is None:
+            return 0.0
+        return self._pipeline.latency_seconds(self._policy.period_seconds())
+
+    def achieved_rate_hz(self) -> float:
+        return self._stats.rate_hz
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def latest(self) -> Optional[Frame]:
+        return self._buffer.latest()
+
+    def window(self, count: int) -> List[Frame]:
+        return self._buffer.window(count)
+
+    def start(self) -> IRSampler:
+        if self._running:
+            raise SamplerRunning()
+
+        self._running = True
+        self._thread = Thread(target=self._thread_function, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> IRSampler:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def sample(self) -> Optional[int]:
+        """
+        Take one reading of every sensor and publish it, returning the frame's sequence number.
+        Returns None when the filter pipeline held the reading back. Only call this when the background thread is not running.
+        """
+        values: Sequence[int] = self._cckir.read_all()
+        self._stats.inc_readings()
+        if self._pipeline is not None:
+            filtered = self._pipeline.apply(values)
+            if filtered is None:
+                return None
+            values = [round(v) for v in filtered]
+        return self._buffer.push(perf_counter_ns(), values)
+
+    def _thread_function(self) -> None:
+        self._logger.info("IR sampler started")
+
+        next_ns = perf_counter_ns()
+        while self._running:
+            sampled_ns = perf_counter_ns()
+            self.sample()
+            self._stats.record_reading_time(sampled_ns)
+            next_ns += self._period_ns()
+            if next_ns <= perf_counter_ns():
+                # Fell behind, don't try to catch up with a burst of reads.
+                self._stats.inc_overruns()
+                next_ns = perf_counter_ns()
+                continue
+            next_ns = self._wait(sampled_ns, next_ns)
+
+        self._logger.info("IR sampler stopped")
+
+    def _period_ns(self) -> int:
+        return int(self._policy.period_seconds() * NANOSECONDS_IN_SECOND)
+
+    def _wait(self, sampled_ns: int, next_ns: int) -> int:
+        poll_ns = int(self._policy.poll_seconds() * NANOSECONDS_IN_SECOND)
+        while self._running:
+            delay_ns = next_ns - perf_counter_ns()
+            if delay_ns <= 0:
+                break
+            sleep(min(delay_ns, poll_ns) / NANOSECONDS_IN_SECOND)
+            if delay_ns > poll_ns:
+                # The policy may want a faster rate now, don't wait out the rest of a slow period.
+                next_ns = min(next_ns, sampled_ns + self._period_ns())
+        return next_ns
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+from array import array
+from math import sqrt
+from typing import Sequence, Tuple
+
+
+class RunningStats:
+    """
+    Welford's online mean and variance, kept for every channel in O(1) memory.
+    """
+
+    def __init__(self, channels: int):
+        self._channels: int = channels
+        self._count: int = 0
+        self._mean: array[float] = array("d", bytes(8 * channels))
+        self._m2: array[float] = array("d", bytes(8 * channels))
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def update(self, values: Sequence[float]) -> RunningStats:
+        self._count += 1
+        n = self._count
+        mean = self._mean
+        m2 = self._m2
+        for c in range(self._channels):
+            x = values[c]
+            delta = x - mean[c]
+            mean[c] += delta / n
+            m2[c] += delta * (x - mean[c])
+        return self
+
+    def mean(self) -> Tuple[float, ...]:
+        return tuple(self._mean)
+
+    def variance(self) -> Tuple[float, ...]:
+        if self._count < 2:
+            return (0.0,) * self._channels
+        return tuple(m / (self._count - 1) for m in self._m2)
+
+    def stddev(self) -> Tuple[float, ...]:
+        return tuple(sqrt(v) for v in self.variance())
+
+    def reset(self) -> RunningStats:
+        self._count = 0
+        for c in range(self._channels):
+            self._mean[c] = 0.0
+            self._m2[c] = 0.0
+        return self
+
+
+class P2Quantile:
+    """
+    Jain and Chlamtac's P² estimator for a single quantile, kept for every channel in O(1) memory.
+    Five markers per channel track the minimum, the quantile, the maximum and two points in between.
+    """
+
+    MARKERS = 5
+
+    def __init__(self, channels: int, quantile: float):
+        if not 0.0 < quantile < 1.0:
+            raise ValueError("quantile must be between 0 and 1")
+
+        p = quantile
+        self._channels: int = channels
+        self._quantile: float = p
+        self._count: int = 0
+        # Marker heights and positions, MARKERS per channel.
+        self._heights: array[float] = array(
+            "d", bytes(8 * P2Quantile.MARKERS * channels)
+        )
+        self._positions: array[float] = array(
+            "d", bytes(8 * P2Quantile.MARKERS * channels)
+        )
+        self._desired: array[float] = array(
+            "d", bytes(8 * P2Quantile.MARKERS * channels)
+        )
+        self._increments: Tuple[float, ...] = (0.0, p / 2, p, (1 + p) / 2, 1.0)
+        self._initial_desired: Tuple[float, ...] = (0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0)
+
+    @property
+    def quantile(self) -> float:
+        return self._quantile
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def update(self, values: Sequence[float]) -> P2Quantile:
+        m = P2Quantile.MARKERS
+        if self._count < m:
+            for c in range(self._channels):
+                self._heights[c * m + self._count] = values[c]
+            self._count += 1
+            if self._count == m:
+                self._initialize_markers()
+            return self
+
+        self._count += 1
+        for c in range(self._channels):
+            self._update_channel(c * m, values[c])
+        return self
+
+    def value(self) -> Tuple[float, ...]:
+        m = P2Quantile.MARKERS
+        if self._count >= m:
+            return tuple(self._heights[c * m + 2] for c in range(self._channels))
+        if self._count == 0:
+            return (0.0,) * self._channels
+
+        index = min(int(self._quantile * self._count), self._count - 1)
+        return tuple(
+            sorted(self._heights[c * m : c * m + self._count])[index]
+            for c in range(self._channels)
+        )
+
+    def reset(self) -> P2Quantile:
+        self._count = 0
+        return self
+
+    def _initialize_markers(self) -> None:
+        m = P2Quantile.MARKERS
+        for c in range(self._channels):
+            base = c * m
+            self._heights[base : base + m] = array(
+                "d", sorted(self._heights[base : base + m])
+            )
+            for i in range(m):
+                self._positions[base + i] = float(i)
+                self._desired[base + i] = self._initial_desired[i]
+
+    def _update_channel(self, base: int, x: float) -> None:
+        q = self._heights
+        n = self._positions
+        desired = self._desired
+
+        if x < q[base]:
+            q[base] = x
+            k = 0
+        elif x >= q[base + 4]:
+            q[base + 4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[base + k + 1]:
+                k += 1
+
+        for i in range(k + 1, P2Quantile.MARKERS):
+            n[base + i] += 1
+        for i in range(P2Quantile.MARKERS):
+            desired[base + i] += self._increments[i]
+
+        for i in range(base + 1, base + 4):
+            d = desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                height = self._parabolic(i, step)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = height
+                n[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q = self._heights
+        n = self._positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
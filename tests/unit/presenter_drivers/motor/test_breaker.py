@@ -0,0 +1,44 @@
+# pylint: disable=redefined-outer-name
+from time import perf_counter_ns
+
+import pytest
+
+from presenter_drivers.motor.breaker import IRPresenceBreaker
+from presenter_drivers.sensors.cache import CachedCalibration
+from presenter_drivers.sensors.sampler import IRFrameBuffer
+
+CALIBRATION = CachedCalibration(((100, 500),) * 6, (320.0,) * 6)
+COVERED = (400, 0, 0, 400, 0, 0)
+
+
+@pytest.fixture(scope="function")
+def frame_buffer():
+    return IRFrameBuffer(16)
+
+
+@pytest.fixture(scope="function")
+def breaker(frame_buffer):
+    return IRPresenceBreaker(
+        {"buffer": frame_buffer, "calibration": CALIBRATION, "confirmFrames": 2}
+    )
+
+
+# ---------------- IRPresenceBreaker.shouldBreak -----------------------
+def test_should_break_once_the_front_pair_is_confirmed(frame_buffer, breaker) -> None:
+    frame_buffer.push(perf_counter_ns(), COVERED)
+    assert breaker.shouldBreak() is False
+    assert breaker.shouldBreak() is False, "the same frame is only counted once"
+    frame_buffer.push(perf_counter_ns(), COVERED)
+    assert breaker.shouldBreak() is True
+
+
+def test_should_not_break_when_only_one_side_is_covered(frame_buffer, breaker) -> None:
+    for _ in range(3):
+        frame_buffer.push(perf_counter_ns(), (400, 0, 0, 0, 0, 0))
+        assert breaker.shouldBreak() is False
+
+
+def test_stale_frames_are_ignored(frame_buffer, breaker) -> None:
+    for _ in range(3):
+        frame_buffer.push(perf_counter_ns() - 10**9, COVERED)
+        assert breaker.shouldBreak() is False
@@ -0,0 +1,25 @@
+from presenter_drivers.neopixel.CCKDisplay import CCKDisplay
+
+from .test_NeoPixelPRU import ListWriter
+
+
+# ---------------- CCKDisplay.countdown_color -----------------------
+def test_countdown_colors_follow_the_scalar_fade() -> None:
+    for i in range(101):
+        expected = CCKDisplay.fade_green_down_to_red(i / 100)
+        r, g, b = CCKDisplay.countdown_color(i / 100)
+
+        assert abs(r - expected["r"]) <= 3
+        assert abs(g - expected["g"]) <= 3
+        assert b == expected["b"] == 0
+
+
+# ---------------- CCKDisplay.set_all_segments_color -----------------------
+def test_all_segments_are_set_with_one_write_and_draw() -> None:
+    writer = ListWriter()
+    display = CCKDisplay({"neoPixelPRUConfig": {"writer": writer, "ledCount": 4}})
+
+    display.set_all_segments_color(10, 20, 30)
+    display.all_segments_off()
+
+    assert writer.writes == [b"8 10 20 30\n-1 0 0 0\n", b"8 0 0 0\n-1 0 0 0\n"]
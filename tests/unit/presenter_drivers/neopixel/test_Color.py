@@ -0,0 +1,40 @@
+import pytest
+
+from presenter_drivers.neopixel.Color import (
+    BLUE,
+    GRB,
+    GREEN,
+    PALETTE,
+    RED,
+    Color,
+    frame_buffer,
+    frame_to_rgb,
+    pack,
+)
+
+
+# ---------------- GRB -----------------------
+def test_packed_colors_agree_with_the_channel_helpers() -> None:
+    color = GRB.of(1.9, 2, 300)
+
+    assert color == pack(1, 2, 255) == 0x0201FF
+    assert (RED(color), GREEN(color), BLUE(color)) == (1, 2, 255)
+    assert color.rgb == tuple(color) == (color.r, color.g, color.b)
+    assert Color(1.5, 2.5, 255.0).packed() is color, "colors are interned"
+
+
+def test_palette_colors_unpack_as_r_g_b() -> None:
+    assert [*PALETTE["RED"]] == [255, 0, 0]
+    assert PALETTE.OFF is PALETTE.BLACK
+    assert "GREEN" in PALETTE
+    with pytest.raises(AttributeError):
+        _ = PALETTE.MAUVE
+
+
+# ---------------- frame_to_rgb -----------------------
+def test_packed_frames_convert_to_rgb_bytes() -> None:
+    frame = frame_buffer(3)
+    frame[1] = PALETTE.YELLOW
+    frame[2] = GRB.of(1, 2, 3)
+
+    assert frame_to_rgb(frame) == bytes([0, 0, 0, 255, 255, 0, 1, 2, 3])
@@ -0,0 +1,301 @@
+# pylint: disable=redefined-outer-name
+from struct import unpack
+from threading import Thread
+from types import TracebackType
+from typing import List, Optional, Type
+
+import pytest
+
+from presenter_drivers.neopixel.Color import GRB, PALETTE, frame_buffer
+from presenter_drivers.neopixel.NeoPixelPRU import NeoPixelPRU
+from presenter_drivers.neopixel.protocol import (
+    BINARY,
+    MAX_WRITE_BYTES,
+    OP_DRAW,
+    OP_RUN,
+    OP_SET,
+    RUN,
+    SET,
+    TEXT,
+)
+from presenter_drivers.neopixel.writer.Writer import Writer
+
+
+class ListWriter(Writer):
+    def __init__(self) -> None:
+        super().__init__(None)
+        self.writes: List[bytes] = []
+
+    def write(self, b: bytearray) -> None:
+        self.writes.append(bytes(b))
+
+    def __enter__(self) -> Writer:
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception_value: Optional[BaseException],
+        exception_traceback: Optional[TracebackType],
+    ) -> None:
+        pass
+
+
+@pytest.fixture(scope="function")
+def writer() -> ListWriter:
+    return ListWriter()
+
+
+@pytest.fixture(scope="function")
+def neopixel(writer) -> NeoPixelPRU:
+    return NeoPixelPRU({"writer": writer, "ledCount": 4})
+
+
+# ---------------- NeoPixelPRU.draw -----------------------
+def test_commands_are_sent_in_one_write_per_draw(neopixel, writer) -> None:
+    for i in range(4):
+        neopixel.set_color_buffer(i, 255, 0, 0)
+    neopixel.set_segment_buffer(NeoPixelPRU.SEGMENT_ONE, 0, 255.9, 0)
+    assert not writer.writes
+
+    neopixel.draw()
+
+    assert writer.writes == [
+        b"0 255.0 0.0 0.0\n1 255.0 0.0 0.0\n2 255.0 0.0 0.0\n3 255.0 0.0 0.0\n"
+        b"9 0 255 0\n-1 0 0 0\n"
+    ]
+    assert neopixel.pending_bytes() == 0
+
+
+def test_clear_and_flush_send_pending_commands(neopixel, writer) -> None:
+    neopixel.set_destination_color_buffer(1, 1, 2, 3).flush()
+    neopixel.flush()
+    neopixel.clear()
+
+    assert writer.writes == [b"5 1 2 3\n", b"-2 0 0 0\n"]
+
+
+def test_a_full_buffer_is_flushed_early(writer) -> None:
+    neopixel = NeoPixelPRU({"writer": writer, "ledCount": 4, "bufferSize": 20})
+
+    neopixel.set_segment_buffer(0, 1, 1, 1)
+    neopixel.set_segment_buffer(1, 1, 1, 1)
+    neopixel.set_segment_buffer(2, 1, 1, 1)
+
+    assert writer.writes == [b"8 1 1 1\n9 1 1 1\n"]
+    assert neopixel.pending_bytes() == len(b"10 1 1 1\n")
+
+
+def test_no_write_is_larger_than_the_pru_takes(writer) -> None:
+    neopixel = NeoPixelPRU({"writer": writer})
+
+    for i in range(neopixel.led_count):
+        neopixel.set_color_buffer(i, 255.5, 128.25, 1.125)
+    neopixel.draw()
+    neopixel.send(b"".join(writer.writes))
+
+    assert len(writer.writes) > 2
+    assert max(len(w) for w in writer.writes) <= MAX_WRITE_BYTES
+    assert all(w.endswith(b"\n") for w in writer.writes)
+
+
+def test_auto_flush_writes_every_command(writer) -> None:
+    neopixel = NeoPixelPRU({"writer": writer, "ledCount": 4, "autoFlush": True})
+
+    neopixel.set_segment(0, 1, 1, 1)
+
+    assert writer.writes == [b"8 1 1 1\n", b"-1 0 0 0\n"]
+
+
+def test_out_of_range_indexes_are_not_sent(neopixel, writer) -> None:
+    neopixel.set_color_buffer(4, 1, 1, 1).set_segment_buffer(4, 1, 1, 1).flush()
+
+    assert not writer.writes
+
+
+# ---------------- NeoPixelPRU shadow framebuffer -----------------------
+def test_repainting_the_same_frame_sends_nothing(neopixel, writer) -> None:
+    for _ in range(3):
+        for i in range(4):
+            neopixel.set_color_buffer(i, 10, 20, 30)
+        neopixel.draw()
+    for _ in range(3):
+        neopixel.set_segment(NeoPixelPRU.SEGMENT_ONE, 0, 0, 0)
+        neopixel.set_segment(NeoPixelPRU.SEGMENT_TWO, 0, 0, 0)
+
+    assert len(writer.writes) == 3
+    assert neopixel.stats.suppressed == 12
+    assert neopixel.stats.skipped_draws == 6
+
+
+def test_segment_and_pixel_writes_invalidate_each_other(neopixel, writer) -> None:
+    neopixel.set_color(0, 1, 1, 1)
+    neopixel.set_segment(NeoPixelPRU.SEGMENT_ALL, 0, 0, 0)
+    neopixel.set_color(0, 1, 1, 1)
+    neopixel.set_segment(NeoPixelPRU.SEGMENT_ALL, 0, 0, 0)
+    neopixel.set_segment(NeoPixelPRU.SEGMENT_ONE, 0, 0, 0)
+    neopixel.set_segment(NeoPixelPRU.SEGMENT_ALL, 0, 0, 0)
+
+    assert [w.split(b"\n")[0] for w in writer.writes] == [
+        b"0 1.0 1.0 1.0",
+        b"8 0 0 0",
+        b"0 1.0 1.0 1.0",
+        b"8 0 0 0",
+        b"9 0 0 0",
+        b"8 0 0 0",
+    ]
+
+
+def test_clear_leaves_every_pixel_known_to_be_off(neopixel, writer) -> None:
+    neopixel.set_color(0, 1, 1, 1).clear()
+    neopixel.set_color(0, 0, 0, 0)
+    assert writer.writes[-1] == b"-2 0 0 0\n"
+
+    neopixel.invalidate().set_color(0, 0, 0, 0)
+    assert writer.writes[-1] == b"0 0.0 0.0 0.0\n-1 0 0 0\n"
+
+
+# ---------------- NeoPixelPRU protocol -----------------------
+def test_binary_protocol_is_used_when_the_firmware_has_it(writer) -> None:
+    neopixel = NeoPixelPRU(
+        {"writer": writer, "ledCount": 4, "firmwareVersion": "2.0.0"}
+    )
+
+    neopixel.set_segment(NeoPixelPRU.SEGMENT_ONE, 1, 2, 3)
+
+    assert neopixel.protocol == BINARY
+    assert writer.writes == [
+        SET.pack(OP_SET, 9, 2, 1, 3) + bytes([OP_DRAW]),
+    ]
+
+
+def test_binary_protocol_falls_back_to_text_on_old_firmware(writer) -> None:
+    neopixel = NeoPixelPRU({"writer": writer, "protocol": BINARY})
+
+    assert neopixel.protocol == TEXT
+
+
+def test_unknown_protocols_are_rejected(writer) -> None:
+    with pytest.raises(ValueError):
+        NeoPixelPRU({"writer": writer, "protocol": "morse"})
+
+
+# ---------------- NeoPixelPRU.set_color_run -----------------------
+def test_a_run_sends_the_changed_span_in_one_command(writer) -> None:
+    neopixel = NeoPixelPRU(
+        {"writer": writer, "ledCount": 4, "firmwareVersion": "2.0.0"}
+    )
+    neopixel.set_color_run(0, [(1, 2, 3)] * 4)
+    neopixel.set_color_run(0, [(1, 2, 3), (4, 5, 6), (1, 2, 3), (7, 8, 300)])
+
+    assert writer.writes[1] == (
+        RUN.pack(OP_RUN, 1, 3) + bytes([5, 4, 6, 2, 1, 3, 8, 7, 255, OP_DRAW])
+    )
+    assert neopixel.stats.suppressed == 2
+
+
+def test_a_text_run_sends_only_changed_pixels(neopixel, writer) -> None:
+    neopixel.set_color_run(0, [(1, 1, 1)] * 4)
+    neopixel.set_color_run(1, [(1, 1, 1), (2, 2, 2)])
+
+    assert writer.writes[1] == b"2 2.0 2.0 2.0\n-1 0 0 0\n"
+
+
+def test_runs_larger_than_the_buffer_are_split(writer) -> None:
+    neopixel = NeoPixelPRU(
+        {
+            "writer": writer,
+            "ledCount": 4,
+            "firmwareVersion": "2.0.0",
+            "bufferSize": RUN.size + 6,
+        }
+    )
+
+    neopixel.set_color_run(0, [(i, i, i) for i in range(1, 5)])
+
+    assert [unpack("<BHH", w[: RUN.size]) for w in writer.writes[:2]] == [
+        (OP_RUN, 0, 2),
+        (OP_RUN, 2, 2),
+    ]
+    assert writer.writes[2] == bytes([OP_DRAW])
+
+
+def test_runs_past_the_strip_are_not_sent(neopixel, writer) -> None:
+    neopixel.set_color_run(3, [(1, 1, 1)] * 2).flush()
+
+    assert not writer.writes
+
+
+# ---------------- NeoPixelPRU color correction -----------------------
+def test_colors_go_through_the_gamma_and_brightness_table(writer) -> None:
+    neopixel = NeoPixelPRU(
+        {"writer": writer, "ledCount": 4, "gamma": 2.0, "brightness": 0.5}
+    )
+
+    neopixel.set_color_buffer(0, 255, 128, 0)
+    neopixel.set_segment(NeoPixelPRU.SEGMENT_ONE, 255, 300, -1)
+
+    assert writer.writes == [b"0 128.0 32.0 0.0\n9 128 128 0\n-1 0 0 0\n"]
+
+
+# ---------------- NeoPixelPRU packed colors -----------------------
+def test_packed_frames_and_colors_are_sent_like_rgb(neopixel, writer) -> None:
+    frame = frame_buffer(4)
+    frame[0] = PALETTE.RED
+    frame[3] = GRB.of(1, 2, 3)
+
+    neopixel.set_frame(0, frame)
+    neopixel.set_packed_segment_buffer(NeoPixelPRU.SEGMENT_ONE, PALETTE.GREEN).draw()
+
+    assert writer.writes == [
+        b"0 255.0 0.0 0.0\n1 0.0 0.0 0.0\n2 0.0 0.0 0.0\n3 1.0 2.0 3.0\n-1 0 0 0\n",
+        b"9 0 255 0\n-1 0 0 0\n",
+    ]
+
+
+# ---------------- NeoPixelPRU.batch -----------------------
+def test_a_batch_draws_once_and_folds_equal_segments(neopixel, writer) -> None:
+    with neopixel.batch():
+        for segment in (1, 2, 3):
+            neopixel.set_segment(segment, 5, 5, 5)
+        assert not writer.writes
+
+    assert writer.writes == [b"8 5 5 5\n-1 0 0 0\n"]
+    assert neopixel.stats.folded == 1
+
+
+def test_a_batch_keeps_the_last_write_per_segment_in_order(neopixel, writer) -> None:
+    with neopixel.batch():
+        neopixel.set_segment(1, 9, 9, 9)
+        neopixel.set_segment(0, 1, 1, 1)
+        neopixel.set_segment(2, 1, 1, 1)
+        neopixel.set_segment(1, 2, 2, 2)
+        with neopixel.batch():
+            neopixel.draw()
+        assert not writer.writes
+
+    assert writer.writes == [b"8 1 1 1\n9 2 2 2\n-1 0 0 0\n"]
+
+
+def test_pixel_writes_in_a_batch_follow_earlier_segments(writer) -> None:
+    neopixel = NeoPixelPRU({"writer": writer, "ledCount": 4, "autoFlush": True})
+
+    with neopixel.batch():
+        neopixel.set_segment(1, 1, 1, 1)
+        neopixel.set_color(0, 2, 2, 2)
+
+    assert writer.writes == [b"9 1 1 1\n0 2.0 2.0 2.0\n-1 0 0 0\n"]
+
+
+def test_other_threads_wait_for_a_batch(neopixel, writer) -> None:
+    other = Thread(target=lambda: neopixel.set_segment(1, 9, 9, 9))
+
+    with neopixel.batch():
+        neopixel.set_segment(2, 1, 1, 1)
+        other.start()
+        other.join(0.1)
+        assert other.is_alive()
+        assert not writer.writes
+    other.join(5)
+
+    assert writer.writes == [b"10 1 1 1\n-1 0 0 0\n", b"9 9 9 9\n-1 0 0 0\n"]
@@ -0,0 +1,137 @@
+# pylint: disable=redefined-outer-name
+import asyncio
+
+import pytest
+
+from presenter_drivers.neopixel.animation import Animator, Countdown, Fade, Flash
+from presenter_drivers.neopixel.NeoPixelPRU import NeoPixelPRU
+from presenter_drivers.neopixel.writer import PRUEmulatorWriter
+
+from .test_NeoPixelPRU import ListWriter
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(scope="function")
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture(scope="function")
+def emulator(clock) -> PRUEmulatorWriter:
+    return PRUEmulatorWriter({"ledCount": 6, "clock": clock})
+
+
+@pytest.fixture(scope="function")
+def animator(emulator, clock) -> Animator:
+    neopixel = NeoPixelPRU({"writer": emulator, "ledCount": 6})
+    return Animator({"neopixel": neopixel, "fps": 10, "clock": clock})
+
+
+# ---------------- Animation -----------------------
+def test_flash_alternates_and_ends_off() -> None:
+    flash = Flash(1, (255, 0, 0), duration_s=3.0, period_s=0.5)
+
+    assert [flash.color_at(t)[0] for t in (0.0, 0.4, 0.6, 1.1)] == [255, 255, 0, 255]
+    assert flash.final_color() == (0, 0, 0)
+
+
+def test_fade_and_countdown_end_on_their_last_color() -> None:
+    fade = Fade(1, (0, 0, 0), (100, 200, 50), 2.0)
+
+    assert fade.color_at(1.0) == (50, 100, 25)
+    assert fade.final_color() == (100, 200, 50)
+    assert Countdown(10.0).color_at(0.0) == (0, 255, 0)
+    assert Countdown(10.0).final_color() == (255, 0, 0)
+
+
+# ---------------- Animator.tick -----------------------
+def test_every_segment_is_drawn_once_per_tick(animator, emulator, clock) -> None:
+    animator.play(Flash(NeoPixelPRU.SEGMENT_ONE, (9, 9, 9), period_s=1.0))
+    animator.play(Fade(NeoPixelPRU.SEGMENT_THREE, (0, 0, 0), (100, 0, 0), 1.0))
+
+    for t in (0.0, 0.5, 1.5):
+        clock.now = t
+        animator.tick()
+
+    assert emulator.stats.frames == 3
+    assert emulator.led(0) == (0, 0, 0)
+    assert emulator.led(5) == (100, 0, 0)
+    assert [a.segment for a in animator.playing()] == [NeoPixelPRU.SEGMENT_ONE]
+
+
+def test_playing_on_a_segment_replaces_its_animation(animator, clock) -> None:
+    first = animator.play(Flash(NeoPixelPRU.SEGMENT_ONE, (1, 1, 1)))
+    second = animator.play(Countdown(5.0, NeoPixelPRU.SEGMENT_ONE))
+
+    assert first.is_done()
+    assert not second.is_done()
+    clock.now = 5.0
+    animator.tick()
+    assert second.wait(0)
+
+
+def test_ticks_that_change_nothing_send_nothing(animator, clock) -> None:
+    writer = ListWriter()
+    animator = Animator(
+        {
+            "neopixel": NeoPixelPRU({"writer": writer, "ledCount": 6}),
+            "clock": clock,
+        }
+    )
+    animator.play(Flash(NeoPixelPRU.SEGMENT_ONE, (1, 1, 1), period_s=1.0))
+
+    for t in (0.0, 0.2, 0.4, 0.6, 1.2):
+        clock.now = t
+        animator.tick()
+
+    assert len(writer.writes) == 2
+
+
+# ---------------- Animator scheduling -----------------------
+def test_frame_rate_is_capped_at_the_strip_refresh_rate(emulator) -> None:
+    neopixel = NeoPixelPRU({"writer": emulator})
+    animator = Animator({"neopixel": neopixel, "fps": 100000})
+
+    assert animator.period_s == neopixel.refresh_seconds()
+
+
+def test_the_thread_plays_an_animation_to_the_end() -> None:
+    emulator = PRUEmulatorWriter({"ledCount": 6})
+    animator = Animator(
+        {"neopixel": NeoPixelPRU({"writer": emulator, "ledCount": 6}), "fps": 200}
+    )
+    animator.start()
+    fade = animator.play(Fade(NeoPixelPRU.SEGMENT_ALL, (0, 0, 0), (0, 0, 80), 0.05))
+
+    assert fade.wait(2.0)
+    animator.stop()
+    assert emulator.led(3) == (0, 0, 80)
+    assert not animator.is_running()
+
+
+def test_run_async_ticks_on_the_event_loop() -> None:
+    emulator = PRUEmulatorWriter({"ledCount": 6})
+    animator = Animator(
+        {"neopixel": NeoPixelPRU({"writer": emulator, "ledCount": 6}), "fps": 200}
+    )
+    flash = animator.play(Flash(NeoPixelPRU.SEGMENT_TWO, (5, 5, 5), 0.05, 0.01))
+
+    async def stop_when_done() -> None:
+        while not flash.is_done():
+            await asyncio.sleep(0.005)
+        animator.stop()
+
+    async def main() -> None:
+        await asyncio.gather(animator.run_async(), stop_when_done())
+
+    asyncio.get_event_loop().run_until_complete(main())
+
+    assert animator.stats.frames > 1
+    assert emulator.led(2) == (0, 0, 0)
@@ -0,0 +1,90 @@
+# pylint: disable=redefined-outer-name
+from time import sleep
+
+import pytest
+
+from presenter_drivers.neopixel.compositor import Compositor, LayerExists
+from presenter_drivers.neopixel.NeoPixelPRU import NeoPixelPRU
+
+from .test_NeoPixelPRU import ListWriter
+
+
+@pytest.fixture(scope="function")
+def writer() -> ListWriter:
+    return ListWriter()
+
+
+@pytest.fixture(scope="function")
+def compositor(writer) -> Compositor:
+    neopixel = NeoPixelPRU({"writer": writer, "ledCount": 4, "firmwareVersion": "2"})
+    return Compositor({"neopixel": neopixel})
+
+
+# ---------------- Compositor.compose -----------------------
+def test_higher_layers_cover_lower_ones(compositor) -> None:
+    compositor.add_layer("error", z=10).fill(255, 0, 0, 2)
+    compositor.add_layer("door").fill(0, 0, 255)
+
+    assert compositor.layers() == ["door", "error"]
+    assert compositor.compose() == bytes([0, 0, 255] * 2 + [255, 0, 0] * 2)
+
+    compositor.set_z("door", 20)
+    assert compositor.compose()[9:] == bytes([0, 0, 255])
+
+
+def test_masks_and_opacity_blend_with_the_layers_below(compositor) -> None:
+    compositor.add_layer("base").fill(200, 0, 0)
+    top = compositor.add_layer("top", z=1).fill(0, 100, 0, alpha=128)
+    top.clear(0, 1)
+    top.set_pixel(3, 0, 0, 100)
+
+    frame = compositor.compose()
+    assert frame[0:3] == bytes([200, 0, 0])
+    assert frame[3:6] == bytes([200 * 127 // 255, 100 * 128 // 255, 0])
+    assert frame[9:12] == bytes([0, 0, 100])
+
+    top.set_opacity(0.5)
+    assert compositor.compose()[9:12] == bytes([100, 0, 50])
+
+
+def test_layer_names_are_unique(compositor) -> None:
+    compositor.add_layer("ir")
+
+    with pytest.raises(LayerExists):
+        compositor.add_layer("ir")
+    compositor.remove_layer("ir").add_layer("ir")
+
+
+# ---------------- Compositor.tick -----------------------
+def test_only_changed_frames_are_pushed(compositor, writer) -> None:
+    layer = compositor.add_layer("paw")
+
+    compositor.tick()
+    compositor.tick()
+    layer.fill(0, 0, 0)
+    compositor.tick()
+    layer.set_pixel(1, 9, 9, 9)
+    compositor.tick()
+
+    assert compositor.stats.frames == 3
+    assert compositor.stats.unchanged == 1
+    assert len(writer.writes) == 2, "frames that blend to what is shown are suppressed"
+
+
+def test_the_thread_pushes_what_producers_draw(writer) -> None:
+    neopixel = NeoPixelPRU({"writer": writer, "ledCount": 4})
+    compositor = Compositor({"neopixel": neopixel, "fps": 200}).start()
+
+    compositor.add_layer("door").fill(1, 2, 3)
+
+    def shown() -> bool:
+        return any(b"0 1.0 2.0 3.0\n" in w for w in writer.writes)
+
+    deadline = 200
+    while not shown() and deadline:
+        sleep(0.005)
+        deadline -= 1
+    compositor.stop()
+
+    assert shown()
+    assert not compositor.is_running()
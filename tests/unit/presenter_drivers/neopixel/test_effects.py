@@ -0,0 +1,196 @@
+# pylint: disable=redefined-outer-name
+from typing import Optional
+
+import pytest
+
+from presenter_drivers.neopixel.animation import Flash
+from presenter_drivers.neopixel.effects import (
+    CompiledEffect,
+    EffectCache,
+    EffectPlayer,
+    InvalidEffect,
+    compile_effect,
+)
+from presenter_drivers.neopixel.NeoPixelPRU import NeoPixelPRU
+
+from .test_NeoPixelPRU import ListWriter
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.jump_to: Optional[float] = None
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        # Oversleeps once to `jump_to` when it is set.
+        if self.jump_to is not None:
+            self.now, self.jump_to = self.jump_to, None
+        else:
+            self.now += seconds
+
+
+@pytest.fixture(scope="function")
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture(scope="function")
+def neopixel() -> NeoPixelPRU:
+    return NeoPixelPRU({"writer": ListWriter(), "ledCount": 4})
+
+
+@pytest.fixture(scope="function")
+def player(neopixel, clock) -> EffectPlayer:
+    return EffectPlayer(
+        {
+            "neopixel": neopixel,
+            "fps": 10,
+            "spinSeconds": 0,
+            "clock": clock,
+            "sleep": clock.sleep,
+        }
+    )
+
+
+# ---------------- compile_effect -----------------------
+def test_only_changed_frames_are_kept(neopixel) -> None:
+    effect = compile_effect([Flash(1, (9, 9, 9), 2.0, 0.5)], neopixel, 10)
+
+    assert list(effect.times) == [0.0, 0.5, 1.0, 1.5]
+    assert bytes(effect.frame(0)) == b"9 9 9 9\n-1 0 0 0\n"
+    assert bytes(effect.frame(3)) == b"9 0 0 0\n-1 0 0 0\n"
+
+
+def test_effects_without_a_duration_are_rejected(neopixel) -> None:
+    with pytest.raises(ValueError):
+        compile_effect([Flash(1, (9, 9, 9))], neopixel, 10)
+
+
+# ---------------- CompiledEffect.save -----------------------
+def test_saved_effects_are_mapped_back(neopixel, tmp_path) -> None:
+    effect = compile_effect([Flash(0, (1, 2, 3), 1.0, 0.5)], neopixel, 10)
+    path = str(tmp_path / "flash.fx")
+
+    effect.save(path)
+    loaded = CompiledEffect.load(path)
+
+    assert list(loaded.times) == list(effect.times)
+    assert [bytes(loaded.frame(i)) for i in range(len(loaded))] == [
+        bytes(effect.frame(i)) for i in range(len(effect))
+    ]
+    loaded.close()
+
+
+def test_bad_effect_files_are_rejected(tmp_path) -> None:
+    path = tmp_path / "bad.fx"
+    path.write_bytes(b"not an effect file at all, not even close to it")
+
+    with pytest.raises(InvalidEffect):
+        CompiledEffect.load(str(path))
+
+
+# ---------------- EffectCache.get -----------------------
+def test_the_least_recently_used_effect_is_evicted(neopixel) -> None:
+    cache = EffectCache({"size": 2})
+    compiled = []
+
+    def compile_(name: str):
+        def compile_effect_() -> CompiledEffect:
+            compiled.append(name)
+            return CompiledEffect.from_frames([0.0], [name.encode()], 0.1, 0.0)
+
+        return compile_effect_
+
+    for name in ("a", "b", "a", "c", "b"):
+        cache.get(name, compile_(name))
+
+    assert compiled == ["a", "b", "c", "b"]
+    assert "b" in cache and "c" in cache and "a" not in cache
+    assert cache.stats.evicted == 2
+
+
+def test_effects_saved_to_a_directory_are_not_compiled_again(
+    neopixel, clock, tmp_path
+) -> None:
+    config = {"neopixel": neopixel, "clock": clock, "sleep": clock.sleep}
+    first = EffectPlayer({**config, "cache": EffectCache({"directory": str(tmp_path)})})
+    second = EffectPlayer(
+        {**config, "cache": EffectCache({"directory": str(tmp_path)})}
+    )
+
+    expected = bytes(first.retract_countdown(2.0).frame(0))
+
+    assert bytes(second.retract_countdown(2.0).frame(0)) == expected
+    assert second.cache.stats.loaded == 1
+    assert second.cache.stats.compiled == 0
+
+
+def test_evicted_mapped_effects_are_closed(neopixel, tmp_path) -> None:
+    cache = EffectCache({"size": 1, "directory": str(tmp_path)})
+
+    def compile_() -> CompiledEffect:
+        return compile_effect([Flash(1, (9, 9, 9), 1.0, 0.5)], neopixel, 10)
+
+    cache.get("a", compile_)
+    mapped = EffectCache({"size": 1, "directory": str(tmp_path)})
+    effect = mapped.get("a", compile_)
+    mapped.get("b", compile_)
+
+    assert mapped.stats.loaded == 1
+    assert effect.closed
+
+
+# ---------------- EffectPlayer.play -----------------------
+def test_frames_are_sent_on_time(neopixel, clock) -> None:
+    writer = ListWriter()
+    player = EffectPlayer(
+        {
+            "neopixel": NeoPixelPRU(neopixel.clone_config(writer)),
+            "fps": 10,
+            "spinSeconds": 0,
+            "clock": clock,
+            "sleep": clock.sleep,
+        }
+    )
+
+    player.play(player.error_flashing(2.0, (255, 0, 0), 0.5))
+
+    assert writer.writes == [
+        b"8 255 0 0\n-1 0 0 0\n",
+        b"8 0 0 0\n-1 0 0 0\n",
+        b"8 255 0 0\n-1 0 0 0\n",
+        b"8 0 0 0\n-1 0 0 0\n",
+    ]
+    assert clock.now == pytest.approx(1.5)
+    assert player.stats.frames == 4
+
+
+def test_a_late_player_skips_to_the_latest_frame(player, clock) -> None:
+    effect = player.error_flashing(2.0, (255, 0, 0), 0.5)
+    clock.jump_to = 1.2
+
+    player.play(effect)
+
+    assert len(effect) == 4
+    assert player.stats.frames == 3
+    assert player.stats.skipped == 1
+    assert player.stats.max_late_s == pytest.approx(0.2)
+
+
+def test_spinning_stops_when_the_clock_stands_still(neopixel) -> None:
+    player = EffectPlayer(
+        {
+            "neopixel": neopixel,
+            "spinSeconds": 0.5,
+            "clock": lambda: 0.0,
+            "sleep": lambda seconds: None,
+        }
+    )
+
+    effect = player.error_flashing(2.0, (255, 0, 0), 0.5)
+    player.play(effect)
+
+    assert player.stats.frames == len(effect)
@@ -0,0 +1,62 @@
+import pytest
+
+from presenter_drivers.neopixel.Color import HSVtoRGB
+from presenter_drivers.neopixel.lut import (
+    HUE_STEPS,
+    Gradient,
+    apply_table,
+    brightness_table,
+    color_table,
+    countdown_gradient,
+    gamma_table,
+    hsv_to_rgb_many,
+)
+
+
+# ---------------- color tables -----------------------
+def test_tables_keep_the_ends_and_darken_the_middle() -> None:
+    gamma = gamma_table()
+
+    assert (gamma[0], gamma[255]) == (0, 255)
+    assert gamma[128] < 128
+    assert brightness_table(0.5)[200] == 100
+    assert color_table(2.0, 0.5)[255] == 128
+    assert color_table(1.0, 1.0) == bytes(range(256))
+
+
+def test_a_frame_is_corrected_in_place() -> None:
+    frame = bytearray([0, 100, 255])
+
+    assert apply_table(frame, brightness_table(0.5)) is frame
+    assert frame == bytearray([0, 50, 128])
+
+
+# ---------------- hsv_to_rgb_many -----------------------
+@pytest.mark.parametrize("s, v", [(1.0, 1.0), (0.5, 1.0), (1.0, 0.25), (0.3, 0.6)])
+def test_batches_match_the_scalar_conversion(s, v) -> None:
+    hues = [i / HUE_STEPS for i in range(0, HUE_STEPS, 7)]
+
+    frame = hsv_to_rgb_many(hues, s, v)
+
+    for i, h in enumerate(hues):
+        expected = HSVtoRGB(h, s, v)
+        actual = frame[3 * i : 3 * i + 3]
+        assert abs(actual[0] - expected["r"]) <= 1
+        assert abs(actual[1] - expected["g"]) <= 1
+        assert abs(actual[2] - expected["b"]) <= 1
+
+
+# ---------------- Gradient -----------------------
+def test_the_countdown_runs_from_red_to_green() -> None:
+    countdown = countdown_gradient()
+
+    assert len(countdown) == 256
+    assert countdown.at(0.0) == (255, 0, 0)
+    assert countdown.at(0.5)[0] > 250 and countdown.at(0.5)[1:] == (255, 0)
+    assert countdown.at(1.0) == countdown.at(1.5) == (0, 255, 0)
+    assert countdown.at(0.3) is countdown.at(0.3), "lookups don't allocate"
+
+
+def test_gradients_need_whole_colors() -> None:
+    with pytest.raises(ValueError):
+        Gradient(b"\x00\x01")
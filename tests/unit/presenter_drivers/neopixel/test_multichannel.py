@@ -0,0 +1,73 @@
+# pylint: disable=redefined-outer-name
+from typing import Iterator, List
+
+import pytest
+
+from presenter_drivers.neopixel.multichannel import MultiChannelNeoPixel
+from presenter_drivers.neopixel.NeoPixelPRU import NeoPixelPRU
+
+from .test_NeoPixelPRU import ListWriter
+
+
+@pytest.fixture(scope="function")
+def writers() -> List[ListWriter]:
+    return [ListWriter(), ListWriter()]
+
+
+@pytest.fixture(scope="function")
+def strip(writers) -> Iterator[MultiChannelNeoPixel]:
+    strip = MultiChannelNeoPixel(
+        {"channels": [{"writer": writer, "ledCount": 2} for writer in writers]}
+    )
+    yield strip
+    strip.close()
+
+
+# ---------------- MultiChannelNeoPixel -----------------------
+def test_channels_are_laid_end_to_end(strip) -> None:
+    assert strip.led_count == 4
+    assert strip.refresh_seconds() == strip.channels[0].refresh_seconds()
+
+
+def test_channels_and_devices_are_exclusive(writers) -> None:
+    with pytest.raises(ValueError):
+        MultiChannelNeoPixel({"channels": [{"writer": writers[0]}], "devices": []})
+    with pytest.raises(ValueError):
+        MultiChannelNeoPixel({"devices": []})
+
+
+def test_devices_get_a_channel_each(tmp_path) -> None:
+    paths = [str(tmp_path / "pru30"), str(tmp_path / "pru31")]
+
+    with MultiChannelNeoPixel(
+        {"devices": paths, "channelConfig": {"ledCount": 3}}
+    ) as strip:
+        strip.set_color(5, 1, 2, 3)
+
+    assert strip.led_count == 6
+    assert (tmp_path / "pru30").read_bytes() == b""
+    assert (tmp_path / "pru31").read_bytes() == b"2 1.0 2.0 3.0\n-1 0 0 0\n"
+
+
+# ---------------- MultiChannelNeoPixel.draw -----------------------
+def test_data_reaches_every_channel_before_the_draws(strip, writers) -> None:
+    strip.set_color_buffer(0, 1, 1, 1).set_color_buffer(3, 2, 2, 2).draw()
+
+    assert writers[0].writes == [b"0 1.0 1.0 1.0\n", b"-1 0 0 0\n"]
+    assert writers[1].writes == [b"1 2.0 2.0 2.0\n", b"-1 0 0 0\n"]
+    assert strip.stats.draws == 1
+
+
+def test_runs_and_segments_are_split_across_channels(strip, writers) -> None:
+    strip.set_rgb_run_buffer(1, bytes([1, 1, 1, 2, 2, 2])).flush()
+    strip.set_segment_buffer(NeoPixelPRU.SEGMENT_THREE, 9, 9, 9).flush()
+    strip.set_segment(NeoPixelPRU.SEGMENT_ALL, 5, 5, 5)
+
+    assert writers[0].writes == [b"1 1.0 1.0 1.0\n", b"4 5 5 5\n", b"-1 0 0 0\n"]
+    assert writers[1].writes == [
+        b"0 2.0 2.0 2.0\n",
+        b"0 9.0 9.0 9.0\n1 9.0 9.0 9.0\n",
+        b"4 5 5 5\n",
+        b"-1 0 0 0\n",
+    ]
+    assert strip.segment_range(NeoPixelPRU.SEGMENT_ONE) == (0, 1)
@@ -0,0 +1,112 @@
+from struct import unpack
+
+import pytest
+
+from presenter_drivers.neopixel.protocol import (
+    BINARY,
+    OP_CLEAR,
+    OP_DRAW,
+    OP_RUN,
+    OP_SET,
+    TEXT,
+    BinaryEncoder,
+    RunEncoder,
+    TextEncoder,
+    chunk_commands,
+    coalesce,
+    protocol_for,
+)
+
+
+# ---------------- protocol_for -----------------------
+@pytest.mark.parametrize(
+    "version, protocol",
+    [("1.x.x", TEXT), ("1.4.0", TEXT), ("2.0.0", BINARY), ("3.1", BINARY), ("", TEXT)],
+)
+def test_binary_needs_firmware_2(version, protocol) -> None:
+    assert protocol_for(version) == protocol
+
+
+# ---------------- TextEncoder -----------------------
+def test_text_commands_match_the_original_format() -> None:
+    encoder = TextEncoder()
+    buffer = bytearray(64)
+
+    n = encoder.pixel(buffer, 0, 3, 255, 0, 0)
+    n += encoder.command(buffer, n, 9, 1.9, 2, 3)
+    n += encoder.draw(buffer, n)
+
+    assert bytes(buffer[:n]) == b"3 255.0 0.0 0.0\n9 1 2 3\n-1 0 0 0\n"
+
+
+def test_text_commands_that_do_not_fit_write_nothing() -> None:
+    buffer = bytearray(10)
+
+    assert TextEncoder().command(buffer, 4, 9, 1, 2, 3) == 0
+    assert buffer == bytearray(10)
+
+
+# ---------------- BinaryEncoder -----------------------
+def test_only_the_binary_protocol_has_pixel_runs() -> None:
+    assert isinstance(BinaryEncoder(), RunEncoder)
+    assert not isinstance(TextEncoder(), RunEncoder)
+
+
+def test_binary_commands_are_packed_grb() -> None:
+    encoder = BinaryEncoder()
+    buffer = bytearray(16)
+
+    n = encoder.pixel(buffer, 0, 300, 1.5, 2, 300)
+    n += encoder.draw(buffer, n)
+    n += encoder.clear(buffer, n)
+
+    assert unpack("<BHBBB", buffer[:6]) == (OP_SET, 300, 2, 1, 255)
+    assert bytes(buffer[6:n]) == bytes([OP_DRAW, OP_CLEAR])
+
+
+def test_binary_pixel_runs_reorder_rgb_to_grb() -> None:
+    encoder = BinaryEncoder()
+    buffer = bytearray(32)
+    rgb = memoryview(bytes([1, 2, 3, 4, 5, 6]))
+
+    n = encoder.pixel_run(buffer, 1, 7, rgb)
+
+    assert n == encoder.run_bytes(2) == 11
+    assert unpack("<BHH", buffer[1:6]) == (OP_RUN, 7, 2)
+    assert bytes(buffer[6:12]) == bytes([2, 1, 3, 5, 4, 6])
+    assert encoder.pixel_run(buffer, 22, 7, rgb) == 0
+
+
+# ---------------- chunk_commands -----------------------
+def test_writes_are_cut_on_command_boundaries() -> None:
+    data = b"10 1 1 1\n11 2 2 2\n-1 0 0 0\n"
+
+    assert chunk_commands(TextEncoder(), data, 20) == [
+        b"10 1 1 1\n11 2 2 2\n",
+        b"-1 0 0 0\n",
+    ]
+
+
+def test_binary_commands_are_split_by_opcode() -> None:
+    encoder = BinaryEncoder()
+    buffer = bytearray(64)
+    n = encoder.command(buffer, 0, 3, 1, 2, 3)
+    n += encoder.pixel_run(buffer, n, 0, memoryview(bytes(6)))
+    n += encoder.draw(buffer, n)
+
+    assert [len(c) for c in chunk_commands(encoder, buffer[:n], 12)] == [6, 12]
+    with pytest.raises(ValueError):
+        chunk_commands(encoder, buffer[: n - 2], 12)
+
+
+# ---------------- coalesce -----------------------
+def test_only_the_latest_command_per_entry_and_one_draw_are_kept() -> None:
+    writes = [b"0 1 1 1\n8 2 2 2\n-1 0 0 0\n", b"0 3 3 3\n-1 0 0 0\n", b"1 4 4 4\n"]
+
+    assert coalesce(TextEncoder(), writes) == b"8 2 2 2\n0 3 3 3\n1 4 4 4\n-1 0 0 0\n"
+
+
+def test_nothing_is_coalesced_across_a_clear() -> None:
+    writes = [b"0 1 1 1\n-1 0 0 0\n", b"-2 0 0 0\n0 1 1 1\n"]
+
+    assert coalesce(TextEncoder(), writes) == b"0 1 1 1\n-2 0 0 0\n0 1 1 1\n"
@@ -0,0 +1,41 @@
+# pylint: disable=protected-access
+import pytest
+
+from presenter_drivers.neopixel.ticker import Ticker, TickerRunning
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+# ---------------- Ticker scheduling -----------------------
+def test_late_ticks_drop_frames_instead_of_catching_up() -> None:
+    clock = Clock()
+    ticks = []
+    ticker = Ticker(
+        {"tick": lambda: ticks.append(clock.now), "periodSeconds": 0.1, "clock": clock}
+    )
+
+    next_s = ticker._advance(0.0)
+    assert next_s == pytest.approx(0.1)
+    assert ticker.stats.dropped == 0
+
+    clock.now = 0.35
+    next_s = ticker._advance(next_s)
+
+    assert next_s == pytest.approx(0.4)
+    assert ticker.stats.dropped == 2
+    assert ticks == [0.0, 0.35]
+
+
+def test_a_running_ticker_can_not_be_started_again() -> None:
+    ticker = Ticker({"tick": lambda: None, "periodSeconds": 0.01}).start()
+
+    with pytest.raises(TickerRunning):
+        ticker.start()
+    ticker.stop()
+    assert not ticker.is_running()
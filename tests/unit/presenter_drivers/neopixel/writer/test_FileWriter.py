@@ -0,0 +1,27 @@
+import sys
+
+from presenter_drivers.neopixel.writer import FileWriter
+
+file_writer_module = sys.modules["presenter_drivers.neopixel.writer.FileWriter"]
+
+
+# ---------------- FileWriter.write_many -----------------------
+def test_write_many_writes_every_buffer_in_order(tmp_path) -> None:
+    path = tmp_path / "pru.txt"
+    buffers = [b"0 1 1 1\n", bytearray(b""), memoryview(b"-1 0 0 0\n")]
+
+    with FileWriter(str(path)) as writer:
+        writer.write_many(buffers)
+        writer.write_many([])
+
+    assert path.read_bytes() == b"0 1 1 1\n-1 0 0 0\n"
+
+
+def test_write_many_splits_at_iov_max(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(file_writer_module, "IOV_MAX", 2)
+    path = tmp_path / "pru.txt"
+
+    with FileWriter(str(path)) as writer:
+        writer.write_many([bytes([i]) * i for i in range(1, 8)])
+
+    assert path.read_bytes() == b"".join(bytes([i]) * i for i in range(1, 8))
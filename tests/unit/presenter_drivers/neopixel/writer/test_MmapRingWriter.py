@@ -0,0 +1,37 @@
+import pytest
+
+from presenter_drivers.neopixel.writer import MmapRingWriter
+from presenter_drivers.neopixel.writer.MmapRingWriter import InvalidRing, read_ring
+
+
+# ---------------- MmapRingWriter -----------------------
+def test_the_ring_keeps_the_latest_bytes(tmp_path) -> None:
+    path = str(tmp_path / "capture.ring")
+
+    with MmapRingWriter({"path": path, "capacity": 8}) as ring:
+        ring.write(bytearray(b"abcde"))
+        assert ring.contents() == b"abcde"
+        ring.write_many([b"fgh", bytearray(b"ij")])
+        assert ring.contents() == b"cdefghij"
+        assert ring.overwritten == 2
+
+    assert read_ring(path) == b"cdefghij"
+
+
+def test_writes_larger_than_the_ring_keep_their_tail(tmp_path) -> None:
+    path = str(tmp_path / "capture.ring")
+
+    with MmapRingWriter({"path": path, "capacity": 4}) as ring:
+        ring.write(bytearray(b"xy"))
+        ring.write(bytearray(b"0123456789"))
+
+        assert ring.contents() == b"6789"
+        assert ring.written == 12
+
+
+def test_other_files_are_not_rings(tmp_path) -> None:
+    path = tmp_path / "not.ring"
+    path.write_bytes(b"0 1 1 1\n" * 8)
+
+    with pytest.raises(InvalidRing):
+        read_ring(str(path))
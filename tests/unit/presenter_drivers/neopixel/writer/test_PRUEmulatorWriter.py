@@ -0,0 +1,125 @@
+# pylint: disable=redefined-outer-name
+from typing import List
+
+import pytest
+
+from presenter_drivers.neopixel.NeoPixelPRU import NeoPixelPRU
+from presenter_drivers.neopixel.protocol import MAX_WRITE_BYTES
+from presenter_drivers.neopixel.writer import PRUEmulatorWriter
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(scope="function")
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture(scope="function")
+def emulator(clock) -> PRUEmulatorWriter:
+    return PRUEmulatorWriter(
+        {"ledCount": 6, "pixelSeconds": 0.001, "resetSeconds": 0.0, "clock": clock}
+    )
+
+
+def neopixel(emulator: PRUEmulatorWriter, firmware_version: str) -> NeoPixelPRU:
+    return NeoPixelPRU(
+        {"writer": emulator, "ledCount": 6, "firmwareVersion": firmware_version}
+    )
+
+
+# ---------------- PRUEmulatorWriter.write -----------------------
+@pytest.mark.parametrize("firmware_version", ["1.x.x", "2.0.0"])
+def test_both_protocols_drive_the_leds(emulator, firmware_version) -> None:
+    display = neopixel(emulator, firmware_version)
+
+    display.set_color_buffer(0, 10, 20, 30)
+    assert emulator.led(0) == (0, 0, 0), "nothing is shown before a draw"
+    display.set_color_run(4, [(1, 2, 3), (4, 5, 6)])
+
+    assert emulator.led(0) == (10, 20, 30)
+    assert emulator.leds[12:] == bytes([1, 2, 3, 4, 5, 6])
+
+    display.clear()
+    assert emulator.leds == bytes(18)
+
+
+def test_segments_fill_their_third_of_the_strip(emulator) -> None:
+    display = neopixel(emulator, "1.x.x")
+
+    display.set_segment_buffer(NeoPixelPRU.SEGMENT_ALL, 1, 1, 1)
+    display.set_segment(NeoPixelPRU.SEGMENT_TWO, 2, 2, 2)
+
+    colors: List[int] = [emulator.led(i)[0] for i in range(6)]
+    assert colors == [1, 1, 2, 2, 1, 1]
+
+
+def test_destinations_are_shown_at_the_next_draw(emulator) -> None:
+    neopixel(emulator, "1.x.x").set_destination_color(5, 7, 8, 9)
+
+    assert emulator.led(5) == (7, 8, 9)
+
+
+def test_commands_split_across_writes_are_reassembled(emulator, clock) -> None:
+    for chunk in (
+        b"0 1.0 2",
+        b".0 3.0\n-",
+        b"1 0 0 0\n\x81\x01",
+        b"\x00\x05\x04\x06\x83",
+    ):
+        emulator.write(bytearray(chunk))
+        clock.now += 1
+
+    assert emulator.led(0) == (1, 2, 3)
+    assert emulator.led(1) == (4, 5, 6)
+    assert emulator.stats.commands == 4
+
+
+def test_bad_commands_are_counted(emulator) -> None:
+    emulator.write(bytearray(b"0 1\n99 0 0 0\n\xff-1 0 0 0\n"))
+
+    assert emulator.stats.errors == 3
+    assert emulator.stats.frames == 1
+
+
+def test_writes_over_the_rpmsg_limit_are_refused(emulator) -> None:
+    with pytest.raises(OSError):
+        emulator.write(bytearray(b"0 1 1 1\n" * (MAX_WRITE_BYTES // 8 + 1)))
+
+    assert emulator.stats.errors == 1
+    assert emulator.stats.commands == 0
+
+
+def test_a_file_name_is_ignored() -> None:
+    assert PRUEmulatorWriter("/tmp/rpmsg_pru30.txt").leds == bytes(3 * 42)
+
+
+# ---------------- PRUEmulatorWriter timing -----------------------
+def test_draws_while_the_strip_is_busy_are_dropped(emulator, clock) -> None:
+    assert emulator.frame_seconds == pytest.approx(0.006)
+
+    for t in (0.0, 0.004, 0.007, 0.020, 0.021):
+        clock.now = t
+        emulator.write(bytearray(b"-1 0 0 0\n"))
+
+    assert emulator.stats.frames == 3
+    assert emulator.stats.dropped == 2
+    assert emulator.stats.fps == pytest.approx(2 / 0.020)
+    assert emulator.stats.max_fps == pytest.approx(1 / 0.006)
+
+
+def test_frames_slower_than_the_target_are_late(clock) -> None:
+    emulator = PRUEmulatorWriter({"targetFps": 50, "clock": clock})
+
+    for t in (0.0, 0.025, 0.065, 0.09):
+        clock.now = t
+        emulator.write(bytearray(b"-1 0 0 0\n"))
+
+    assert emulator.stats.late == 1
+    assert emulator.stats.frames == 4
@@ -0,0 +1,11 @@
+from presenter_drivers.neopixel.writer import STDOutWriter
+
+
+# ---------------- STDOutWriter.write -----------------------
+def test_bytes_are_written_without_decoding(capsysbinary) -> None:
+    writer = STDOutWriter(None)
+
+    writer.write(bytearray(b"-1 0 0 0\n"))
+    writer.write_many([b"\x81\x00\x00\xff", bytearray(b"\x83")])
+
+    assert capsysbinary.readouterr().out == b"-1 0 0 0\n\x81\x00\x00\xff\x83"
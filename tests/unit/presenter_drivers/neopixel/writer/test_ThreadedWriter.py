@@ -0,0 +1,134 @@
+# pylint: disable=redefined-outer-name
+import os
+from threading import Event, Thread, current_thread
+from typing import List
+
+import pytest
+
+from presenter_drivers.neopixel.protocol import MAX_WRITE_BYTES
+from presenter_drivers.neopixel.writer import ThreadedWriter
+
+from ..test_NeoPixelPRU import ListWriter
+
+
+class GatedWriter(ListWriter):
+    """
+    Blocks every write until the gate is opened, like a backed up PRU channel.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.gate = Event()
+        self.entered = Event()
+
+    def write(self, b: bytearray) -> None:
+        self.entered.set()
+        self.gate.wait(5)
+        super().write(b)
+
+
+@pytest.fixture(scope="function")
+def gated() -> GatedWriter:
+    return GatedWriter()
+
+
+# ---------------- ThreadedWriter.write -----------------------
+def test_writes_pass_straight_through_until_started() -> None:
+    inner = ListWriter()
+    writer = ThreadedWriter({"writer": inner})
+
+    writer.write(bytearray(b"-1 0 0 0\n"))
+
+    assert inner.writes == [b"-1 0 0 0\n"]
+    assert writer.stats.writes == 1
+
+
+def test_a_slow_device_skips_to_the_latest_frame(gated) -> None:
+    writer = ThreadedWriter({"writer": gated, "queueSize": 2})
+
+    with writer:
+        writer.write(bytearray(b"0 1 1 1\n-1 0 0 0\n"))
+        assert gated.entered.wait(5)
+        for frame in (
+            b"0 2 2 2\n-1 0 0 0\n",
+            b"1 3 3 3\n-1 0 0 0\n",
+            b"0 4 4 4\n-1 0 0 0\n",
+            b"2 5 5 5\n-1 0 0 0\n",
+        ):
+            writer.write(bytearray(frame))
+        assert writer.depth() == 2
+        gated.gate.set()
+        assert writer.flush(5)
+
+    assert gated.writes == [
+        b"0 1 1 1\n-1 0 0 0\n",
+        b"1 3 3 3\n0 4 4 4\n-1 0 0 0\n",
+        b"2 5 5 5\n-1 0 0 0\n",
+    ], "no change is lost"
+    assert writer.stats.merged == 2
+    assert writer.stats.dropped == 0
+    assert writer.stats.max_depth == 2
+    assert not writer.is_running()
+
+
+def test_writes_go_out_within_the_rpmsg_limit() -> None:
+    inner = ListWriter()
+    frame = b"".join(b"%d 255 255 255\n" % i for i in range(42)) + b"-1 0 0 0\n"
+
+    ThreadedWriter({"writer": inner}).write(bytearray(frame))
+
+    assert b"".join(inner.writes) == frame
+    assert max(len(w) for w in inner.writes) <= MAX_WRITE_BYTES
+
+
+def test_failed_writes_are_reported_on_the_producer_thread() -> None:
+    drops: List[Thread] = []
+    failed = Event()
+
+    class FailingWriter(ListWriter):
+        def write(self, b: bytearray) -> None:
+            failed.set()
+            raise OSError("EINVAL")
+
+    writer = ThreadedWriter(
+        {"writer": FailingWriter(), "onDrop": lambda: drops.append(current_thread())}
+    )
+
+    with writer:
+        writer.write(bytearray(b"-1 0 0 0\n"))
+        assert failed.wait(5)
+        assert writer.flush(5)
+        assert not drops
+        writer.write(bytearray(b"-1 0 0 0\n"))
+
+    assert writer.stats.dropped == 2
+    assert drops == [current_thread()]
+
+
+def test_exactly_one_destination_is_needed() -> None:
+    with pytest.raises(ValueError):
+        ThreadedWriter({})
+
+
+# ---------------- ThreadedWriter non-blocking path -----------------------
+def test_a_full_device_is_retried_without_losing_bytes(tmp_path) -> None:
+    fifo = str(tmp_path / "rpmsg")
+    os.mkfifo(fifo)
+    reader = os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
+    frame = b"0 255 255 255\n" * 16384
+    received = bytearray()
+
+    writer = ThreadedWriter({"path": fifo, "retrySeconds": 0.001})
+    with writer:
+        writer.write(bytearray(frame))
+        while len(received) < len(frame):
+            try:
+                received += os.read(reader, 65536)
+            except BlockingIOError:
+                pass
+        assert writer.flush(5)
+    os.close(reader)
+
+    assert received == frame
+    assert writer.stats.eagain > 0
+    assert writer.stats.writes == 1
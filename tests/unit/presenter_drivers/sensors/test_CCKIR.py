@@ -0,0 +1,85 @@
+# pylint: disable=redefined-outer-name
+from time import perf_counter
+
+import pytest
+
+from presenter_drivers.sensors.CCKIR import CCKIR
+from presenter_drivers.sensors.hardware_sim.ads1015 import (
+    FakeADS1015,
+    FakeAnalogIn,
+    constant,
+    pulses,
+)
+from presenter_drivers.sensors.hardware_sim.cckir import check_pass
+
+
+def cckir(**simulation) -> CCKIR:
+    return CCKIR({"simulation": {"realtime": False, **simulation}})
+
+
+# ---------------- FakeADS1015 -----------------------
+def test_readings_are_scaled_to_16_bits_and_clipped_to_12() -> None:
+    ads = FakeADS1015({"realtime": False, "waveforms": [constant(100), constant(5000)]})
+
+    assert FakeAnalogIn(ads, 0).value == 100 << 4
+    assert FakeAnalogIn(ads, 1).value == 2047 << 4
+    assert FakeAnalogIn(ads, 3).value == 0, "unused pins read 0"
+
+
+def test_a_read_takes_a_conversion_at_the_data_rate() -> None:
+    ads = FakeADS1015({"dataRate": 250, "i2cOverheadSeconds": 0.0})
+    pin = FakeAnalogIn(ads, 0)
+
+    start = perf_counter()
+    for _ in range(5):
+        _ = pin.value
+
+    assert perf_counter() - start >= 5 / 250
+    assert ads.reads == 5
+
+
+def test_pulses_have_linear_edges_and_repeat() -> None:
+    wave = pulses(0, 100, [(1.0, 2.0)], edge_s=0.5, repeat_s=4.0)
+
+    assert [wave(t) for t in (0.5, 1.25, 1.5, 1.9, 5.5)] == pytest.approx(
+        [0, 50, 100, 20, 100]
+    )
+
+
+# ---------------- CCKIR -----------------------
+def test_cckir_reads_the_simulated_boards_in_sensor_order() -> None:
+    waveforms = [constant(10 * (c + 1)) for c in range(6)]
+    ir = cckir(waveforms=waveforms)
+
+    assert ir.read_all() == tuple(10 * (c + 1) << 4 for c in range(6))
+    assert ir.read_sensor(CCKIR.Sensor.RIGHT_FRONT) == 40 << 4
+    assert ir.read_middle() == {
+        CCKIR.Sensor.LEFT_MIDDLE: 20 << 4,
+        CCKIR.Sensor.RIGHT_MIDDLE: 50 << 4,
+    }
+
+
+def test_noise_is_repeatable_with_a_seed() -> None:
+    first = cckir(noise=20.0, seed=1)
+    second = cckir(noise=20.0, seed=1)
+
+    readings = [first.read_all() for _ in range(10)]
+
+    assert readings == [second.read_all() for _ in range(10)]
+    assert len(set(readings)) > 1
+
+
+def test_a_check_pass_covers_the_front_pair_first() -> None:
+    scenario = check_pass(start_s=1.0, stagger_s=0.2, edge_s=0.0)
+    ((start, end),) = scenario.presence
+
+    at = [w(start + 0.1) for w in scenario.waveforms]
+
+    assert at[CCKIR.Sensor.LEFT_FRONT.value] > at[CCKIR.Sensor.LEFT_MIDDLE.value]
+    assert at[CCKIR.Sensor.RIGHT_FRONT.value] > at[CCKIR.Sensor.RIGHT_REAR.value]
+    assert end > start
+
+
+def test_unknown_scenarios_are_rejected() -> None:
+    with pytest.raises(ValueError):
+        cckir(scenario="nope")
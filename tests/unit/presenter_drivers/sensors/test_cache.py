@@ -0,0 +1,93 @@
+# pylint: disable=redefined-outer-name
+import errno
+import json
+import os
+
+import pytest
+
+from presenter_drivers.sensors.cache import (
+    CACHE_VERSION,
+    CachedCalibration,
+    CalibrationCache,
+)
+
+ADDRESSES = (0x48, 0x49)
+
+
+@pytest.fixture(scope="function")
+def cache(tmp_path):
+    return CalibrationCache(
+        {"path": str(tmp_path / "cache" / "ir.json"), "boardId": "board-1"}
+    )
+
+
+# ---------------- CalibrationCache.load -----------------------
+def test_a_saved_calibration_is_loaded_back(cache) -> None:
+    calibration = CachedCalibration(((1, 10), (2, 20)), (6.0, 12.0), 123.0)
+    cache.save(ADDRESSES, calibration)
+
+    assert cache.load(ADDRESSES) == calibration
+    assert cache.load((0x4A, 0x4B)) is None, "keyed by I2C address"
+
+
+def test_calibrations_from_another_cache_version_are_ignored(cache) -> None:
+    cache.save(ADDRESSES, CachedCalibration(((1, 10),), (6.0,)))
+    with open(cache.path, encoding="utf-8") as f:
+        data = json.load(f)
+    data["version"] = CACHE_VERSION + 1
+    with open(cache.path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    assert cache.load(ADDRESSES) is None
+
+
+def test_the_cache_is_synced_before_it_replaces_the_old_one(cache, monkeypatch) -> None:
+    calls = []
+    replace = os.replace
+    monkeypatch.setattr(os, "fsync", lambda fd: calls.append("fsync"))
+    monkeypatch.setattr(
+        os, "replace", lambda src, dst: (calls.append("replace"), replace(src, dst))
+    )
+
+    cache.save(ADDRESSES, CachedCalibration(((1, 10),), (6.0,)))
+
+    assert calls == ["fsync", "replace"]
+
+
+def test_a_failed_write_keeps_the_old_cache_and_no_temp_file(
+    cache, monkeypatch
+) -> None:
+    cache.save(ADDRESSES, CachedCalibration(((1, 10),), (6.0,)))
+
+    def full(fd: int) -> None:
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(os, "fsync", full)
+    cache.save(ADDRESSES, CachedCalibration(((2, 20),), (12.0,)))
+
+    assert cache.load(ADDRESSES) == CachedCalibration(((1, 10),), (6.0,))
+    assert os.listdir(os.path.dirname(cache.path)) == ["ir.json"]
+
+
+def test_invalidate_removes_the_entry(cache) -> None:
+    cache.save(ADDRESSES, CachedCalibration(((1, 10),), (6.0,)))
+    cache.invalidate(ADDRESSES)
+    assert cache.load(ADDRESSES) is None
+
+
+# ---------------- CachedCalibration.agrees_with -----------------------
+@pytest.mark.parametrize(
+    ("readings", "expected"),
+    (
+        ([(100, 500), (200, 450)], True),
+        ([(100, 500), (110, 599)], True),
+        ([(100, 500), (100, 700)], False),
+        ([(0, 500)], False),
+    ),
+    ids=("in range", "within tolerance", "too high", "too low"),
+)
+def test_agrees_with_checks_readings_against_the_calibrated_ranges(
+    readings, expected
+) -> None:
+    calibration = CachedCalibration(((100, 300), (100, 500)), (210.0, 320.0))
+    assert calibration.agrees_with(readings, 0.25) is expected
@@ -0,0 +1,60 @@
+from presenter_drivers.sensors.cache import CachedCalibration
+from presenter_drivers.sensors.CCKIR import CCKIR
+from presenter_drivers.sensors.detector import Pair, PresenceDetector, PresenceEvent
+
+ON = (500,) * 6
+OFF = (400,) * 6
+
+
+# ---------------- PresenceDetector.update -----------------------
+def test_a_sensor_stays_present_until_it_drops_below_the_off_threshold() -> None:
+    detector = PresenceDetector({"onThresholds": ON, "offThresholds": OFF})
+
+    assert detector.update((600, 0, 0, 0, 0, 0), 1) == [
+        PresenceEvent(True, 1, sensor=CCKIR.Sensor.LEFT_FRONT)
+    ]
+    assert detector.update((450, 0, 0, 0, 0, 0), 2) == [], "inside hysteresis band"
+    assert detector.is_present(CCKIR.Sensor.LEFT_FRONT)
+    assert detector.update((399, 0, 0, 0, 0, 0), 3) == [
+        PresenceEvent(False, 3, sensor=CCKIR.Sensor.LEFT_FRONT)
+    ]
+
+
+def test_frames_before_thresholds_are_published_are_ignored() -> None:
+    detector = PresenceDetector({})
+
+    assert detector.update((600,) * 6, 1) == []
+    assert not detector.state()
+
+    detector.set_thresholds(ON, OFF)
+    assert len(detector.update((600,) * 6, 2)) == 6 + len(Pair)
+
+
+def test_pair_events_fire_when_both_sensors_of_a_pair_change() -> None:
+    seen = []
+    detector = PresenceDetector({"onThresholds": ON, "offThresholds": OFF})
+    detector.add_listener(seen.append)
+
+    detector.update((0, 0, 600, 0, 0, 0))
+    events = detector.update((0, 0, 600, 0, 0, 600))
+
+    assert events == [
+        PresenceEvent(True, 0, sensor=CCKIR.Sensor.RIGHT_REAR),
+        PresenceEvent(True, 0, pair=Pair.REAR),
+    ]
+    assert detector.is_pair_present(Pair.REAR)
+    assert len(seen) == 3
+    assert detector.update((0, 0, 0, 0, 0, 600))[-1] == PresenceEvent(
+        False, 0, pair=Pair.REAR
+    )
+
+
+# ---------------- PresenceDetector.set_calibration -----------------------
+def test_a_calibration_hysteresis_overrides_the_detector_default() -> None:
+    detector = PresenceDetector({"hysteresis": 0.05})
+
+    detector.set_calibration(CachedCalibration(((0, 1000),) * 6, ON, hysteresis=0.2))
+    detector.update((600, 0, 0, 0, 0, 0))
+
+    assert detector.update((350, 0, 0, 0, 0, 0)) == [], "off threshold is 300"
+    assert detector.is_present(CCKIR.Sensor.LEFT_FRONT)
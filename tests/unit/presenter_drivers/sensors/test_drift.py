@@ -0,0 +1,60 @@
+from presenter_drivers.sensors.cache import CachedCalibration
+from presenter_drivers.sensors.drift import DriftTracker
+from presenter_drivers.sensors.sampler import (
+    NANOSECONDS_IN_SECOND,
+    Frame,
+    IRFrameBuffer,
+)
+
+CALIBRATION = CachedCalibration(((100, 500),), (320.0,))
+
+
+def _tracker(**config) -> DriftTracker:
+    return DriftTracker(
+        {
+            "buffer": IRFrameBuffer(8, 1),
+            "calibration": CALIBRATION,
+            "timeConstantSeconds": 1.0,
+            "holdOffSeconds": 1.0,
+            "publishIntervalSeconds": 1.0,
+            **config,
+        }
+    )
+
+
+# ---------------- DriftTracker.update -----------------------
+def test_the_background_follows_readings_while_no_paper_is_present() -> None:
+    published = []
+    tracker = _tracker(onUpdate=published.append)
+    for i in range(101):
+        tracker.update(Frame(i, i * NANOSECONDS_IN_SECOND // 10, (150,)))
+
+    assert tracker.background()[0] > 149
+    assert published, "thresholds are republished"
+    assert tracker.calibration().ranges == ((150, 550),)
+    assert tracker.thresholds() == (370.0,), "the thresholds move with the background"
+
+
+def test_paper_and_the_hold_off_after_it_do_not_move_the_background() -> None:
+    tracker = _tracker()
+    step = NANOSECONDS_IN_SECOND // 10
+    tracker.update(Frame(0, 0, (100,)))
+    tracker.update(Frame(1, step, (450,)))
+    for i in range(2, 11):
+        tracker.update(Frame(i, i * step, (200,)))
+
+    assert tracker.background() == (100.0,)
+    assert tracker.calibration() is CALIBRATION
+
+
+# ---------------- DriftTracker.publish -----------------------
+def test_tuned_thresholds_are_shifted_not_rebuilt() -> None:
+    tuned = CachedCalibration(((100, 500), (200, 600)), (450.0, 260.0))
+    tracker = _tracker(calibration=tuned, buffer=IRFrameBuffer(8, 2))
+    tracker.update(Frame(0, 0, (90, 230)))
+    tracker.update(Frame(1, NANOSECONDS_IN_SECOND * 10, (90, 230)))
+
+    calibration = tracker.publish()
+
+    assert calibration.ranges == ((90, 490), (230, 630))
+    assert calibration.thresholds == (440.0, 290.0)
@@ -0,0 +1,53 @@
+import pytest
+
+from presenter_drivers.sensors.filters import (
+    Decimator,
+    EMAFilter,
+    FilterPipeline,
+    MedianFilter,
+    pipelineFactory,
+)
+
+
+# ---------------- MedianFilter -----------------------
+def test_median_filter_removes_a_single_spike() -> None:
+    median = MedianFilter({"window": 3, "channels": 2})
+    outputs = [median.apply(v) for v in ((10, 1), (11, 1), (900, 1), (12, 1))]
+    assert [o[0] for o in outputs] == [10, 10.5, 11, 12]
+    assert median.latency_samples() == 1
+
+
+# ---------------- EMAFilter -----------------------
+def test_ema_filter_starts_at_the_first_reading() -> None:
+    ema = EMAFilter({"alpha": 0.5, "channels": 1})
+    assert ema.apply((100,)) == (100,)
+    assert ema.apply((200,)) == (150,)
+    assert ema.latency_samples() == 1
+
+
+# ---------------- Decimator -----------------------
+def test_decimator_emits_the_mean_of_every_factor_readings() -> None:
+    decimator = Decimator({"factor": 2, "channels": 1})
+    assert decimator.apply((1,)) is None
+    assert decimator.apply((3,)) == (2,)
+    assert decimator.apply((5,)) is None
+
+
+# ---------------- FilterPipeline -----------------------
+def test_pipeline_latency_accounts_for_decimation() -> None:
+    pipeline = pipelineFactory(
+        [
+            {"type": "Decimator", "config": {"factor": 4, "channels": 1}},
+            {"type": "Median", "config": {"window": 3, "channels": 1}},
+        ]
+    )
+    assert isinstance(pipeline, FilterPipeline)
+    assert pipeline.decimation() == 4
+    # 1.5 samples for the decimator plus 1 decimated sample (4 inputs) for the median.
+    assert pipeline.latency_samples() == 5.5
+    assert pipeline.latency_seconds(0.01) == pytest.approx(0.055)
+
+
+def test_unknown_filter_types_are_rejected() -> None:
+    with pytest.raises(ValueError):
+        pipelineFactory([{"type": "Kalman"}])
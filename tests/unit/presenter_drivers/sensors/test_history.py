@@ -0,0 +1,77 @@
+from presenter_drivers.sensors.history import (
+    NANOSECONDS_IN_MINUTE,
+    IRHistory,
+    SummaryTier,
+)
+from presenter_drivers.sensors.sampler import NANOSECONDS_IN_SECOND
+
+MS = 1000000
+
+
+# ---------------- SummaryTier -----------------------
+def test_buckets_close_when_a_reading_lands_in_the_next_one() -> None:
+    tier = SummaryTier(NANOSECONDS_IN_SECOND, capacity=4, channels=2)
+
+    assert tier.add(100 * MS, (1, 10)) is None
+    assert tier.add(900 * MS, (3, 30)) is None
+    closed = tier.add(1100 * MS, (5, 50))
+
+    assert closed is not None
+    assert closed.start_ns == 0
+    assert closed.readings == 2
+    assert closed.mins == (1, 10)
+    assert closed.means == (2.0, 20.0)
+    assert closed.maxs == (3, 30)
+    assert len(tier) == 1
+
+
+def test_the_oldest_buckets_are_overwritten_and_ranges_stay_sorted() -> None:
+    tier = SummaryTier(NANOSECONDS_IN_SECOND, capacity=3, channels=1)
+    for s in range(6):
+        tier.add(s * NANOSECONDS_IN_SECOND, (s,))
+    tier.flush()
+
+    assert len(tier) == 3
+    assert [b.mins[0] for b in tier.range(0, 10 * NANOSECONDS_IN_SECOND)] == [3, 4, 5]
+    assert [
+        b.start_ns
+        for b in tier.range(4 * NANOSECONDS_IN_SECOND, 5 * NANOSECONDS_IN_SECOND)
+    ] == [4 * NANOSECONDS_IN_SECOND]
+
+
+# ---------------- IRHistory -----------------------
+def test_seconds_roll_up_into_minutes() -> None:
+    history = IRHistory({"channels": 1, "rawCapacity": 8, "secondsCapacity": 90})
+    for s in range(125):
+        for ms in (0, 500):
+            history.append(s * NANOSECONDS_IN_SECOND + ms * MS, (s,))
+
+    minutes = history.minutes.range(0, 10 * NANOSECONDS_IN_MINUTE)
+    assert [(m.readings, m.mins[0], m.maxs[0]) for m in minutes] == [
+        (120, 0, 59),
+        (120, 60, 119),
+    ]
+    assert minutes[0].means[0] == 29.5
+    assert len(history.frames(0, 125 * NANOSECONDS_IN_SECOND)) == 8
+
+
+def test_frames_returns_the_raw_readings_in_the_window() -> None:
+    history = IRHistory({"channels": 1, "rawCapacity": 8})
+    for i in range(20):
+        history.append(i * 100 * MS, (i,))
+
+    assert [f.values[0] for f in history.frames(1450 * MS, 1700 * MS)] == [15, 16]
+    assert [f.values[0] for f in history.frames(0, 1300 * MS)] == [12]
+    assert not history.frames(2000 * MS, 3000 * MS)
+
+
+def test_query_falls_back_to_minutes_once_seconds_have_rolled_off() -> None:
+    history = IRHistory({"channels": 1, "secondsCapacity": 60})
+    for s in range(200):
+        history.append(s * NANOSECONDS_IN_SECOND, (s,))
+
+    recent = history.query(150 * NANOSECONDS_IN_SECOND, 160 * NANOSECONDS_IN_SECOND)
+    old = history.query(0, 120 * NANOSECONDS_IN_SECOND)
+
+    assert len(recent) == 10
+    assert [m.start_ns for m in old] == [0, NANOSECONDS_IN_MINUTE]
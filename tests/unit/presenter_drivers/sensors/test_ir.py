@@ -0,0 +1,32 @@
+import random
+
+from presenter_drivers.sensors.ir import StreamingCalibrator
+from presenter_drivers.sensors.sampler import IRFrameBuffer
+
+
+# ---------------- StreamingCalibrator.update -----------------------
+def test_a_single_spike_does_not_move_the_calibrated_range() -> None:
+    rng = random.Random(3)
+    calibrator = StreamingCalibrator({"channels": 1})
+    for i in range(400):
+        paper = i % 2 == 0
+        calibrator.update((rng.gauss(900 if paper else 300, 10),))
+    calibrator.update((4000,))
+
+    result = calibrator.results()[0]
+    assert result.count == 401
+    assert 250 < result.low < 320
+    assert 880 < result.high < 950
+
+
+# ---------------- StreamingCalibrator.stop -----------------------
+def test_stop_returns_low_and_high_pairs_read_from_a_frame_buffer() -> None:
+    buffer = IRFrameBuffer(64, 2)
+    calibrator = StreamingCalibrator({"buffer": buffer, "readDelaySeconds": 0.001})
+    calibrator.start()
+    for i in range(40):
+        buffer.push(i, (100 + i % 2, 200 + i % 2))
+    results = calibrator.stop()
+
+    assert calibrator.channels == 2
+    assert results == ((100, 101), (200, 201))
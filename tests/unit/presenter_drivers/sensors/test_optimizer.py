@@ -0,0 +1,111 @@
+# pylint: disable=redefined-outer-name
+import json
+import random
+
+import pytest
+
+from presenter_drivers.sensors.cache import CalibrationCache
+from presenter_drivers.sensors.CCKIR import CCKIR
+from presenter_drivers.sensors.optimizer import (
+    Interval,
+    NoFeasibleThresholds,
+    ThresholdOptimizer,
+    hysteresis_state,
+    main,
+    masks_above,
+    masks_below,
+)
+from presenter_drivers.sensors.recording import IRRecorder, IRRecording
+
+PERIOD_NS = 10000000
+BACKGROUND = 100
+PAPER = 1000
+SPIKE = 400
+
+
+def value(i: int) -> int:
+    # Paper for frames 20-59, ramping up over 10 frames. A noise spike at frame 80.
+    if 20 <= i < 60:
+        return BACKGROUND + (PAPER - BACKGROUND) * min(i - 19, 10) // 10
+    if i == 80:
+        return SPIKE
+    return BACKGROUND
+
+
+@pytest.fixture(scope="function")
+def recording_path(tmp_path):
+    path = str(tmp_path / "session.rec")
+    with IRRecorder({"path": path}) as recorder:
+        for i in range(100):
+            recorder.write(i * PERIOD_NS, (value(i),) * 6)
+    return path
+
+
+INTERVALS = [Interval(20 * PERIOD_NS, 60 * PERIOD_NS)]
+
+
+# ---------------- hysteresis_state -----------------------
+def test_hysteresis_state_matches_a_frame_by_frame_detector() -> None:
+    rng = random.Random(7)
+    values = [rng.randint(0, 100) for _ in range(500)]
+    on, off = 60, 40
+
+    state = hysteresis_state(
+        masks_above(values, [on])[0], masks_below(values, [off])[0], len(values)
+    )
+
+    present = False
+    for i, v in enumerate(values):
+        if v > on:
+            present = True
+        elif v < off:
+            present = False
+        assert bool(state >> i & 1) == present, i
+
+
+# ---------------- ThresholdOptimizer.optimize -----------------------
+def test_optimize_picks_the_fastest_threshold_above_the_noise(recording_path) -> None:
+    optimizer = ThresholdOptimizer({"steps": 32, "hysteresis": (0.0, 0.05)})
+    with IRRecording(recording_path) as recording:
+        optimizer.add_session(recording, INTERVALS)
+
+    result = optimizer.optimize()
+
+    for threshold in result.calibration.thresholds:
+        assert SPIKE <= threshold < PAPER
+    assert result.calibration.hysteresis == 0.05, "ties go to more hysteresis"
+    assert all(r is not None and r.false_positives == 0 for r in result.channels)
+    assert result.latency_ns <= 5 * PERIOD_NS
+
+
+def test_optimize_fails_when_no_threshold_avoids_false_positives(
+    recording_path,
+) -> None:
+    optimizer = ThresholdOptimizer({"steps": 32})
+    with IRRecording(recording_path) as recording:
+        # The spike at frame 80 is labelled, the paper is not.
+        optimizer.add_session(
+            recording,
+            [Interval(80 * PERIOD_NS, 81 * PERIOD_NS, (CCKIR.Sensor.LEFT_FRONT,))],
+        )
+
+    with pytest.raises(NoFeasibleThresholds):
+        optimizer.optimize()
+
+
+# ---------------- main -----------------------
+def test_main_saves_a_loadable_calibration(tmp_path, recording_path) -> None:
+    session = tmp_path / "session.json"
+    session.write_text(
+        json.dumps(
+            {"recording": "session.rec", "intervals": [{"start": 0.2, "end": 0.6}]}
+        )
+    )
+    cache_path = str(tmp_path / "cache.json")
+
+    result = main(
+        [str(session), "--cache", cache_path, "--board-id", "b", "--steps", "16"]
+    )
+
+    cache = CalibrationCache({"path": cache_path, "boardId": "b"})
+    assert cache.load((0x48, 0x49)) == result.calibration
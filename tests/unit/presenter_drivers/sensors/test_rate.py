@@ -0,0 +1,43 @@
+from unittest.mock import MagicMock
+
+from presenter_drivers.motor.driver import MotorDriver
+from presenter_drivers.sensors.rate import MotorDoorPolicy
+
+
+def _policy(motor_state, door_open):
+    motor = MagicMock()
+    motor.is_running.side_effect = lambda: motor_state[0] != MotorDriver.State.STOP
+    door = MagicMock()
+    door.is_open.side_effect = lambda: door_open[0]
+    return MotorDoorPolicy(
+        {
+            "motor": motor,
+            "door": door,
+            "activePeriodSeconds": 0.005,
+            "idlePeriodSeconds": 0.5,
+            "holdSeconds": 60,
+        }
+    )
+
+
+# ---------------- MotorDoorPolicy.period_seconds -----------------------
+def test_sampling_ramps_up_when_the_motor_leaves_stop() -> None:
+    motor_state = [MotorDriver.State.STOP]
+    policy = _policy(motor_state, [False])
+    assert policy.period_seconds() == 0.5
+
+    motor_state[0] = MotorDriver.State.FORWARD
+    assert policy.period_seconds() == 0.005
+    motor_state[0] = MotorDriver.State.STOP
+    assert policy.period_seconds() == 0.005, "held after the motor stops"
+    assert policy.stats.get_row() == ["ACTIVE", "1", "0"]
+
+
+def test_sampling_ramps_up_when_the_door_changes_state() -> None:
+    door_open = [False]
+    policy = _policy([MotorDriver.State.STOP], door_open)
+    assert policy.period_seconds() == 0.5
+
+    door_open[0] = True
+    assert policy.period_seconds() == 0.005
+    assert policy.poll_seconds() == MotorDoorPolicy.DEFAULT_POLL_S
@@ -0,0 +1,114 @@
+# pylint: disable=redefined-outer-name
+import pytest
+
+from presenter_drivers.sensors import recording as recording_module
+from presenter_drivers.sensors.CCKIR import CCKIR
+from presenter_drivers.sensors.recording import (
+    HEADER,
+    InvalidRecording,
+    IRRecorder,
+    IRRecording,
+    ReplayCCKIR,
+    record_struct,
+)
+from presenter_drivers.sensors.sampler import IRFrameBuffer
+
+FRAMES = [(i * 10000000, tuple(i * 10 + c for c in range(6))) for i in range(5)]
+
+
+@pytest.fixture(scope="function")
+def path(tmp_path):
+    p = str(tmp_path / "ir.rec")
+    with IRRecorder({"path": p}) as recorder:
+        for timestamp_ns, values in FRAMES:
+            recorder.write(timestamp_ns, values)
+    return p
+
+
+# ---------------- IRRecorder -----------------------
+def test_records_are_fixed_size_after_the_header(path) -> None:
+    with open(path, "rb") as f:
+        size = len(f.read())
+    assert size == HEADER.size + len(FRAMES) * record_struct(6).size
+    assert record_struct(6).size % 8 == 0
+
+
+def test_a_recording_can_be_appended_to(path) -> None:
+    with IRRecorder({"path": path}) as recorder:
+        recorder.write(50000000, (1, 2, 3, 4, 5, 6))
+
+    with IRRecording(path) as recording:
+        assert len(recording) == len(FRAMES) + 1
+        assert recording[-1].values == (1, 2, 3, 4, 5, 6)
+
+    with pytest.raises(InvalidRecording):
+        IRRecorder({"path": path, "channels": 4})
+
+
+def test_files_with_a_truncated_header_are_not_appended_to(tmp_path) -> None:
+    p = tmp_path / "short.rec"
+    p.write_bytes(b"CCKIR")
+
+    with pytest.raises(InvalidRecording):
+        IRRecorder({"path": str(p)})
+
+
+def test_start_records_frames_from_a_buffer(tmp_path) -> None:
+    buffer = IRFrameBuffer(capacity=16)
+    recorder = IRRecorder(
+        {"path": str(tmp_path / "b.rec"), "buffer": buffer, "periodSeconds": 0.001}
+    )
+    recorder.start()
+    for timestamp_ns, values in FRAMES:
+        buffer.push(timestamp_ns, values)
+    recorder.close()
+
+    assert recorder.frames == len(FRAMES)
+
+
+# ---------------- IRRecording -----------------------
+def test_recording_reads_frames_and_strided_channels(path) -> None:
+    with IRRecording(path) as recording:
+        assert recording.channels == 6
+        assert recording[2].timestamp_ns == FRAMES[2][0]
+        assert recording[2].values == FRAMES[2][1]
+        assert recording.timestamps() == [t for t, _ in FRAMES]
+        assert recording.channel(3) == [v[3] for _, v in FRAMES]
+
+
+def test_big_endian_hosts_read_records_through_struct(path, monkeypatch) -> None:
+    monkeypatch.setattr(recording_module, "NATIVE_WORDS", False)
+
+    with IRRecording(path) as recording:
+        assert recording.timestamps() == [t for t, _ in FRAMES]
+        assert recording.channel(3) == [v[3] for _, v in FRAMES]
+
+
+def test_other_files_are_rejected(tmp_path) -> None:
+    p = tmp_path / "junk.rec"
+    p.write_bytes(b"not a recording at all")
+    with pytest.raises(InvalidRecording):
+        IRRecording(str(p))
+
+
+# ---------------- ReplayCCKIR -----------------------
+def test_replay_steps_a_frame_per_read_at_speed_zero(path) -> None:
+    replay = ReplayCCKIR({"recording": path, "speed": 0})
+
+    assert [replay.read_all() for _ in FRAMES] == [v for _, v in FRAMES]
+    assert replay.finished()
+    assert replay.read_all() == FRAMES[-1][1], "holds the last frame"
+    replay.close()
+
+
+def test_replay_has_the_cckir_read_interface(path) -> None:
+    replay = ReplayCCKIR({"recording": path, "speed": 1000000})
+
+    assert replay.finished()
+    assert replay.read_sensor(CCKIR.Sensor.RIGHT_FRONT) == FRAMES[-1][1][3]
+    assert replay.read_rear() == {
+        CCKIR.Sensor.LEFT_REAR: FRAMES[-1][1][2],
+        CCKIR.Sensor.RIGHT_REAR: FRAMES[-1][1][5],
+    }
+    assert [s.value for s in replay.get_sensors()] == list(FRAMES[-1][1])
+    replay.close()
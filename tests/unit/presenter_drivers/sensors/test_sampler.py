@@ -0,0 +1,111 @@
+# pylint: disable=redefined-outer-name, protected-access
+from unittest.mock import MagicMock
+
+import pytest
+
+from presenter_drivers.sensors.sampler import Frame, IRFrameBuffer, IRSampler
+
+
+@pytest.fixture(scope="function")
+def frame_buffer(request):
+    return IRFrameBuffer(*request.param)
+
+
+# ---------------- IRFrameBuffer.latest -----------------------
+@pytest.mark.parametrize(
+    ("frame_buffer",),
+    (((4, 2),),),
+    indirect=["frame_buffer"],
+    ids=("",),
+)
+def test_latest_returns_none_until_a_frame_is_pushed(frame_buffer) -> None:
+    assert frame_buffer.latest() is None
+    frame_buffer.push(10, (1, 2))
+    assert frame_buffer.latest() == Frame(0, 10, (1, 2))
+
+
+# ---------------- IRFrameBuffer.window -----------------------
+@pytest.mark.parametrize(
+    ("frame_buffer", "pushes", "count", "expected_seqs"),
+    (
+        ((4, 2), 3, 2, [1, 2]),
+        ((4, 2), 3, 10, [0, 1, 2]),
+        ((4, 2), 10, 10, [6, 7, 8, 9]),
+    ),
+    indirect=["frame_buffer"],
+    ids=("partial", "not full", "wrapped"),
+)
+def test_window_returns_the_most_recent_frames_oldest_first(
+    frame_buffer, pushes, count, expected_seqs
+) -> None:
+    for i in range(pushes):
+        frame_buffer.push(i * 100, (i, -i))
+
+    frames = frame_buffer.window(count)
+    assert [f.seq for f in frames] == expected_seqs
+    assert all(f.values == (f.seq, -f.seq) for f in frames)
+    assert all(f.timestamp_ns == f.seq * 100 for f in frames)
+
+
+# ---------------- IRFrameBuffer.bisect -----------------------
+@pytest.mark.parametrize(
+    ("frame_buffer", "timestamp_ns", "expected"),
+    (
+        ((4, 1), 0, 6),
+        ((4, 1), 700, 7),
+        ((4, 1), 750, 8),
+        ((4, 1), 2000, 10),
+    ),
+    indirect=["frame_buffer"],
+    ids=("before the oldest", "exact", "between", "after the newest"),
+)
+def test_bisect_finds_the_first_held_frame_at_or_after_a_time(
+    frame_buffer, timestamp_ns, expected
+) -> None:
+    for i in range(10):
+        frame_buffer.push(i * 100, (i,))
+
+    assert frame_buffer.bisect(timestamp_ns) == expected
+
+
+# ---------------- IRFrameBuffer.get -----------------------
+@pytest.mark.parametrize(
+    ("frame_buffer",),
+    (((2, 1),),),
+    indirect=["frame_buffer"],
+    ids=("",),
+)
+def test_get_returns_none_for_frames_that_have_been_overwritten(frame_buffer) -> None:
+    for i in range(3):
+        frame_buffer.push(i, (i,))
+
+    assert frame_buffer.get(0) is None
+    assert frame_buffer.get(1) == Frame(1, 1, (1,))
+    assert frame_buffer.get(3) is None
+
+
+@pytest.mark.parametrize(
+    ("frame_buffer",),
+    (((2, 1),),),
+    indirect=["frame_buffer"],
+    ids=("",),
+)
+def test_a_read_racing_the_writer_is_rejected(frame_buffer) -> None:
+    frame_buffer.push(0, (0,))
+    frame_buffer.push(1, (1,))
+    # Writer has started on frame 2 which reuses frame 0's slot.
+    frame_buffer._writing = 2
+    assert frame_buffer._read(0) is None
+    assert frame_buffer._read(1) == Frame(1, 1, (1,))
+
+
+# ---------------- IRSampler.sample -----------------------
+def test_sample_publishes_one_frame_of_every_sensor() -> None:
+    cckir = MagicMock()
+    cckir.read_all.return_value = (1, 2, 3, 4, 5, 6)
+    sampler = IRSampler({"cckir": cckir, "bufferCapacity": 8})
+
+    assert sampler.sample() == 0
+    frame = sampler.latest()
+    assert frame is not None
+    assert frame.values == (1, 2, 3, 4, 5, 6)
@@ -0,0 +1,50 @@
+import random
+import statistics
+
+import pytest
+
+from presenter_drivers.stats.streaming import P2Quantile, RunningStats
+
+
+# ---------------- RunningStats -----------------------
+def test_running_stats_matches_the_batch_mean_and_variance() -> None:
+    rng = random.Random(1)
+    data = [(rng.gauss(100, 5), rng.gauss(-3, 1)) for _ in range(500)]
+    stats = RunningStats(2)
+    for values in data:
+        stats.update(values)
+
+    for c in range(2):
+        column = [v[c] for v in data]
+        assert stats.mean()[c] == pytest.approx(statistics.mean(column))
+        assert stats.variance()[c] == pytest.approx(statistics.variance(column))
+
+
+# ---------------- P2Quantile -----------------------
+@pytest.mark.parametrize(
+    ("quantile",),
+    ((0.05,), (0.5,), (0.95,)),
+    ids=("low", "median", "high"),
+)
+def test_p2_quantile_estimates_are_close_to_the_exact_quantile(quantile) -> None:
+    rng = random.Random(2)
+    data = [rng.uniform(0, 1000) for _ in range(5000)]
+    estimator = P2Quantile(1, quantile)
+    for x in data:
+        estimator.update((x,))
+
+    exact = sorted(data)[int(quantile * len(data))]
+    assert estimator.value()[0] == pytest.approx(exact, abs=25)
+
+
+def test_p2_quantile_uses_the_raw_samples_before_the_markers_are_initialized() -> None:
+    estimator = P2Quantile(2, 0.5)
+    for values in ((3, 30), (1, 10), (2, 20)):
+        estimator.update(values)
+
+    assert estimator.value() == (2, 20)
+
+
+def test_p2_quantile_rejects_quantiles_outside_zero_and_one() -> None:
+    with pytest.raises(ValueError):
+        P2Quantile(1, 1.0)